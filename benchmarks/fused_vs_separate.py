@@ -0,0 +1,77 @@
+"""Compare fused and separate review modes against a running Ollama server.
+
+Usage:
+    python -m benchmarks.fused_vs_separate --model llama3.2:latest --runs 3
+
+Each sample diff is reviewed ``--runs`` times in each mode, without the
+review cache, and the script prints latency and finding counts per agent so
+the two modes can be compared for a given model and GPU.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from src.clients.ollama_client import OllamaClient
+from src.models import AgentConfig
+from src.services import OrchestratorService
+
+from .samples import SAMPLE_DIFFS
+
+AGENT_CONFIGS = [
+    AgentConfig(agent_name="security_agent", agent_class="security", temperature=0.1),
+    AgentConfig(agent_name="quality_agent", agent_class="quality", temperature=0.3),
+]
+
+
+async def run_mode(orchestrator: OrchestratorService, mode: str, runs: int) -> Dict:
+    latencies: List[float] = []
+    finding_counts: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(runs):
+        for code_diff in SAMPLE_DIFFS:
+            start = time.perf_counter()
+            if mode == "fused":
+                responses = await orchestrator.review_fused_async(code_diff)
+            else:
+                responses = await orchestrator.review_async(code_diff)
+            latencies.append(time.perf_counter() - start)
+            for response in responses:
+                finding_counts[response.agent_name].append(len(response.findings))
+    return {"latencies": latencies, "finding_counts": finding_counts}
+
+
+def report(mode: str, result: Dict) -> None:
+    latencies = sorted(result["latencies"])
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"\n[{mode}] {len(latencies)} reviews")
+    print(
+        f"  latency mean={statistics.mean(latencies):.2f}s "
+        f"p50={statistics.median(latencies):.2f}s p95={p95:.2f}s"
+    )
+    for agent_name, counts in sorted(result["finding_counts"].items()):
+        print(
+            f"  {agent_name}: {sum(counts)} findings "
+            f"(mean {statistics.mean(counts):.1f} per diff)"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="llama3.2:latest")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    llm_client = OllamaClient(model_name=args.model, host=args.host)
+    orchestrator = OrchestratorService(
+        llm_client=llm_client, agent_configs=AGENT_CONFIGS, max_workers=2
+    )
+    for mode in ("separate", "fused"):
+        report(mode, await run_mode(orchestrator, mode, args.runs))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,213 @@
+"""Load-test the review API offline against a simulated Ollama backend.
+
+Usage:
+    python -m benchmarks.load_test --requests 200 --concurrency 16
+    python -m benchmarks.load_test --modes separate fused --label after \\
+        --compare benchmarks/results/before.json
+
+The FastAPI app from src/main.py runs in-process with LLM_BACKEND=simulated,
+so the whole stack (admission, scheduler, limiter, singleflight, parsing)
+is exercised without a GPU. Each mode gets a fresh app lifespan and is
+driven by ``--concurrency`` closed-loop clients. The script prints p50,
+p95 and p99 latency and throughput per mode and saves them as JSON under
+``--output-dir`` so later runs can be compared with ``--compare``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from .samples import SAMPLE_DIFFS
+
+MODES = ("sequential", "parallel", "separate", "fused", "cascade", "stream")
+COMMENT_PREFIX = {"python": "#", "go": "//", "javascript": "//"}
+
+
+def make_diffs(count: int, duplicate_rate: float, seed: int) -> List[dict]:
+    """Request bodies, mostly unique so the cache and singleflight don't help.
+
+    A ``duplicate_rate`` share repeats an earlier body, as re-pushed commits
+    and retried webhooks do in production.
+    """
+    rng = random.Random(seed)
+    bodies: List[dict] = []
+    for index in range(count):
+        if bodies and rng.random() < duplicate_rate:
+            bodies.append(rng.choice(bodies))
+            continue
+        code_diff = SAMPLE_DIFFS[index % len(SAMPLE_DIFFS)]
+        prefix = COMMENT_PREFIX.get(code_diff.language, "#")
+        body = code_diff.model_dump()
+        body["new_code"] += f"\n{prefix} load test request {index}\n"
+        bodies.append(body)
+    return bodies
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def send(client, mode: str, body: dict) -> Dict:
+    start = time.perf_counter()
+    # ASGITransport buffers streamed bodies, so only the total time is measured
+    if mode == "stream":
+        async with client.stream("POST", "/code/review/stream", json=body) as response:
+            await response.aread()
+    else:
+        response = await client.post("/code/review", params={"mode": mode}, json=body)
+    return {
+        "status": response.status_code,
+        "latency": time.perf_counter() - start,
+    }
+
+
+async def run_mode(mode: str, bodies: List[dict], concurrency: int) -> Dict:
+    # Imported late: src.main reads the simulated backend settings from env
+    from src.main import app
+
+    pending = list(bodies)
+    samples: List[Dict] = []
+    errors = 0
+
+    async def client_loop(client) -> None:
+        nonlocal errors
+        while pending:
+            body = pending.pop()
+            try:
+                samples.append(await send(client, mode, body))
+            except Exception:
+                errors += 1
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load-test", timeout=None
+        ) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+
+    ok = [sample["latency"] for sample in samples if sample["status"] == 200]
+    return {
+        "requests": len(bodies),
+        "ok": len(ok),
+        "rejected": sum(1 for sample in samples if sample["status"] == 429),
+        "errors": errors + sum(1 for s in samples if s["status"] not in (200, 429)),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "latency_mean": statistics.mean(ok) if ok else None,
+        "latency_p50": percentile(ok, 0.50),
+        "latency_p95": percentile(ok, 0.95),
+        "latency_p99": percentile(ok, 0.99),
+    }
+
+
+def report(mode: str, result: Dict, baseline: Optional[Dict] = None) -> None:
+    def seconds(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.2f}s"
+
+    print(
+        f"\n[{mode}] ok={result['ok']} rejected={result['rejected']} "
+        f"errors={result['errors']} in {result['elapsed_seconds']:.1f}s"
+    )
+    print(
+        f"  throughput={result['throughput_rps']:.2f} req/s "
+        f"p50={seconds(result['latency_p50'])} p95={seconds(result['latency_p95'])} "
+        f"p99={seconds(result['latency_p99'])}"
+    )
+    if baseline:
+        changes = []
+        for key in ("throughput_rps", "latency_p50", "latency_p95", "latency_p99"):
+            before, after = baseline.get(key), result.get(key)
+            if before and after is not None:
+                changes.append(f"{key} {(after - before) / before * 100:+.1f}%")
+        print("  vs baseline: " + ", ".join(changes))
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--prefill-tps", type=float, default=1500)
+    parser.add_argument("--decode-tps", type=float, default=40)
+    parser.add_argument("--jitter", type=float, default=0.25)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--malformed-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--output-dir", default="benchmarks/results")
+    parser.add_argument("--compare", default=None, help="earlier results JSON")
+    args = parser.parse_args()
+
+    # Must be set before src.main builds the client and cache
+    os.environ.update(
+        {
+            "LLM_BACKEND": "simulated",
+            "SIM_PREFILL_TPS": str(args.prefill_tps),
+            "SIM_DECODE_TPS": str(args.decode_tps),
+            "SIM_JITTER": str(args.jitter),
+            "SIM_PARALLEL": str(args.parallel),
+            "SIM_MALFORMED_RATE": str(args.malformed_rate),
+            "SIM_SEED": str(args.seed),
+            "REVIEW_CACHE_SIZE": "0",
+            "REVIEW_SIMILARITY_THRESHOLD": "0",
+            "REVIEW_JOBS_DB": os.path.join(tempfile.mkdtemp(), "jobs.db"),
+        }
+    )
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    baseline = {}
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["results"]
+
+    bodies = make_diffs(args.requests, args.duplicate_rate, args.seed)
+    results = {}
+    for mode in args.modes:
+        results[mode] = await run_mode(mode, bodies, args.concurrency)
+        report(mode, results[mode], baseline.get(mode))
+
+    label = args.label or datetime.now().strftime("%Y%m%d-%H%M%S")
+    output = Path(args.output_dir) / f"{label}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    config = {key: value for key, value in vars(args).items() if key != "compare"}
+    document = {
+        "label": label,
+        "created_at": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "config": config,
+        "results": results,
+    }
+    output.write_text(json.dumps(document, indent=2))
+    print(f"\nsaved {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+"""Micro-benchmark: legacy multi-pass parser vs the single-pass FindingExtractor.
+
+Usage:
+    python -m benchmarks.parser_bench [--repeat 5]
+
+Runs both parsers on pathological model outputs (huge, truncated, nested
+fences, unbalanced braces, malformed quoting) at growing sizes and prints
+the best time and the number of findings recovered. Time per KB staying
+flat as inputs grow shows the extractor is linear; the legacy greedy
+``\\{[\\s\\S]*\\}`` search goes quadratic on inputs with many unclosed braces.
+"""
+
+import argparse
+import json
+import re
+import time
+from typing import Callable, Dict, List
+
+from src.agents.json_extractor import extract_findings
+
+
+def legacy_parse(llm_output: str) -> List[Dict]:
+    """The parse chain BaseAgent used before FindingExtractor, kept for comparison"""
+    text = llm_output.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    text = text.strip()
+    json_match = re.search(r"\{[\s\S]*\}", text)
+    if json_match:
+        text = json_match.group(0)
+    for old, new in {"“": '"', "”": '"', "‘": "'", "’": "'", "`": "'"}.items():
+        text = text.replace(old, new)
+    try:
+        return list(json.loads(text).get("findings", []))
+    except json.JSONDecodeError:
+        pass
+
+    severities = re.findall(r'"severity":\s*"(\w+)"', llm_output)
+    lines = re.findall(r'"line_number":\s*(\d+)', llm_output)
+    issues = re.findall(r'"issue_type":\s*"([^"]+)"', llm_output)
+    descriptions = re.findall(r'"description":\s*"([^"]+)"', llm_output)
+    return [
+        {
+            "severity": severities[i],
+            "line_number": int(lines[i]),
+            "issue_type": issues[i],
+            "description": descriptions[i],
+        }
+        for i in range(min(len(severities), len(lines), len(issues), len(descriptions)))
+    ]
+
+
+def new_parse(llm_output: str) -> List[Dict]:
+    return [item.data for item in extract_findings(llm_output)]
+
+
+def _finding(i: int) -> Dict:
+    return {
+        "severity": "high",
+        "line_number": i,
+        "issue_type": "sql_injection",
+        "description": f"User input reaches query {i} without parameters " * 3,
+        "suggestion": "Use a parameterized query: cursor.execute(sql, (value,))",
+        "confidence": 0.9,
+    }
+
+
+def huge_valid(n: int) -> str:
+    return json.dumps({"findings": [_finding(i) for i in range(n)]})
+
+
+def truncated(n: int) -> str:
+    text = huge_valid(n)
+    return text[: int(len(text) * 0.97)]
+
+
+def nested_fences(n: int) -> str:
+    inner = "```json\n" + huge_valid(n) + "\n```"
+    return f"Here is the review:\n```markdown\n{inner}\n```\nLet me know!"
+
+
+def unbalanced_braces(n: int) -> str:
+    # Prose full of opening braces and no closing one: worst case for the
+    # greedy search, which rescans to the end from every '{'
+    return "Template {placeholder " * (n * 4)
+
+
+def malformed_quotes(n: int) -> str:
+    parts = [
+        '{“severity”: “medium”, "line_number": %d, "issue_type": "xss", '
+        '"description": "Use "textContent" instead of innerHTML"}' % i
+        for i in range(n)
+    ]
+    return '{"findings": [' + ", ".join(parts) + "]}"
+
+
+CASES: Dict[str, Callable[[int], str]] = {
+    "huge_valid": huge_valid,
+    "truncated": truncated,
+    "nested_fences": nested_fences,
+    "unbalanced_braces": unbalanced_braces,
+    "malformed_quotes": malformed_quotes,
+}
+SIZES = [100, 400, 1600]
+
+
+def best_time(parse: Callable[[str], List[Dict]], text: str, repeat: int):
+    best = float("inf")
+    found = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = len(parse(text))
+        best = min(best, time.perf_counter() - start)
+    return best, found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'case':<18} {'size':>6} {'KB':>8} "
+        f"{'legacy ms':>10} {'found':>6} {'new ms':>9} {'found':>6} {'new us/KB':>10}"
+    )
+    for name, build in CASES.items():
+        for size in SIZES:
+            text = build(size)
+            kb = len(text) / 1024
+            legacy_s, legacy_found = best_time(legacy_parse, text, args.repeat)
+            new_s, new_found = best_time(new_parse, text, args.repeat)
+            print(
+                f"{name:<18} {size:>6} {kb:>8.1f} "
+                f"{legacy_s * 1000:>10.2f} {legacy_found:>6} "
+                f"{new_s * 1000:>9.2f} {new_found:>6} {new_s * 1e6 / kb:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
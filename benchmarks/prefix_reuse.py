@@ -0,0 +1,121 @@
+"""Measure the prefill time saved by warming agents' system prompt prefixes.
+
+Usage:
+    python -m benchmarks.prefix_reuse --model llama3.2:latest --runs 3
+    python -m benchmarks.prefix_reuse --simulated
+
+Each sample diff is reviewed ``--runs`` times, without the review cache,
+first cold (keep_alive 0, so nothing stays cached between calls) and then
+after warm_prefix has prefilled every agent's system prompt. The script
+prints the mean prompt_eval time and prompt tokens per call Ollama reported
+in each phase, and the prefix hits counted in the warm one. Each slot keeps
+one prefix, so start Ollama with OLLAMA_NUM_PARALLEL of at least agents
+times sample languages, or prefixes evict each other from the slots.
+"""
+
+import argparse
+import asyncio
+from typing import Dict
+
+from prometheus_client import REGISTRY
+
+from src.clients.ollama_client import OllamaClient
+from src.clients.simulated_client import SimulatedOllamaClient
+from src.models import AgentConfig
+from src.services import OrchestratorService
+
+from .samples import SAMPLE_DIFFS
+
+AGENT_CONFIGS = [
+    AgentConfig(agent_name="security_agent", agent_class="security", temperature=0.1),
+    AgentConfig(agent_name="quality_agent", agent_class="quality", temperature=0.3),
+]
+SAMPLES = {
+    "prefill_seconds": "ollama_prefill_seconds_sum",
+    "calls": "ollama_prefill_seconds_count",
+    "prompt_tokens": "ollama_prompt_tokens_total",
+    "hits": "ollama_prefix_cache_total",
+    "seconds_saved": "ollama_prefill_seconds_saved_total",
+}
+
+
+def read_metrics(model: str) -> Dict[str, float]:
+    values = {}
+    for key, name in SAMPLES.items():
+        labels = {"model": model}
+        if key == "hits":
+            labels["result"] = "hit"
+        values[key] = REGISTRY.get_sample_value(name, labels) or 0.0
+    return values
+
+
+async def run_phase(
+    orchestrator: OrchestratorService, model: str, runs: int
+) -> Dict[str, float]:
+    before = read_metrics(model)
+    for _ in range(runs):
+        for code_diff in SAMPLE_DIFFS:
+            await orchestrator.review_async(code_diff)
+    after = read_metrics(model)
+    return {key: after[key] - before[key] for key in SAMPLES}
+
+
+def report(phase: str, result: Dict[str, float], baseline: Dict[str, float]) -> None:
+    calls = result["calls"] or 1
+    prefill = result["prefill_seconds"] / calls
+    print(f"\n[{phase}] {int(result['calls'])} calls")
+    print(
+        f"  prefill mean={prefill * 1000:.1f}ms "
+        f"prompt tokens mean={result['prompt_tokens'] / calls:.0f}"
+    )
+    if baseline:
+        cold = baseline["prefill_seconds"] / (baseline["calls"] or 1)
+        if cold:
+            print(f"  prefill saved vs cold: {(cold - prefill) / cold * 100:.1f}%")
+        print(
+            f"  prefix hits={int(result['hits'])} "
+            f"estimated seconds saved={result['seconds_saved']:.2f}"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="llama3.2:latest")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--keep-alive", default="30m")
+    parser.add_argument(
+        "--simulated", action="store_true", help="use the simulated backend"
+    )
+    args = parser.parse_args()
+
+    languages = sorted({code_diff.language for code_diff in SAMPLE_DIFFS})
+    if args.simulated:
+        llm_client = SimulatedOllamaClient(
+            model_name=args.model,
+            parallel=len(AGENT_CONFIGS) * len(languages),
+            malformed_rate=0,
+            seed=0,
+        )
+    else:
+        llm_client = OllamaClient(model_name=args.model, host=args.host)
+    orchestrator = OrchestratorService(
+        llm_client=llm_client, agent_configs=AGENT_CONFIGS, max_workers=2
+    )
+    agents = orchestrator.prefix_agents("separate")
+
+    # Unloading after every call leaves nothing to reuse
+    llm_client.keep_alive = "0"
+    cold = await run_phase(orchestrator, args.model, args.runs)
+    report("cold", cold, {})
+
+    llm_client.keep_alive = args.keep_alive
+    for agent in agents:
+        for language in languages:
+            await llm_client.warm_prefix(**agent.prefix_request(language))
+    report("warm", await run_phase(orchestrator, args.model, args.runs), cold)
+    orchestrator.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
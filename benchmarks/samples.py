@@ -0,0 +1,104 @@
+"""Sample diffs shared by the benchmark scripts."""
+
+from src.models import CodeDiff
+
+PYTHON_OLD = '''import hashlib
+import sqlite3
+
+
+def get_user(conn, username):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE name = ?", (username,))
+    return cursor.fetchone()
+
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+'''
+
+PYTHON_NEW = '''import hashlib
+import pickle
+import sqlite3
+import subprocess
+
+
+def get_user(conn, username):
+    cursor = conn.cursor()
+    query = "SELECT * FROM users WHERE name = '" + username + "'"
+    cursor.execute(query)
+    return cursor.fetchone()
+
+
+def hash_password(p):
+    return hashlib.md5(p.encode()).hexdigest()
+
+
+def load_session(data):
+    return pickle.loads(data)
+
+
+def ping(host):
+    return subprocess.call("ping -c 1 " + host, shell=True)
+'''
+
+GO_OLD = '''package main
+
+import (
+	"fmt"
+	"strings"
+)
+
+func ProcessData(data string) {
+	values := strings.Split(data, ",")
+	for _, value := range values {
+		fmt.Println(value)
+	}
+}
+'''
+
+GO_NEW = '''package main
+
+import (
+	"fmt"
+	"os"
+	"strings"
+)
+
+func ProcessData(d string) {
+	x := strings.Split(d, ",")
+	for _, v := range x {
+		fmt.Println(v)
+	}
+	os.WriteFile("/tmp/out.txt", []byte(d), 0777)
+}
+
+func connectDB() string {
+	return "user:password123@localhost/mydb"
+}
+'''
+
+JS_OLD = '''function makeToken() {
+  return crypto.randomUUID();
+}
+'''
+
+JS_NEW = '''function makeToken() {
+  return Math.random().toString(36).slice(2);
+}
+
+function render(el, input) {
+  el.innerHTML = input;
+  return eval(input);
+}
+'''
+
+SAMPLE_DIFFS = [
+    CodeDiff(
+        file_path="app/users.py",
+        old_code=PYTHON_OLD,
+        new_code=PYTHON_NEW,
+        language="python",
+    ),
+    CodeDiff(file_path="cmd/process.go", old_code=GO_OLD, new_code=GO_NEW, language="go"),
+    CodeDiff(file_path="web/token.js", old_code=JS_OLD, new_code=JS_NEW, language="javascript"),
+]
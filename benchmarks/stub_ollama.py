@@ -0,0 +1,125 @@
+"""Minimal stand-in for an Ollama server, for exercising clients without a GPU.
+
+Usage:
+    python -m benchmarks.stub_ollama --port 11501 --latency 0.5 --fail-rate 0.1
+
+Serves /api/chat (streaming and not) and /api/generate, answering every
+chat with one canned finding after ``--latency`` seconds. ``--fail-rate``
+answers that share of calls with a 503, and ``--down`` makes every call
+fail, so routing, circuit breakers and hedging can be watched against a
+few local instances. start_stub_server() runs one in a background thread.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+CANNED_OUTPUT = json.dumps(
+    {
+        "findings": [
+            {
+                "severity": "medium",
+                "line_number": 1,
+                "issue_type": "stub_finding",
+                "description": "Canned finding from the stub server",
+                "suggestion": "None, this is a stub",
+                "confidence": 0.5,
+            }
+        ]
+    }
+)
+
+
+class StubConfig:
+    def __init__(
+        self, latency: float = 0.2, fail_rate: float = 0.0, down: bool = False
+    ):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.down = down
+        self.calls = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    config: StubConfig
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.config.calls += 1
+        if self.config.down or random.random() < self.config.fail_rate:
+            self._send_json(503, {"error": "stub overloaded"})
+            return
+        if self.path == "/api/generate":
+            self._send_json(
+                200, {"model": body.get("model"), "response": "", "done": True}
+            )
+            return
+        if self.path != "/api/chat":
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        time.sleep(self.config.latency)
+        message = {"role": "assistant", "content": CANNED_OUTPUT}
+        done = {
+            "model": body.get("model"),
+            "done": True,
+            "eval_count": len(CANNED_OUTPUT) // 4,
+        }
+        if body.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for start in range(0, len(CANNED_OUTPUT), 40):
+                chunk = CANNED_OUTPUT[start : start + 40]
+                self._send_line({"message": {"role": "assistant", "content": chunk}})
+            self._send_line({**done, "message": {"role": "assistant", "content": ""}})
+            return
+        self._send_json(200, {**done, "message": message})
+
+    def _send_line(self, payload: dict) -> None:
+        self.wfile.write((json.dumps(payload) + "\n").encode())
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_stub_server(port: int = 0, config: Optional[StubConfig] = None):
+    """Start a stub on 127.0.0.1 in a daemon thread; returns (server, url, config)"""
+    config = config or StubConfig()
+    handler = type("StubHandler", (_Handler,), {"config": config})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", config
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=11501)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--down", action="store_true")
+    args = parser.parse_args()
+    server, url, _ = start_stub_server(
+        args.port, StubConfig(args.latency, args.fail_rate, args.down)
+    )
+    print(f"stub Ollama listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
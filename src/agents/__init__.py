@@ -1,5 +1,6 @@
 from .base_agent import BaseAgent
 from .code_quality_agent import CodeQualityAgent
 from .security_agent import SecurityAgent
+from .fused_agent import FusedReviewAgent
 
-__all__ = ["BaseAgent", "SecurityAgent", "CodeQualityAgent"]
+__all__ = ["BaseAgent", "SecurityAgent", "CodeQualityAgent", "FusedReviewAgent"]
@@ -0,0 +1,44 @@
+import math
+from typing import Optional
+
+# Code and JSON tokenize denser than prose; erring high keeps num_ctx safe
+CHARS_PER_TOKEN = 3.5
+# A finding's JSON with a one-paragraph description and a suggestion
+TOKENS_PER_FINDING = 120
+# The {"findings": [...]} wrapper plus slack for a trailing newline or fence
+OUTPUT_OVERHEAD = 64
+# Changed lines per finding the model is expected to report, at most
+LINES_PER_FINDING = 8
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def expected_findings(changed_lines: int, max_findings: int) -> int:
+    """Findings worth reserving decode budget for, given the size of the change"""
+    return max(1, min(max_findings, 2 + changed_lines // LINES_PER_FINDING))
+
+
+def output_budget(findings: int) -> int:
+    return OUTPUT_OVERHEAD + findings * TOKENS_PER_FINDING
+
+
+class TokenBudget:
+    """num_ctx and num_predict picked for one request, and how the prompt fared"""
+
+    def __init__(
+        self,
+        prompt_tokens: int,
+        num_ctx: int,
+        num_predict: int,
+        trimmed: Optional[str] = None,
+        uncompacted_tokens: Optional[int] = None,
+    ):
+        self.prompt_tokens = prompt_tokens
+        self.num_ctx = num_ctx
+        self.num_predict = num_predict
+        # How the diff was cut to fit: "hunks", "context" or "truncated"
+        self.trimmed = trimmed
+        # What the prompt would have cost without compaction (and trimming)
+        self.uncompacted_tokens = uncompacted_tokens or prompt_tokens
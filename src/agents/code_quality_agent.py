@@ -4,18 +4,31 @@ from typing import List
 import json
 import json
 import re
-from typing import List
+from typing import List, Optional
 from src.models import CodeDiff, AgentFinding
 from src.clients.ollama_client import OllamaClient
 from .base_agent import BaseAgent
+from .diff_view import DiffView
+from .prompt_sections import PromptSection, select_sections
+
+
+LANGUAGE_NOTES: List[PromptSection] = [
+    (
+        ("go",),
+        "- Go: strings.Split() never returns error, only a slice\n"
+        "- Go: fmt.Println() can be ignored in simple cases",
+    ),
+    (("python",), "- Python: str.split() never raises exception for basic usage"),
+]
 
 
 class CodeQualityAgent(BaseAgent):
     def _get_agent_name(self) -> str:
         return "quality_agent"
 
-    def _build_system_prompt(self) -> str:
-        return """You are a senior software engineer reviewing code quality.
+    def _build_system_prompt(self, language: Optional[str] = None) -> str:
+        return (
+            """You are a senior software engineer reviewing code quality.
 
 CRITICAL RULES:
 1. Only report issues that ACTUALLY EXIST in the code
@@ -39,10 +52,9 @@ Focus on REAL issues:
 - NOT imaginary errors (like error handling for functions that don't return errors)
 
 Language-Specific Knowledge:
-- Go: strings.Split() never returns error, only a slice
-- Go: fmt.Println() can be ignored in simple cases
-- Python: str.split() never raises exception for basic usage
-- Know the standard library before reporting issues
+"""
+            + "".join(f"{note}\n" for note in select_sections(LANGUAGE_NOTES, language))
+            + """- Know the standard library before reporting issues
 
 STRICT OUTPUT FORMAT (JSON only, use double quotes for strings):
 {
@@ -113,21 +125,14 @@ Correct response:
 }
 
 If NO issues, return: {"findings": []}"""
+        )
 
-    def _build_user_prompt(self, code_diff: CodeDiff) -> str:
+    def _build_user_prompt(self, code_diff: CodeDiff, diff_view: DiffView) -> str:
         return f"""Analyze this code change for quality issues:
 
 File: {code_diff.file_path}
 Language: {code_diff.language}
 
-OLD CODE:
-```{code_diff.language}
-{code_diff.old_code}
-```
-
-NEW CODE:
-```{code_diff.language}
-{code_diff.new_code}
-```
+{diff_view.render()}
 
 Identify code quality issues. Return ONLY valid JSON with proper escaping, no markdown formatting."""
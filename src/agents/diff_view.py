@@ -0,0 +1,242 @@
+import copy
+import difflib
+from bisect import bisect_left
+from typing import List, Set
+
+from src.cache import ReviewedLine
+from src.models import AgentFinding, CodeDiff
+
+
+class DiffView:
+    """Full-file view: the old and new code are sent to the model unchanged."""
+
+    def __init__(self, code_diff: CodeDiff):
+        self.code_diff = code_diff
+
+    def render(self) -> str:
+        language = self.code_diff.language
+        return f"""OLD CODE:
+```{language}
+{self.code_diff.old_code}
+```
+
+NEW CODE:
+```{language}
+{self.code_diff.new_code}
+```"""
+
+    @property
+    def changed_line_count(self) -> int:
+        """Rough size of the change, used to size the output budget"""
+        return len(self.code_diff.new_code.splitlines())
+
+    def uncompacted(self) -> "DiffView":
+        """The view compaction replaced, to measure what compaction saved"""
+        return self
+
+    def reviewed_lines(self) -> List[ReviewedLine]:
+        """The lines the model is shown, marked ' ', '-' or '+' like a diff"""
+        old_lines = self.code_diff.old_code.splitlines()
+        new_lines = self.code_diff.new_code.splitlines()
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        return _marked_lines(matcher.get_opcodes(), old_lines, new_lines)
+
+    def map_line(self, line_number: int) -> int:
+        return line_number
+
+    def remap_finding(self, finding: AgentFinding) -> AgentFinding:
+        mapped = self.map_line(finding.line_number)
+        if mapped == finding.line_number:
+            return finding
+        return finding.model_copy(update={"line_number": mapped})
+
+    def remap_findings(self, findings: List[AgentFinding]) -> List[AgentFinding]:
+        return [self.remap_finding(finding) for finding in findings]
+
+
+class HunkDiffView(DiffView):
+    """Changed hunks only, each with a few lines of surrounding context.
+
+    Every line shown to the model is prefixed with its line number in the new
+    file, so prompt size follows the size of the change rather than the size
+    of the file. map_line turns whatever the model reports back into a real
+    new-file line number.
+    """
+
+    def __init__(
+        self, code_diff: CodeDiff, context_lines: int = 3, compact: bool = False
+    ):
+        super().__init__(code_diff)
+        self.context_lines = context_lines
+        # Drop trailing whitespace and blank lines; the numbers keep lines exact
+        self.compact = compact
+        self.old_lines = code_diff.old_code.splitlines()
+        self.new_lines = code_diff.new_code.splitlines()
+        matcher = difflib.SequenceMatcher(
+            None, self.old_lines, self.new_lines, autojunk=False
+        )
+        self.hunks = self._group_opcodes(matcher)
+        # New-file line numbers in the order they appear in the prompt
+        self.shown_lines: List[int] = []
+        self.changed_lines: Set[int] = set()
+        for hunk in self.hunks:
+            for tag, _, _, j1, j2 in hunk:
+                self.shown_lines.extend(range(j1 + 1, j2 + 1))
+                if tag in ("replace", "insert"):
+                    self.changed_lines.update(range(j1 + 1, j2 + 1))
+        self._shown_set = set(self.shown_lines)
+        self._sorted_shown = sorted(self._shown_set)
+
+    def _group_opcodes(self, matcher: difflib.SequenceMatcher) -> List[list]:
+        return list(matcher.get_grouped_opcodes(self.context_lines))
+
+    def uncompacted(self) -> DiffView:
+        if not self.compact:
+            return self
+        plain = copy.copy(self)
+        plain.compact = False
+        return plain
+
+    @property
+    def changed_line_count(self) -> int:
+        return len(self.changed_lines)
+
+    def reviewed_lines(self) -> List[ReviewedLine]:
+        return [
+            line
+            for hunk in self.hunks
+            for line in _marked_lines(hunk, self.old_lines, self.new_lines)
+        ]
+
+    def render(self) -> str:
+        if not self.hunks:
+            return "CHANGES: none (old and new code are identical)"
+
+        width = len(str(len(self.new_lines) or 1))
+        blank = " " * width
+        out = [
+            "CHANGED HUNKS (NEW file line numbers on the left; '+' added, "
+            "'-' removed, ' ' unchanged context). Use these line numbers "
+            "in line_number:",
+            f"```{self.code_diff.language}",
+        ]
+        for hunk in self.hunks:
+            i1, j1 = hunk[0][1], hunk[0][3]
+            i2, j2 = hunk[-1][2], hunk[-1][4]
+            out.append(f"@@ old {i1 + 1}-{i2}, new {j1 + 1}-{j2} @@")
+            for tag, a1, a2, b1, b2 in hunk:
+                if tag == "equal":
+                    for j in range(b1, b2):
+                        self._add_line(out, f"{j + 1:>{width}}", " ", self.new_lines[j])
+                    continue
+                for i in range(a1, a2):
+                    self._add_line(out, blank, "-", self.old_lines[i])
+                for j in range(b1, b2):
+                    self._add_line(out, f"{j + 1:>{width}}", "+", self.new_lines[j])
+        out.append("```")
+        return "\n".join(out)
+
+    def _add_line(self, out: List[str], number: str, marker: str, line: str) -> None:
+        if self.compact:
+            line = line.rstrip()
+            if not line:
+                return
+        out.append(f"{number} | {marker}{line}")
+
+    def map_line(self, line_number: int) -> int:
+        if not self._sorted_shown or line_number in self._shown_set:
+            return line_number
+        # The model counted lines of the excerpt instead of reading the prefix
+        if 1 <= line_number <= len(self.shown_lines):
+            return self.shown_lines[line_number - 1]
+        # Otherwise snap to the closest line the model actually saw
+        index = bisect_left(self._sorted_shown, line_number)
+        if index >= len(self._sorted_shown):
+            return self._sorted_shown[-1]
+        if index == 0:
+            return self._sorted_shown[0]
+        before, after = self._sorted_shown[index - 1], self._sorted_shown[index]
+        return before if line_number - before <= after - line_number else after
+
+
+class CompactDiffView(HunkDiffView):
+    """Full-file mode with the unchanged start and end of the file left out.
+
+    Everything from the first change to the last is one hunk, so unchanged
+    lines in between still give the model their context, but appear once
+    instead of in both an old and a new copy. Only context_lines of the
+    unchanged header and footer are kept.
+    """
+
+    def __init__(self, code_diff: CodeDiff, context_lines: int = 3):
+        super().__init__(code_diff, context_lines=context_lines, compact=True)
+
+    def uncompacted(self) -> DiffView:
+        return DiffView(self.code_diff)
+
+    def _group_opcodes(self, matcher: difflib.SequenceMatcher) -> List[list]:
+        opcodes = matcher.get_opcodes()
+        if all(tag == "equal" for tag, *_ in opcodes):
+            return []
+        n = self.context_lines
+        tag, i1, i2, j1, j2 = opcodes[0]
+        if tag == "equal":
+            opcodes[0] = (tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2)
+        tag, i1, i2, j1, j2 = opcodes[-1]
+        if tag == "equal":
+            opcodes[-1] = (tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n))
+        return [opcodes]
+
+
+class TruncatedDiffView(DiffView):
+    """Another view cut to its first max_chars characters, at a line boundary.
+
+    The last resort when even the bare hunks do not fit the context window;
+    line mapping is delegated to the wrapped view.
+    """
+
+    def __init__(self, inner: DiffView, max_chars: int):
+        super().__init__(inner.code_diff)
+        self.inner = inner
+        self.max_chars = max_chars
+
+    @property
+    def changed_line_count(self) -> int:
+        return self.inner.changed_line_count
+
+    def render(self) -> str:
+        rendered = self.inner.render()
+        if len(rendered) <= self.max_chars:
+            return rendered
+        kept = rendered[: self.max_chars].rsplit("\n", 1)[0]
+        omitted = rendered.count("\n") - kept.count("\n")
+        return f"{kept}\n... [{omitted} more lines omitted to fit the context window]"
+
+    def reviewed_lines(self) -> List[ReviewedLine]:
+        return self.inner.reviewed_lines()
+
+    def map_line(self, line_number: int) -> int:
+        return self.inner.map_line(line_number)
+
+
+def _marked_lines(
+    opcodes: List[tuple], old_lines: List[str], new_lines: List[str]
+) -> List[ReviewedLine]:
+    marked: List[ReviewedLine] = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            marked.extend(ReviewedLine(" ", new_lines[j], j + 1) for j in range(j1, j2))
+            continue
+        marked.extend(ReviewedLine("-", old_lines[i], None) for i in range(i1, i2))
+        marked.extend(ReviewedLine("+", new_lines[j], j + 1) for j in range(j1, j2))
+    return marked
+
+
+def build_diff_view(
+    code_diff: CodeDiff, hunk_only: bool, context_lines: int, compact: bool = False
+) -> DiffView:
+    if hunk_only:
+        return HunkDiffView(code_diff, context_lines=context_lines, compact=compact)
+    if compact:
+        return CompactDiffView(code_diff, context_lines=context_lines)
+    return DiffView(code_diff)
@@ -0,0 +1,182 @@
+import json
+import time
+from typing import Dict, List, Optional
+
+from src.clients.ollama_client import OllamaClient
+from src.models import AgentConfig, AgentFinding, AgentResponse, CodeDiff
+from .base_agent import (
+    BaseAgent,
+    ReviewContext,
+    cap_findings,
+    findings_json_schema,
+    merge_prescan_findings,
+)
+from .budget import expected_findings
+from .diff_view import DiffView
+from .json_extractor import FindingExtractor
+from .prescan import PrescanResult
+from src.metrics.prometheus import FALLBACK_PARSES, record_findings
+
+
+class FusedReviewAgent(BaseAgent):
+    """Runs several agents' instructions in one generation.
+
+    The diff is prefilled once instead of once per agent. The model returns
+    findings grouped by each member's agent_class, and the output is split
+    back into one AgentResponse per member agent.
+    """
+
+    def __init__(
+        self,
+        llm_client: OllamaClient,
+        agent_config: AgentConfig,
+        member_agents: List[BaseAgent],
+    ):
+        super().__init__(llm_client, agent_config)
+        self.member_agents = member_agents
+
+    def _get_agent_name(self) -> str:
+        return "fused_agent"
+
+    def _categories(self) -> List[str]:
+        return [agent.config.agent_class for agent in self.member_agents]
+
+    def _build_system_prompt(self, language: Optional[str] = None) -> str:
+        example = json.dumps(
+            {category: {"findings": []} for category in self._categories()}
+        )
+        sections = "\n\n".join(
+            f"=== REVIEW SECTION: {agent.config.agent_class} ===\n"
+            f"{agent.system_prompt_for(language)}"
+            for agent in self.member_agents
+        )
+        return f"""You are performing {len(self.member_agents)} independent code reviews in a single pass.
+Each REVIEW SECTION below contains the complete instructions for one reviewer.
+Apply every section's rules and focus areas to the same code change.
+
+OUTPUT FORMAT OVERRIDE:
+Ignore the output format shown inside each section. Return ONE JSON document
+with one key per section, each holding that section's findings:
+{example}
+Every finding uses the fields described in the sections (severity, line_number,
+issue_type, description, suggestion, confidence). Place each finding ONLY under
+the section it belongs to. Use an empty list for a section with no findings.
+
+{sections}"""
+
+    def _build_user_prompt(self, code_diff: CodeDiff, diff_view: DiffView) -> str:
+        return f"""Review this code change once for every section ({", ".join(self._categories())}):
+
+File: {code_diff.file_path}
+Language: {code_diff.language}
+
+{diff_view.render()}
+
+Return ONLY valid JSON grouped by section, with proper escaping, no markdown formatting."""
+
+    def _output_budget(self, changed_lines: int) -> int:
+        # Every section is a full review's worth of output
+        return sum(
+            agent._output_budget(changed_lines) for agent in self.member_agents
+        )
+
+    def _findings_limit_note(self, changed_lines: int) -> str:
+        limits = ", ".join(
+            f"{agent.config.agent_class}: "
+            f"{expected_findings(changed_lines, agent.config.max_findings)}"
+            for agent in self.member_agents
+        )
+        return (
+            "Report at most this many findings per section, most severe first: "
+            f"{limits}."
+        )
+
+    def _format_prescan_hints(self, prescan: PrescanResult) -> str:
+        sections = ", ".join(
+            agent.config.agent_class
+            for agent in self.member_agents
+            if agent.config.prescan
+        )
+        return (
+            super()._format_prescan_hints(prescan)
+            + f"\nThese hints belong to the {sections} section."
+        )
+
+    def _skips_llm(self, context: ReviewContext) -> bool:
+        # Only when the prescan answers for every member, as separately it would
+        return context.skip_llm and all(
+            agent.config.prescan for agent in self.member_agents
+        )
+
+    def _output_schema(self) -> dict:
+        section_schema = findings_json_schema()
+        return {
+            "type": "object",
+            "properties": {category: section_schema for category in self._categories()},
+            "required": self._categories(),
+        }
+
+    def analyze_all(self, code_diff: CodeDiff) -> List[AgentResponse]:
+        context = self._prepare(code_diff)
+        if self._skips_llm(context):
+            return self._build_member_responses(None, context)
+        llm_response = self.llm_client.generate(**self._build_request(context))
+        llm_response = self._repair_output(llm_response, context.num_ctx)
+        return self._build_member_responses(llm_response, context)
+
+    async def analyze_all_async(self, code_diff: CodeDiff) -> List[AgentResponse]:
+        context = self._prepare(code_diff)
+        if self._skips_llm(context):
+            return self._build_member_responses(None, context)
+        llm_response = await self.llm_client.generate_async(
+            **self._build_request(context)
+        )
+        llm_response = await self._repair_output_async(llm_response, context.num_ctx)
+        return self._build_member_responses(llm_response, context)
+
+    def _build_member_responses(
+        self, llm_response: Optional[str], context: ReviewContext
+    ) -> List[AgentResponse]:
+        sections = {} if llm_response is None else self._parse_sections(llm_response)
+        skipped = llm_response is None
+        execution_time = round(time.perf_counter() - context.start_time, 2)
+        responses = []
+        for agent in self.member_agents:
+            findings = context.diff_view.remap_findings(
+                sections.get(agent.config.agent_class, [])
+            )
+            # As in separate mode, only members with prescan get rule hits
+            if agent.config.prescan and context.prescan is not None:
+                findings = merge_prescan_findings(findings, context.prescan)
+            findings = cap_findings(findings, agent.config.max_findings)
+            record_findings(agent.config.agent_name, findings)
+            responses.append(
+                AgentResponse(
+                    agent_name=agent.config.agent_name,
+                    findings=findings,
+                    execution_time=execution_time,
+                    llm_skipped=skipped,
+                    skip_reason=context.prescan.reason if skipped else None,
+                    prompt_trimmed=context.prompt_trimmed,
+                    **context.prompt_tokens,
+                )
+            )
+        return responses
+
+    def _parse_sections(self, llm_output: str) -> Dict[str, List[AgentFinding]]:
+        """Split the grouped JSON document into findings per category"""
+        categories = set(self._categories())
+        sections: Dict[str, List[AgentFinding]] = {}
+        extractor = FindingExtractor()
+        extracted = extractor.feed(llm_output) + extractor.finish()
+        if extractor.repairs:
+            FALLBACK_PARSES.labels(self.config.agent_name).inc()
+        for item in extracted:
+            # Findings outside a known section cannot be attributed to an
+            # agent, so they are dropped rather than guessed.
+            if item.section not in categories:
+                continue
+            finding = self._build_finding(item.data)
+            if finding is not None:
+                sections.setdefault(item.section, []).append(finding)
+        return sections
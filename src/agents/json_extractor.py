@@ -0,0 +1,388 @@
+import json
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+
+class ExtractedFinding(NamedTuple):
+    # First enclosing key other than "findings", e.g. "security" in fused output
+    section: Optional[str]
+    data: Dict[str, Any]
+
+
+# Modes of the scanner
+_SCAN = 0  # outside any JSON container: prose, markdown fences
+_NORMAL = 1  # between tokens inside a container
+_STRING = 2
+_STRING_END = 3  # saw a closing quote, waiting to see whether it really closes
+_BARE = 4  # unquoted word: number, literal, or an unquoted key/value
+
+# Dict frame states
+_KEY = 0
+_COLON = 1
+_VALUE = 2
+_AFTER = 3
+
+_CONTAINER_START = re.compile(r"[{\[]")
+_NOT_SPACE = re.compile(r"\S")
+# Each pattern is a single character class, so searches never backtrack
+_STRING_SPECIALS = {
+    '"': re.compile(r'["\\]'),
+    "'": re.compile(r"['\\]"),
+    "“": re.compile('["“”\\\\]'),
+    "‘": re.compile("['‘’\\\\]"),
+}
+_BARE_END = re.compile(r"[,:}\]\n]")
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+_HEX_DIGITS = set("0123456789abcdefABCDEF")
+_VALUE_TERMINATORS = ",:}]"
+# strict=False accepts raw newlines and tabs inside strings
+_DECODER = json.JSONDecoder(strict=False)
+
+
+class _Frame:
+    __slots__ = ("container", "key", "state")
+
+    def __init__(self, container):
+        self.container = container
+        self.key: Optional[str] = None
+        self.state = _KEY
+
+
+class FindingExtractor:
+    """Single-pass, tolerant extractor for ``findings`` objects in LLM output.
+
+    Feed it the whole output at once or chunk by chunk while the model is
+    still streaming. Every finding object is returned as soon as its closing
+    brace arrives. It copes with what small models actually produce: prose
+    or markdown fences around the JSON, smart or single quotes, unescaped
+    quotes and raw newlines inside strings, unquoted keys and values,
+    missing or trailing commas, mismatched brackets and output cut off
+    mid-object (call finish() to flush it).
+
+    Well-formed values (the whole document, or a single list element such as
+    one finding) are decoded in one go by the C JSON scanner; only a value it
+    rejects is walked by the tolerant tokenizer. Runs inside strings and prose
+    are skipped with single-character-class searches. Each character is
+    therefore scanned a bounded number of times, with no backtracking, and
+    cost stays linear in the output size.
+    """
+
+    def __init__(self):
+        self._stack: List[_Frame] = []
+        self._mode = _SCAN
+        self._quote = '"'
+        self._close_char = '"'
+        self._parts: List[str] = []
+        self._escape: Optional[str] = None
+        self._pending_space = ""
+        self._surrogates = False
+        # Characters fed so far, and work spent on fast-path decodes that failed
+        self._fed = 0
+        self._decode_waste = 0
+        # How many tolerance rules were needed; 0 means the JSON was valid
+        self.repairs = 0
+        self.documents = 0
+        self.truncated = False
+
+    def feed(self, chunk: str) -> List[ExtractedFinding]:
+        found: List[ExtractedFinding] = []
+        i, n = 0, len(chunk)
+        self._fed += n
+        while i < n:
+            mode = self._mode
+            if mode == _SCAN:
+                match = _CONTAINER_START.search(chunk, i)
+                if match is None:
+                    break
+                i = match.start()
+                self._mode = _NORMAL
+            elif mode == _STRING:
+                i = self._feed_string(chunk, i)
+            elif mode == _STRING_END:
+                char = chunk[i]
+                if char.isspace():
+                    self._pending_space += char
+                    i += 1
+                elif char in _VALUE_TERMINATORS or char in _STRING_SPECIALS:
+                    self._finish_string(found)
+                else:
+                    # The quote was part of the text, e.g. "use "x" here"
+                    self.repairs += 1
+                    self._parts.append(self._close_char + self._pending_space)
+                    self._pending_space = ""
+                    self._mode = _STRING
+            elif mode == _BARE:
+                i = self._feed_bare(chunk, i, found)
+            else:
+                i = self._feed_normal(chunk, i, found)
+        return found
+
+    def finish(self) -> List[ExtractedFinding]:
+        """Flush a truncated tail, closing whatever is still open"""
+        found: List[ExtractedFinding] = []
+        if self._mode == _STRING:
+            self._escape = None
+            self._finish_string(found)
+        elif self._mode == _STRING_END:
+            self._finish_string(found)
+        elif self._mode == _BARE:
+            self._finish_bare(found)
+        if self._stack:
+            self.truncated = True
+            self.repairs += 1
+            while self._stack:
+                self._close_frame(self._stack.pop(), found)
+        self._mode = _SCAN
+        return found
+
+    def _feed_normal(self, chunk: str, i: int, found: List[ExtractedFinding]) -> int:
+        match = _NOT_SPACE.search(chunk, i)
+        if match is None:
+            return len(chunk)
+        i = match.start()
+        char = chunk[i]
+        if char in "{[":
+            end = self._try_decode(chunk, i, found)
+            if end is not None:
+                return end
+            self._open({} if char == "{" else [])
+        elif char == "}":
+            self._close(dict, found)
+        elif char == "]":
+            self._close(list, found)
+        elif char == ",":
+            frame = self._stack[-1]
+            if isinstance(frame.container, dict):
+                if frame.state in (_COLON, _VALUE):
+                    self.repairs += 1
+                frame.state = _KEY
+        elif char == ":":
+            frame = self._stack[-1]
+            if isinstance(frame.container, dict) and frame.state == _COLON:
+                frame.state = _VALUE
+            else:
+                self.repairs += 1
+        elif char in _STRING_SPECIALS:
+            self._quote = char
+            self._parts = []
+            self._mode = _STRING
+        elif char == "`":
+            # Stray fence inside the document
+            self.repairs += 1
+        else:
+            self._parts = []
+            self._mode = _BARE
+            return i
+        return i + 1
+
+    def _try_decode(self, chunk: str, i: int, found: List[ExtractedFinding]):
+        """Fast path: decode a complete, valid document or list element at i"""
+        if self._stack and not isinstance(self._stack[-1].container, list):
+            return None
+        # A failed decode costs up to its error position (the error message
+        # counts lines from the start of the chunk). Once failures have cost
+        # as much as the input itself, stay on the tokenizer so the total
+        # stays linear on consistently malformed output.
+        if self._decode_waste > self._fed:
+            return None
+        try:
+            value, end = _DECODER.raw_decode(chunk, i)
+        except json.JSONDecodeError as e:
+            self._decode_waste += e.pos
+            return None
+        if self._stack:
+            self._add_value(value)
+        else:
+            self.documents += 1
+            self._mode = _SCAN
+        self._emit_decoded(value, (), found)
+        return end
+
+    def _emit_decoded(
+        self, value: Any, path: Sequence[str], found: List[ExtractedFinding]
+    ) -> None:
+        if isinstance(value, dict):
+            for key, child in value.items():
+                if isinstance(child, (dict, list)):
+                    self._emit_decoded(child, (*path, key), found)
+            if _looks_like_finding(value):
+                found.append(ExtractedFinding(self._section(path), value))
+        elif isinstance(value, list):
+            for child in value:
+                if isinstance(child, (dict, list)):
+                    self._emit_decoded(child, path, found)
+
+    def _feed_string(self, chunk: str, i: int) -> int:
+        n = len(chunk)
+        specials = _STRING_SPECIALS[self._quote]
+        while i < n:
+            if self._escape is not None:
+                i = self._feed_escape(chunk, i)
+                continue
+            match = specials.search(chunk, i)
+            if match is None:
+                self._parts.append(chunk[i:])
+                return n
+            j = match.start()
+            if j > i:
+                self._parts.append(chunk[i:j])
+            if chunk[j] == "\\":
+                self._escape = ""
+                i = j + 1
+                continue
+            self._close_char = chunk[j]
+            self._pending_space = ""
+            self._mode = _STRING_END
+            return j + 1
+        return i
+
+    def _feed_escape(self, chunk: str, i: int) -> int:
+        char = chunk[i]
+        if self._escape == "":
+            if char == "u":
+                self._escape = "u"
+            else:
+                self._parts.append(_ESCAPES.get(char, char))
+                self._escape = None
+            return i + 1
+        # Inside a \uXXXX escape
+        if char in _HEX_DIGITS:
+            self._escape += char
+            if len(self._escape) == 5:
+                code_point = int(self._escape[1:], 16)
+                self._surrogates |= 0xD800 <= code_point <= 0xDFFF
+                self._parts.append(chr(code_point))
+                self._escape = None
+            return i + 1
+        self.repairs += 1
+        self._parts.append("\\" + self._escape)
+        self._escape = None
+        return i
+
+    def _feed_bare(self, chunk: str, i: int, found: List[ExtractedFinding]) -> int:
+        n = len(chunk)
+        while True:
+            match = _BARE_END.search(chunk, i)
+            if match is None:
+                self._parts.append(chunk[i:])
+                return n
+            j = match.start()
+            frame = self._stack[-1]
+            expects_key = isinstance(frame.container, dict) and frame.state in (
+                _KEY,
+                _AFTER,
+            )
+            if chunk[j] == ":" and not expects_key:
+                # A colon inside an unquoted value, e.g. a URL
+                self._parts.append(chunk[i : j + 1])
+                i = j + 1
+                continue
+            self._parts.append(chunk[i:j])
+            self._finish_bare(found)
+            return j
+
+    def _finish_string(self, found: List[ExtractedFinding]) -> None:
+        text = "".join(self._parts)
+        if self._surrogates:
+            text = text.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+            self._surrogates = False
+        self._parts = []
+        self._mode = _NORMAL
+        if self._quote != '"':
+            self.repairs += 1
+        self._add_value(text, is_string=True)
+
+    def _finish_bare(self, found: List[ExtractedFinding]) -> None:
+        text = "".join(self._parts).strip()
+        self._parts = []
+        self._mode = _NORMAL
+        if not text:
+            return
+        value: Any = text
+        if text == "true":
+            value = True
+        elif text == "false":
+            value = False
+        elif text == "null":
+            value = None
+        else:
+            try:
+                value = int(text)
+            except ValueError:
+                try:
+                    value = float(text)
+                except ValueError:
+                    self.repairs += 1
+        self._add_value(value, is_string=isinstance(value, str))
+
+    def _add_value(self, value: Any, is_string: bool = False) -> None:
+        if not self._stack:
+            return
+        frame = self._stack[-1]
+        container = frame.container
+        if isinstance(container, list):
+            container.append(value)
+            return
+        if frame.state in (_KEY, _AFTER):
+            if frame.state == _AFTER:
+                self.repairs += 1  # missing comma
+            if is_string:
+                frame.key = value
+                frame.state = _COLON
+            else:
+                # A value where a key belongs; keep it under no key
+                self.repairs += 1
+                frame.key = None
+                frame.state = _AFTER
+            return
+        if frame.state == _COLON:
+            self.repairs += 1  # missing colon
+        if frame.key is not None:
+            container[frame.key] = value
+        frame.state = _AFTER
+
+    def _open(self, container) -> None:
+        if self._stack:
+            self._add_value(container)
+        self._stack.append(_Frame(container))
+
+    def _close(self, kind: type, found: List[ExtractedFinding]) -> None:
+        index = len(self._stack) - 1
+        while index >= 0 and not isinstance(self._stack[index].container, kind):
+            index -= 1
+        if index < 0:
+            self.repairs += 1
+            return
+        if index != len(self._stack) - 1:
+            self.repairs += 1
+        while len(self._stack) > index:
+            self._close_frame(self._stack.pop(), found)
+        if not self._stack:
+            self.documents += 1
+            self._mode = _SCAN
+
+    def _close_frame(self, frame: _Frame, found: List[ExtractedFinding]) -> None:
+        container = frame.container
+        if isinstance(container, dict) and _looks_like_finding(container):
+            found.append(ExtractedFinding(self._section(), container))
+
+    def _section(self, path: Sequence[str] = ()) -> Optional[str]:
+        keys = [
+            frame.key for frame in self._stack if isinstance(frame.container, dict)
+        ]
+        for key in (*keys, *path):
+            if isinstance(key, str) and key and key != "findings":
+                return key
+        return None
+
+
+def _looks_like_finding(data: Dict[str, Any]) -> bool:
+    return ("severity" in data or "issue_type" in data) and (
+        "description" in data or "line_number" in data
+    )
+
+
+def extract_findings(text: str) -> List[ExtractedFinding]:
+    """Convenience wrapper for a complete output"""
+    extractor = FindingExtractor()
+    return extractor.feed(text) + extractor.finish()
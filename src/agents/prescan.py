@@ -0,0 +1,369 @@
+import ast
+import difflib
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from src.models import AgentFinding, CodeDiff
+
+
+class PrescanRule(NamedTuple):
+    issue_type: str
+    severity: str
+    pattern: "re.Pattern"
+    description: str
+    suggestion: str
+    confidence: float = 0.9
+    languages: Optional[Set[str]] = None  # None means every language
+
+
+class PrescanResult(NamedTuple):
+    findings: List[AgentFinding]
+    skip_llm: bool
+    reason: str
+
+
+CREDENTIAL_NAMES = r"(?:password|passwd|pwd|secret|api_?key|access_?key|auth_?token|token)"
+
+PICKLE_RULE = PrescanRule(
+    "insecure_deserialization",
+    "critical",
+    re.compile(r"\bpickle\.loads?\s*\("),
+    "pickle deserialization of data that may be untrusted allows arbitrary code execution",
+    "Use a safe format such as json.loads for untrusted data",
+    languages={"python"},
+)
+
+YAML_RULE = PrescanRule(
+    "insecure_deserialization",
+    "high",
+    re.compile(r"\byaml\.load\s*\((?![^)]*SafeLoader)"),
+    "yaml.load without SafeLoader can construct arbitrary Python objects",
+    "Use yaml.safe_load(data) instead",
+    languages={"python"},
+)
+
+WEAK_HASH_RULE = PrescanRule(
+    "weak_cryptography",
+    "high",
+    re.compile(r"\bhashlib\.(?:md5|sha1)\s*\(|\bcrypto/(?:md5|sha1)\b"),
+    "MD5/SHA1 are broken hash functions and must not protect passwords or integrity",
+    "Use bcrypt/argon2 for passwords or SHA-256 for integrity checks",
+)
+
+SHELL_TRUE_RULE = PrescanRule(
+    "command_injection",
+    "critical",
+    re.compile(r"\bshell\s*=\s*True\b"),
+    "subprocess call with shell=True runs its command through the shell",
+    "Pass an argument list with shell=False, e.g. subprocess.run(['ping', host])",
+    languages={"python"},
+)
+
+OS_SYSTEM_RULE = PrescanRule(
+    "command_injection",
+    "critical",
+    re.compile(r"\bos\.system\s*\("),
+    "os.system runs its argument through the shell",
+    "Use subprocess.run with an argument list and shell=False",
+    languages={"python"},
+)
+
+EVAL_RULE = PrescanRule(
+    "code_injection",
+    "critical",
+    re.compile(r"(?<![\w.])(?:eval|exec)\s*\("),
+    "eval/exec executes arbitrary code if any part of the argument is user controlled",
+    "Avoid eval/exec; parse the input explicitly (e.g. ast.literal_eval or JSON)",
+    confidence=0.8,
+    languages={"python", "javascript", "typescript"},
+)
+
+CREDENTIAL_RULE = PrescanRule(
+    "hardcoded_credentials",
+    "critical",
+    re.compile(
+        CREDENTIAL_NAMES + r"\w*\s*[:=]=?\s*[\"'][^\"'\s]{4,}[\"']",
+        re.IGNORECASE,
+    ),
+    "Credential assigned from a string literal in source code",
+    "Load secrets from the environment or a secret manager",
+    confidence=0.8,
+)
+
+CONNECTION_STRING_RULE = PrescanRule(
+    "hardcoded_credentials",
+    "critical",
+    re.compile(r"\b\w+:[^@\s\"'/]{3,}@[\w.-]+(?::\d+)?/"),
+    "Connection string embeds a username and password",
+    "Build the connection string from environment variables",
+    confidence=0.8,
+)
+
+PERMISSIONS_RULE = PrescanRule(
+    "insecure_permissions",
+    "medium",
+    re.compile(r"(?<![\w.])0o?777\b"),
+    "World-writable 0777 permissions",
+    "Use the narrowest permissions needed, e.g. 0o600 or 0o644",
+)
+
+MATH_RANDOM_RULE = PrescanRule(
+    "weak_random",
+    "high",
+    re.compile(r"\bMath\.random\s*\("),
+    "Math.random() is not cryptographically secure",
+    "Use crypto.randomUUID() or crypto.getRandomValues() for tokens",
+    confidence=0.8,
+    languages={"javascript", "typescript"},
+)
+
+INNER_HTML_RULE = PrescanRule(
+    "xss",
+    "high",
+    re.compile(r"\.innerHTML\s*=(?!=)"),
+    "Assigning to innerHTML renders unescaped HTML",
+    "Use textContent, or sanitize the HTML first",
+    confidence=0.7,
+    languages={"javascript", "typescript"},
+)
+
+REGEX_RULES: List[PrescanRule] = [
+    PICKLE_RULE,
+    YAML_RULE,
+    WEAK_HASH_RULE,
+    SHELL_TRUE_RULE,
+    OS_SYSTEM_RULE,
+    EVAL_RULE,
+    CREDENTIAL_RULE,
+    CONNECTION_STRING_RULE,
+    PERMISSIONS_RULE,
+    MATH_RANDOM_RULE,
+    INNER_HTML_RULE,
+]
+
+# Cheap signal that a change touches something security-relevant at all.
+# Changed lines with no rule hits and none of these words skip the LLM.
+RISK_HINT_PATTERN = re.compile(
+    r"select|insert|update|delete|query|exec|system|subprocess|popen|shell|"
+    r"eval|pickle|yaml|marshal|deserial|open\(|path|file|request|input|argv|"
+    r"environ|getenv|password|passwd|secret|token|key|auth|login|session|"
+    r"cookie|jwt|crypt|hash|cipher|random|ssl|tls|verify|cert|chmod|perm|"
+    r"innerhtml|html|render|template|redirect|url|http|socket|sql|cursor|"
+    r"admin|role|user|upload|download|unsafe|debug",
+    re.IGNORECASE,
+)
+
+SKIPPED_FILE_NAMES = {
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "pipfile.lock",
+    "cargo.lock",
+    "go.sum",
+    "composer.lock",
+    "gemfile.lock",
+}
+# Not ".txt": requirements.txt and constraints.txt pin dependencies
+SKIPPED_EXTENSIONS = {".md", ".rst", ".adoc", ".lock"}
+# Leading whitespace is syntax in these, so re-indenting changes behaviour
+INDENTATION_LANGUAGES = {"python", "yaml", "haskell", "coffeescript", "nim"}
+
+COMMENT_PREFIXES = ("#", "//", "/*", "*")
+
+
+class StaticPrescanner:
+    """Deterministic rule engine that runs before the security LLM.
+
+    Regex rules are precompiled once per process; Python code is also checked
+    with ``ast`` so calls are matched structurally. Findings carry exact
+    new-file line numbers.
+    """
+
+    def __init__(self, rules: Optional[List[PrescanRule]] = None):
+        self.rules = rules if rules is not None else REGEX_RULES
+
+    def scan(
+        self, code_diff: CodeDiff, changed_lines: Optional[Set[int]] = None
+    ) -> PrescanResult:
+        """Scan new_code, limited to changed_lines when given"""
+        file_name = os.path.basename(code_diff.file_path).lower()
+        _, extension = os.path.splitext(file_name)
+        if file_name in SKIPPED_FILE_NAMES or extension in SKIPPED_EXTENSIONS:
+            return PrescanResult([], True, "documentation or lockfile")
+
+        if is_layout_only(code_diff):
+            return PrescanResult([], True, "whitespace-only change")
+
+        if changed_lines is None:
+            changed_lines = _changed_lines(code_diff)
+        new_lines = code_diff.new_code.splitlines()
+        language = code_diff.language.lower()
+
+        rules = [
+            rule
+            for rule in self.rules
+            if rule.languages is None or language in rule.languages
+        ]
+        hits: Dict[Tuple[int, str], AgentFinding] = {}
+        if language == "python":
+            ast_findings = _scan_python_ast(code_diff.new_code, changed_lines)
+            if ast_findings is not None:
+                # Parsed fine: the structural checks replace their regex twins
+                rules = [rule for rule in rules if rule not in AST_COVERED_RULES]
+                for finding in ast_findings:
+                    hits[(finding.line_number, finding.issue_type)] = finding
+        for finding in self._scan_regex(new_lines, changed_lines, rules):
+            hits.setdefault((finding.line_number, finding.issue_type), finding)
+
+        findings = sorted(hits.values(), key=lambda f: f.line_number)
+        if findings:
+            return PrescanResult(findings, False, f"{len(findings)} rule hits")
+
+        added = [
+            new_lines[line - 1] for line in changed_lines if line <= len(new_lines)
+        ]
+        removed = _removed_lines(code_diff)
+        if language in INDENTATION_LANGUAGES and _reindented(added, removed):
+            # A line moved in or out of a block, e.g. out of an auth check
+            return PrescanResult([], False, "block structure changed")
+        # Removed lines count too: deleting an auth or CSRF check is a finding
+        if not any(RISK_HINT_PATTERN.search(line) for line in added + removed):
+            return PrescanResult([], True, "no security-relevant constructs changed")
+        return PrescanResult([], False, "no rule hits")
+
+    def _scan_regex(
+        self, new_lines: List[str], changed_lines: Set[int], rules: List[PrescanRule]
+    ) -> Iterable[AgentFinding]:
+        for line_number in sorted(changed_lines):
+            if line_number > len(new_lines):
+                continue
+            line = new_lines[line_number - 1]
+            if line.lstrip().startswith(COMMENT_PREFIXES):
+                continue
+            for rule in rules:
+                if rule.pattern.search(line):
+                    yield _rule_finding(rule, line_number, line)
+
+
+def _rule_finding(rule: PrescanRule, line_number: int, line: str) -> AgentFinding:
+    return AgentFinding(
+        severity=rule.severity,
+        line_number=line_number,
+        issue_type=rule.issue_type,
+        description=f"{rule.description}: {line.strip()[:120]}",
+        suggestion=rule.suggestion,
+        confidence=rule.confidence,
+    )
+
+
+def is_layout_only(code_diff: CodeDiff) -> bool:
+    """True when old and new code differ only in blank lines and whitespace
+    that carries no meaning: trailing whitespace, and indentation except in
+    INDENTATION_LANGUAGES"""
+    keep_indent = code_diff.language.lower() in INDENTATION_LANGUAGES
+
+    def layout(code: str) -> List[str]:
+        lines = (line.rstrip() for line in code.splitlines())
+        return [line if keep_indent else line.lstrip() for line in lines if line]
+
+    return layout(code_diff.old_code) == layout(code_diff.new_code)
+
+
+def _removed_lines(code_diff: CodeDiff) -> List[str]:
+    """Old lines deleted or replaced by the change"""
+    old_lines = code_diff.old_code.splitlines()
+    matcher = difflib.SequenceMatcher(
+        None, old_lines, code_diff.new_code.splitlines(), autojunk=False
+    )
+    return [
+        old_lines[index]
+        for tag, i1, i2, _, _ in matcher.get_opcodes()
+        if tag in ("replace", "delete")
+        for index in range(i1, i2)
+    ]
+
+
+def _reindented(added: List[str], removed: List[str]) -> bool:
+    """Whether some removed line comes back with only its indentation changed"""
+    removed_text = {line.strip(): line for line in removed if line.strip()}
+    return any(
+        line.strip() in removed_text and removed_text[line.strip()] != line
+        for line in added
+    )
+
+
+def _changed_lines(code_diff: CodeDiff) -> Set[int]:
+    matcher = difflib.SequenceMatcher(
+        None,
+        code_diff.old_code.splitlines(),
+        code_diff.new_code.splitlines(),
+        autojunk=False,
+    )
+    changed: Set[int] = set()
+    for tag, _, _, j1, j2 in matcher.get_opcodes():
+        if tag in ("replace", "insert"):
+            changed.update(range(j1 + 1, j2 + 1))
+    return changed
+
+
+AST_CALL_RULES = {
+    ("pickle", "loads"): PICKLE_RULE,
+    ("pickle", "load"): PICKLE_RULE,
+    ("hashlib", "md5"): WEAK_HASH_RULE,
+    ("hashlib", "sha1"): WEAK_HASH_RULE,
+    ("os", "system"): OS_SYSTEM_RULE,
+}
+
+
+AST_COVERED_RULES = [
+    PICKLE_RULE,
+    YAML_RULE,
+    WEAK_HASH_RULE,
+    SHELL_TRUE_RULE,
+    OS_SYSTEM_RULE,
+    EVAL_RULE,
+]
+
+
+def _scan_python_ast(
+    source: str, changed_lines: Set[int]
+) -> Optional[List[AgentFinding]]:
+    """Structural checks that regexes get wrong, e.g. calls split over lines
+    or patterns inside strings. Returns None when the source does not parse."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    findings: List[AgentFinding] = []
+    source_lines = source.splitlines()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call) or node.lineno not in changed_lines:
+            continue
+        line = source_lines[node.lineno - 1]
+        func = node.func
+        rule = None
+        if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+            rule = AST_CALL_RULES.get((func.value.id, func.attr))
+            if (func.value.id, func.attr) == ("yaml", "load") and not any(
+                keyword.arg == "Loader"
+                and "Safe" in ast.unparse(keyword.value)
+                for keyword in node.keywords
+            ):
+                rule = YAML_RULE
+        elif isinstance(func, ast.Name) and func.id in ("eval", "exec"):
+            rule = EVAL_RULE
+        if any(
+            keyword.arg == "shell"
+            and isinstance(keyword.value, ast.Constant)
+            and keyword.value.value is True
+            for keyword in node.keywords
+        ):
+            rule = SHELL_TRUE_RULE
+        if rule is not None:
+            findings.append(_rule_finding(rule, node.lineno, line))
+    return findings
+
+
+prescanner = StaticPrescanner()
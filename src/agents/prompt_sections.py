@@ -0,0 +1,26 @@
+from typing import List, Optional, Sequence, Tuple
+
+# A block of system prompt text and the CodeDiff languages it is about
+PromptSection = Tuple[Tuple[str, ...], str]
+
+
+def select_sections(
+    sections: Sequence[PromptSection], language: Optional[str], fallback: int = 0
+) -> List[str]:
+    """Text of the sections about language, or of every section for None.
+
+    When no section matches, the first ``fallback`` sections are kept anyway,
+    so a prompt for an unlisted language still shows an example of the
+    expected output.
+    """
+    if language is None:
+        return [text for _, text in sections]
+    matching = [text for languages, text in sections if language in languages]
+    return matching or [text for _, text in sections[:fallback]]
+
+
+def number_examples(examples: List[str]) -> str:
+    """EXAMPLE 1 - ..., EXAMPLE 2 - ..., numbered in the order they are kept"""
+    return "\n\n".join(
+        f"EXAMPLE {index} - {example}" for index, example in enumerate(examples, 1)
+    )
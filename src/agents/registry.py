@@ -1,6 +1,8 @@
-from src.agents import CodeQualityAgent, SecurityAgent, BaseAgent
-from src.models import AgentConfig
+from src.agents import CodeQualityAgent, SecurityAgent, BaseAgent, FusedReviewAgent
+from src.models import AgentConfig, ReviewSettings
+from typing import Dict, List, Optional
 from src.clients import OllamaClient
+import os
 
 # Registry of all available agents
 AGENT_REGISTRY = {
@@ -15,3 +17,86 @@ def create_agent(llm_client: OllamaClient, agent_config: AgentConfig) -> BaseAge
     if agent_class is None:
         raise ValueError(f"Unknown Agent Class: {agent_config.agent_class}")
     return agent_class(llm_client, agent_config)
+
+
+def create_triage_agent(
+    llm_client: OllamaClient, agent_config: AgentConfig
+) -> BaseAgent:
+    """Same agent and prompts, run on the config's small triage model"""
+    triage_config = agent_config.model_copy(
+        update={"model_name": agent_config.triage_model_name}
+    )
+    return create_agent(llm_client, triage_config)
+
+
+def create_fused_agent(
+    llm_client: OllamaClient, agent_configs: List[AgentConfig]
+) -> FusedReviewAgent:
+    """Build one agent that reviews for every config in a single LLM call.
+
+    One generation runs on one model, so members must agree on model_name.
+    """
+    models = {config.model_name for config in agent_configs}
+    if len(models) > 1:
+        raise ValueError(
+            "Fused review needs one model, but agents use: "
+            + ", ".join(sorted(model or "<default>" for model in models))
+        )
+    member_agents = [create_agent(llm_client, config) for config in agent_configs]
+    fused_config = AgentConfig(
+        agent_name="fused_agent",
+        agent_class="+".join(config.agent_class for config in agent_configs),
+        # The most conservative member decides the sampling temperature
+        temperature=min(config.temperature for config in agent_configs),
+        hunk_only=all(config.hunk_only for config in agent_configs),
+        context_lines=max(config.context_lines for config in agent_configs),
+        model_name=agent_configs[0].model_name,
+        # Rule hits go to the members that asked for them
+        prescan=any(config.prescan for config in agent_configs),
+        structured_output=all(config.structured_output for config in agent_configs),
+        repair_attempts=max(config.repair_attempts for config in agent_configs),
+        max_findings=sum(config.max_findings for config in agent_configs),
+        max_context=max(config.max_context for config in agent_configs),
+        compact_prompt=all(config.compact_prompt for config in agent_configs),
+    )
+    return FusedReviewAgent(llm_client, fused_config, member_agents)
+
+
+def pin_context_sizes(agents: List[BaseAgent]) -> Dict[str, int]:
+    """Give agents sharing a model one num_ctx, the largest max_context among them.
+
+    Ollama reloads a model whenever num_ctx changes, so agents taking turns
+    on a model must agree on it. Returns the num_ctx picked per model.
+    """
+    sizes: Dict[str, int] = {}
+    for agent in agents:
+        model = agent.model_name
+        sizes[model] = max(sizes.get(model, 0), agent.config.max_context)
+    for agent in agents:
+        agent.num_ctx = sizes[agent.model_name]
+    return sizes
+
+
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "config", "agents.json"
+)
+
+
+def load_review_settings(path: Optional[str] = None) -> ReviewSettings:
+    """Read service settings and agent configs, rejecting unknown agent classes"""
+    path = path or os.getenv("REVIEW_CONFIG_PATH") or DEFAULT_CONFIG_PATH
+    with open(path) as config_file:
+        settings = ReviewSettings.model_validate_json(config_file.read())
+    for config in settings.agents:
+        if config.agent_class not in AGENT_REGISTRY:
+            raise ValueError(
+                f"Unknown Agent Class in {path}: {config.agent_class}"
+            )
+    agent_names = {config.agent_name for config in settings.agents}
+    if len(agent_names) != len(settings.agents):
+        raise ValueError(f"Duplicate agent_name in {path}")
+    for rule in settings.agent_rules or []:
+        for name in rule.skip:
+            if name != "*" and name not in AGENT_REGISTRY and name not in agent_names:
+                raise ValueError(f"Unknown agent in agent_rules of {path}: {name}")
+    return settings
@@ -4,118 +4,48 @@ from typing import List
 import json
 import json
 import re
-from typing import List
+from typing import List, Optional
 from src.models import CodeDiff, AgentFinding
 from src.clients.ollama_client import OllamaClient
 from .base_agent import BaseAgent
+from .diff_view import DiffView
+from .prompt_sections import PromptSection, number_examples, select_sections
 
 
-class SecurityAgent(BaseAgent):
-    def _get_agent_name(self) -> str:
-        return "security_agent"
-
-    def _build_system_prompt(self) -> str:
-        return """You are a security expert conducting a code security review.
-
-CRITICAL RULES:
-1. Only report ACTUAL security vulnerabilities that exist in the code
-2. Line numbers must be EXACT - count carefully from line 1
-3. Reference actual variable/function names from the code
-4. Verify the vulnerability is real before reporting
-5. Prioritize severity: critical > high > medium > low
-
-SECURITY FOCUS AREAS:
-
-1. INJECTION VULNERABILITIES:
-   - SQL Injection: Unsanitized user input in SQL queries
-   - Command Injection: User input in system commands (os.system, exec, shell=True)
-   - Path Traversal: User-controlled file paths without validation
-   - XSS: Unescaped user input in HTML/JavaScript output
-   - Code Injection: eval(), exec() with user input
-
-2. AUTHENTICATION & AUTHORIZATION:
-   - Hardcoded credentials (passwords, API keys, tokens)
-   - Weak password requirements
-   - Missing authentication checks
-   - Insecure session management
-   - JWT vulnerabilities (weak secrets, no expiration)
-
-3. CRYPTOGRAPHY:
-   - Weak hashing algorithms (MD5, SHA1)
-   - Hardcoded encryption keys
-   - Using ECB mode for encryption
-   - Missing encryption for sensitive data
-   - Weak random number generation (random.random() instead of secrets)
-
-4. DATA EXPOSURE:
-   - Sensitive data in logs
-   - Exposing stack traces to users
-   - Verbose error messages revealing system info
-   - Missing input validation
-   - PII without encryption
-
-5. ACCESS CONTROL:
-   - Missing authorization checks
-   - Insecure direct object references (IDOR)
-   - Missing rate limiting
-   - Overly permissive file/directory permissions
-
-6. DEPENDENCY & CONFIGURATION:
-   - Debug mode enabled in production
-   - Insecure defaults
-   - Missing security headers
-   - Outdated dependencies (mention if obvious)
-
-LANGUAGE-SPECIFIC VULNERABILITIES:
-
-Python:
+LANGUAGE_NOTES: List[PromptSection] = [
+    (
+        ("python",),
+        """Python:
 - pickle.loads() with untrusted data
 - eval(), exec() with user input
 - yaml.load() instead of yaml.safe_load()
 - SQL string concatenation instead of parameterized queries
-- subprocess.call() with shell=True
-
-Go:
+- subprocess.call() with shell=True""",
+    ),
+    (
+        ("go",),
+        """Go:
 - SQL string concatenation
 - Missing input validation
 - os/exec Command() with user input without sanitization
 - Insecure file permissions (0777)
-- Missing error checks for crypto operations
-
-JavaScript/Node:
+- Missing error checks for crypto operations""",
+    ),
+    (
+        ("javascript", "typescript"),
+        """JavaScript/Node:
 - eval() with user input
 - Unsafe innerHTML assignments
 - Missing input sanitization
 - Weak crypto (Math.random() for tokens)
-- Missing CSRF protection
-
-SEVERITY GUIDELINES:
-- critical: Remote code execution, SQL injection, auth bypass, hardcoded secrets
-- high: XSS, IDOR, weak crypto, missing auth checks
-- medium: Information disclosure, weak validation, insecure defaults
-- low: Verbose errors, missing rate limits, security best practices
-
-DO NOT REPORT:
-- Code style issues (wrong agent)
-- Performance problems (wrong agent)
-- Theoretical issues without exploit path
-- False positives from safe standard library functions
-
-STRICT OUTPUT FORMAT (JSON only):
-{
-  "findings": [
-    {
-      "severity": "critical|high|medium|low",
-      "line_number": <exact line number>,
-      "issue_type": "vulnerability_category",
-      "description": "Explain the security risk and attack vector",
-      "suggestion": "Specific secure fix with code example",
-      "confidence": 0.0-1.0
-    }
-  ]
-}
-
-EXAMPLE 1 - SQL Injection:
+- Missing CSRF protection""",
+    ),
+]
+
+EXAMPLES: List[PromptSection] = [
+    (
+        ("python",),
+        """SQL Injection:
 Code:
 ```python
 def get_user(username):
@@ -135,9 +65,11 @@ Correct response:
       "confidence": 0.95
     }
   ]
-}
-
-EXAMPLE 2 - Hardcoded Credentials:
+}""",
+    ),
+    (
+        ("go",),
+        """Hardcoded Credentials:
 Code:
 ```go
 func connectDB() {
@@ -157,9 +89,11 @@ Correct response:
       "confidence": 1.0
     }
   ]
-}
-
-EXAMPLE 3 - Command Injection:
+}""",
+    ),
+    (
+        ("python",),
+        """Command Injection:
 Code:
 ```python
 def run_command(user_input):
@@ -178,9 +112,11 @@ Correct response:
       "confidence": 0.95
     }
   ]
-}
-
-EXAMPLE 4 - Weak Cryptography:
+}""",
+    ),
+    (
+        ("python",),
+        """Weak Cryptography:
 Code:
 ```python
 import hashlib
@@ -199,27 +135,119 @@ Correct response:
       "confidence": 1.0
     }
   ]
+}""",
+    ),
+]
+
+
+class SecurityAgent(BaseAgent):
+    def _get_agent_name(self) -> str:
+        return "security_agent"
+
+    def _build_system_prompt(self, language: Optional[str] = None) -> str:
+        notes = select_sections(LANGUAGE_NOTES, language)
+        examples = select_sections(EXAMPLES, language, fallback=1)
+        language_notes = ""
+        if notes:
+            language_notes = (
+                "LANGUAGE-SPECIFIC VULNERABILITIES:\n\n" + "\n\n".join(notes) + "\n\n"
+            )
+        return (
+            """You are a security expert conducting a code security review.
+
+CRITICAL RULES:
+1. Only report ACTUAL security vulnerabilities that exist in the code
+2. Line numbers must be EXACT - count carefully from line 1
+3. Reference actual variable/function names from the code
+4. Verify the vulnerability is real before reporting
+5. Prioritize severity: critical > high > medium > low
+
+SECURITY FOCUS AREAS:
+
+1. INJECTION VULNERABILITIES:
+   - SQL Injection: Unsanitized user input in SQL queries
+   - Command Injection: User input in system commands (os.system, exec, shell=True)
+   - Path Traversal: User-controlled file paths without validation
+   - XSS: Unescaped user input in HTML/JavaScript output
+   - Code Injection: eval(), exec() with user input
+
+2. AUTHENTICATION & AUTHORIZATION:
+   - Hardcoded credentials (passwords, API keys, tokens)
+   - Weak password requirements
+   - Missing authentication checks
+   - Insecure session management
+   - JWT vulnerabilities (weak secrets, no expiration)
+
+3. CRYPTOGRAPHY:
+   - Weak hashing algorithms (MD5, SHA1)
+   - Hardcoded encryption keys
+   - Using ECB mode for encryption
+   - Missing encryption for sensitive data
+   - Weak random number generation (random.random() instead of secrets)
+
+4. DATA EXPOSURE:
+   - Sensitive data in logs
+   - Exposing stack traces to users
+   - Verbose error messages revealing system info
+   - Missing input validation
+   - PII without encryption
+
+5. ACCESS CONTROL:
+   - Missing authorization checks
+   - Insecure direct object references (IDOR)
+   - Missing rate limiting
+   - Overly permissive file/directory permissions
+
+6. DEPENDENCY & CONFIGURATION:
+   - Debug mode enabled in production
+   - Insecure defaults
+   - Missing security headers
+   - Outdated dependencies (mention if obvious)
+
+"""
+            + language_notes
+            + """SEVERITY GUIDELINES:
+- critical: Remote code execution, SQL injection, auth bypass, hardcoded secrets
+- high: XSS, IDOR, weak crypto, missing auth checks
+- medium: Information disclosure, weak validation, insecure defaults
+- low: Verbose errors, missing rate limits, security best practices
+
+DO NOT REPORT:
+- Code style issues (wrong agent)
+- Performance problems (wrong agent)
+- Theoretical issues without exploit path
+- False positives from safe standard library functions
+
+STRICT OUTPUT FORMAT (JSON only):
+{
+  "findings": [
+    {
+      "severity": "critical|high|medium|low",
+      "line_number": <exact line number>,
+      "issue_type": "vulnerability_category",
+      "description": "Explain the security risk and attack vector",
+      "suggestion": "Specific secure fix with code example",
+      "confidence": 0.0-1.0
+    }
+  ]
 }
 
+"""
+            + number_examples(examples)
+            + """
+
 If NO security issues found, return: {"findings": []}
 
 IMPORTANT: Escape quotes in JSON properly. Avoid backticks. Focus ONLY on security vulnerabilities."""
+        )
 
-    def _build_user_prompt(self, code_diff: CodeDiff) -> str:
+    def _build_user_prompt(self, code_diff: CodeDiff, diff_view: DiffView) -> str:
         return f"""Perform a security review of this code change:
 
 File: {code_diff.file_path}
 Language: {code_diff.language}
 
-OLD CODE:
-```{code_diff.language}
-{code_diff.old_code}
-```
-
-NEW CODE:
-```{code_diff.language}
-{code_diff.new_code}
-```
+{diff_view.render()}
 
 Identify SECURITY VULNERABILITIES ONLY (not code quality issues).
 Focus on: injection attacks, authentication issues, weak crypto, hardcoded secrets, access control.
@@ -0,0 +1,4 @@
+from .review_cache import ReviewCache, make_cache_key
+from .similarity import NearDuplicateIndex, ReviewedLine
+
+__all__ = ["ReviewCache", "make_cache_key", "NearDuplicateIndex", "ReviewedLine"]
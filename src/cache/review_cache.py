@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    agent_config_json: str, model_name: str, system_prompt: str, code_diff_json: str
+) -> str:
+    """Content-addressed key for a single agent review"""
+    payload = json.dumps(
+        {
+            "agent": agent_config_json,
+            "model": model_name,
+            "system_prompt": system_prompt,
+            "code_diff": code_diff_json,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReviewCache:
+    """Two-tier review cache: bounded in-memory LRU with TTL, plus an optional
+    SQLite file that can be shared by every uvicorn worker on the host."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        db_path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.db_path:
+            self._init_db()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    return value
+                del self._memory[key]
+
+        if not self.db_path:
+            return None
+
+        value = self._db_get(key, now)
+        if value is not None:
+            # Promote disk hits so the next lookup stays in memory
+            self._memory_set(key, value, now + self.ttl_seconds)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self._memory_set(key, value, expires_at)
+        if self.db_path:
+            self._db_set(key, value, expires_at)
+
+    def _memory_set(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps this safe across threads
+        # and processes; WAL lets readers and the writer proceed concurrently.
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS review_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+
+    def _db_get(self, key: str, now: float) -> Optional[str]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM review_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] <= now:
+                    conn.execute("DELETE FROM review_cache WHERE key = ?", (key,))
+                    return None
+                return row[0]
+        except sqlite3.Error as e:
+            logger.warning("Review cache read error: %s", e)
+            return None
+
+    def _db_set(self, key: str, value: str, expires_at: float) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO review_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+        except sqlite3.Error as e:
+            logger.warning("Review cache write error: %s", e)
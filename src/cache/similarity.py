@@ -0,0 +1,273 @@
+import difflib
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from src.models import AgentFinding
+
+TOKEN_PATTERN = re.compile(
+    r"""(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|`[^`]*`)"""
+    r"|(?P<number>\b\d[\w.]*)"
+    r"|(?P<name>[A-Za-z_$][\w$]*)"
+    r"|(?P<op>\S)"
+)
+LINE_COMMENT = {"python": "#", "shell": "#", "ruby": "#"}
+BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+KEYWORDS = frozenset(
+    """and as assert async await break case catch class const continue def default
+    defer del elif else except export extends finally for from func function go if
+    import in interface is lambda let map new nil none not null or package pass
+    raise range return select self static struct switch this throw true false try
+    type var while with yield""".split()
+)
+PLACEHOLDERS = ("ID", "STR", "NUM")
+SHINGLE_SIZE = 5
+# (2^61 - 1) is prime, so (a * x + b) mod it is a universal hash family
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+class ReviewedLine(NamedTuple):
+    # " " for unchanged context, "-" for a removed line, "+" for an added one
+    marker: str
+    text: str
+    # Line in the new code; None for removed lines
+    line_number: Optional[int]
+
+
+def normalize_lines(code: str, language: str) -> List[Tuple[str, ...]]:
+    """Per line, tokens with comments and layout dropped and local names erased.
+
+    Variable and parameter names become "ID", literals "STR" and "NUM", so a
+    rename or a reformat leaves the tokens unchanged. Keywords and names
+    that are called or accessed as attributes (hashlib.md5, execute(...))
+    are kept: they carry what a reviewer looks at.
+    """
+    code = BLOCK_COMMENT.sub(lambda match: "\n" * match.group().count("\n"), code)
+    comment = LINE_COMMENT.get(language, "//")
+    lines = []
+    for line in code.splitlines():
+        tokens: List[str] = []
+        matches = list(TOKEN_PATTERN.finditer(line))
+        for index, match in enumerate(matches):
+            kind, text = match.lastgroup, match.group()
+            if kind == "op" and line.startswith(comment, match.start()):
+                break
+            if kind == "string":
+                tokens.append("STR")
+            elif kind == "number":
+                tokens.append("NUM")
+            elif kind == "name":
+                tokens.append(text if _is_significant(text, matches, index) else "ID")
+            else:
+                tokens.append(text)
+        lines.append(tuple(tokens))
+    return lines
+
+
+def _is_significant(name: str, matches, index: int) -> bool:
+    if name.lower() in KEYWORDS:
+        return True
+    previous = matches[index - 1].group() if index > 0 else ""
+    following = matches[index + 1].group() if index + 1 < len(matches) else ""
+    return previous == "." or following in ("(", ".")
+
+
+def api_names(lines: Sequence[Tuple[str, ...]]) -> FrozenSet[str]:
+    """Every kept name; two diffs may share findings only if these match"""
+    return frozenset(
+        token
+        for line in lines
+        for token in line
+        if (token[0].isalpha() or token[0] in "_$") and token not in PLACEHOLDERS
+    )
+
+
+class _View:
+    """Normalized reviewed lines, each led by its diff marker when not blank"""
+
+    def __init__(self, reviewed: Sequence[ReviewedLine], language: str):
+        normalized = normalize_lines(
+            "".join(line.text + "\n" for line in reviewed), language
+        )
+        self.lines = [
+            (line.marker,) + tokens if tokens else ()
+            for line, tokens in zip(reviewed, normalized)
+        ]
+        self.line_numbers = [line.line_number for line in reviewed]
+
+    def changes_fingerprint(self) -> str:
+        """Hash of the normalized added and removed lines"""
+        changes = [line for line in self.lines if line and line[0] != " "]
+        return hashlib.blake2b(repr(changes).encode(), digest_size=8).hexdigest()
+
+
+class _Entry:
+    def __init__(
+        self,
+        signature: List[int],
+        view: _View,
+        names: FrozenSet[str],
+        findings: List[AgentFinding],
+    ):
+        self.signature = signature
+        self.view = view
+        self.names = names
+        self.findings = findings
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of reviewed code, for reusing findings across near-copies.
+
+    Each stored review is the MinHash signature of the token shingles of
+    what the agent showed the model: the changed lines plus their context.
+    Entries are scoped by (agent, model, prompt, language), so only reviews
+    that would have been asked the same question are reused, and by a
+    fingerprint of the normalized changed lines, so the change itself must
+    match up to names, literals and layout. A lookup with estimated Jaccard
+    similarity at or above ``threshold`` and the same called APIs returns
+    the stored findings with their line numbers mapped onto the new code.
+    Bounded, oldest evicted first.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 64,
+        bands: int = 16,
+        max_entries: int = 4096,
+        seed: int = 1,
+    ):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._entries: "OrderedDict[int, Tuple[str, _Entry]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def lookup(
+        self, scope: str, reviewed: Sequence[ReviewedLine], language: str
+    ) -> Optional[Tuple[float, List[AgentFinding]]]:
+        """(similarity, remapped findings) of the closest stored review, if close"""
+        view = _View(reviewed, language)
+        signature = self._signature(view.lines)
+        if signature is None:
+            return None
+        scope = f"{scope}:{view.changes_fingerprint()}"
+        names = api_names(view.lines)
+        best: Optional[Tuple[float, _Entry]] = None
+        with self._lock:
+            for entry_id in self._candidates(scope, signature):
+                entry = self._entries[entry_id][1]
+                if entry.names != names:
+                    continue
+                similarity = self._similarity(signature, entry.signature)
+                if similarity < self.threshold:
+                    continue
+                if best is None or similarity > best[0]:
+                    best = (similarity, entry)
+        if best is None:
+            return None
+        similarity, entry = best
+        return similarity, remap_findings(entry.findings, entry.view, view)
+
+    def add(
+        self,
+        scope: str,
+        reviewed: Sequence[ReviewedLine],
+        language: str,
+        findings: List[AgentFinding],
+    ) -> None:
+        view = _View(reviewed, language)
+        signature = self._signature(view.lines)
+        if signature is None:
+            return
+        scope = f"{scope}:{view.changes_fingerprint()}"
+        entry = _Entry(signature, view, api_names(view.lines), list(findings))
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (scope, entry)
+            for band in self._bands(scope, signature):
+                self._buckets.setdefault(band, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _signature(self, lines: List[Tuple[str, ...]]) -> Optional[List[int]]:
+        tokens = [token for line in lines for token in line]
+        if len(tokens) < SHINGLE_SIZE:
+            return None
+        hashes = {
+            int.from_bytes(
+                hashlib.blake2b(
+                    " ".join(tokens[i : i + SHINGLE_SIZE]).encode(), digest_size=8
+                ).digest(),
+                "big",
+            )
+            for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        }
+        return [
+            min((a * value + b) % MERSENNE_PRIME for value in hashes)
+            for a, b in self._perms
+        ]
+
+    def _bands(self, scope: str, signature: List[int]):
+        for band in range(self.bands):
+            rows = tuple(signature[band * self.rows : (band + 1) * self.rows])
+            yield scope, band, rows
+
+    def _candidates(self, scope: str, signature: List[int]) -> Set[int]:
+        candidates: Set[int] = set()
+        for band in self._bands(scope, signature):
+            candidates |= self._buckets.get(band, set())
+        return candidates
+
+    def _similarity(self, first: List[int], second: List[int]) -> float:
+        return sum(1 for a, b in zip(first, second) if a == b) / self.num_perm
+
+    def _evict(self) -> None:
+        entry_id, (scope, entry) = self._entries.popitem(last=False)
+        for band in self._bands(scope, entry.signature):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band]
+
+
+def remap_findings(
+    findings: List[AgentFinding], stored: _View, view: _View
+) -> List[AgentFinding]:
+    """Move findings from the stored review's lines to the matching new lines.
+
+    Lines are aligned on their normalized tokens; a finding on a line with
+    no counterpart among the lines the new review shows is dropped.
+    """
+    matcher = difflib.SequenceMatcher(None, stored.lines, view.lines, autojunk=False)
+    line_map: Dict[int, int] = {}
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal" or (tag == "replace" and i2 - i1 == j2 - j1):
+            for offset in range(i2 - i1):
+                old_number = stored.line_numbers[i1 + offset]
+                new_number = view.line_numbers[j1 + offset]
+                if old_number is not None and new_number is not None:
+                    line_map[old_number] = new_number
+    remapped = []
+    for finding in findings:
+        line_number = line_map.get(finding.line_number)
+        if line_number is None:
+            continue
+        if line_number != finding.line_number:
+            finding = finding.model_copy(update={"line_number": line_number})
+        remapped.append(finding)
+    return remapped
@@ -1,3 +1,11 @@
 from .ollama_client import OllamaClient
+from .limiter import AdaptiveLimiter
+from .pool_client import OllamaPoolClient
+from .simulated_client import SimulatedOllamaClient
 
-__all__ = ["OllamaClient"]
+__all__ = [
+    "OllamaClient",
+    "AdaptiveLimiter",
+    "OllamaPoolClient",
+    "SimulatedOllamaClient",
+]
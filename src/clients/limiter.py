@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Deque, Optional
+
+import httpx
+import ollama
+
+from src.metrics import review_stats
+from src.metrics.prometheus import QUEUE_WAIT
+
+# Ollama answers these when its own queue is full or the model is reloading
+OVERLOAD_STATUS_CODES = {429, 500, 502, 503, 504}
+# Calls generating fewer tokens (prefix warm-ups, short repairs) are mostly
+# fixed overhead, so they would drag the baseline down; they give no feedback
+MIN_FEEDBACK_TOKENS = 32
+
+
+class _Waiter:
+    __slots__ = ("wake", "granted")
+
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+
+
+class _Call:
+    __slots__ = ("output_tokens",)
+
+    def __init__(self):
+        self.output_tokens: Optional[int] = None
+
+
+# The call holding a slot in this context; clients report its token count
+_current_call: ContextVar[Optional[_Call]] = ContextVar("limiter_call", default=None)
+
+
+def observe_response(response) -> None:
+    """Report Ollama's eval_count for the call holding the current slot.
+
+    Clients call this with each final response; a context variable carries
+    the slot, so it also works when a pool client holds the slot and one of
+    its backend clients makes the call.
+    """
+    call = _current_call.get()
+    if call is not None:
+        call.output_tokens = response.get("eval_count")
+
+
+class AdaptiveLimiter:
+    """Global concurrency limit for LLM calls, tuned from observed latency.
+
+    Additive increase, multiplicative decrease: while calls finish within
+    ``tolerance`` times the baseline latency the limit grows by about one
+    per limit's worth of calls; a slow call, a timeout or an overload error
+    cuts it by ``backoff``. The baseline follows the fastest recent calls,
+    so the limit settles where Ollama is busy but not yet queueing.
+
+    Latency is per output token (see observe_response), so long and short
+    generations compare fairly; calls under MIN_FEEDBACK_TOKENS tokens, or
+    that report none, leave the limit as it is.
+
+    Works for both the sync client (worker threads block) and the async
+    client (coroutines await); waiters are served in arrival order.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        tolerance: float = 2.0,
+        backoff: float = 0.7,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @contextmanager
+    def slot(self):
+        """Hold one slot around a blocking call"""
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._try_acquire(threading.Event())
+        if waiter is not None:
+            waiter.wake.wait()
+        QUEUE_WAIT.labels("limiter").observe(time.perf_counter() - start)
+        start = time.perf_counter()
+        call = _Call()
+        previous = _current_call.get()
+        _current_call.set(call)
+        try:
+            yield
+        except BaseException as e:
+            # Only overloads count against the limit; cancellations and
+            # request errors say nothing about Ollama's load
+            self.release(None, _is_overload(e))
+            raise
+        finally:
+            _current_call.set(previous)
+        self.release(_per_token(time.perf_counter() - start, call), False)
+
+    @asynccontextmanager
+    async def slot_async(self):
+        """Hold one slot around an awaited call"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._try_acquire(
+                lambda: loop.call_soon_threadsafe(_resolve, future)
+            )
+        if waiter is not None:
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    if not waiter.granted:
+                        self._waiters.remove(waiter)
+                        raise
+                # Granted just as we were cancelled: hand the slot back
+                self.release(None, False)
+                raise
+        QUEUE_WAIT.labels("limiter").observe(time.perf_counter() - start)
+        start = time.perf_counter()
+        call = _Call()
+        previous = _current_call.get()
+        _current_call.set(call)
+        try:
+            yield
+        except BaseException as e:
+            # Only overloads count against the limit; cancellations and
+            # request errors say nothing about Ollama's load
+            self.release(None, _is_overload(e))
+            raise
+        finally:
+            _current_call.set(previous)
+        self.release(_per_token(time.perf_counter() - start, call), False)
+
+    def _try_acquire(self, wake) -> Optional[_Waiter]:
+        """Take a slot now, or return a queued waiter. Caller holds the lock."""
+        if not self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            return None
+        waiter = _Waiter(wake)
+        self._waiters.append(waiter)
+        review_stats.incr("limiter_waits")
+        return waiter
+
+    def release(self, latency: Optional[float], overloaded: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if latency is not None or overloaded:
+                self._adjust(latency, overloaded)
+            while self._waiters and self._in_flight < self.limit:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                self._in_flight += 1
+                wake = waiter.wake
+                (wake.set if isinstance(wake, threading.Event) else wake)()
+
+    def _adjust(self, latency: Optional[float], overloaded: bool) -> None:
+        if latency is not None and not overloaded:
+            if self._baseline is None or latency < self._baseline:
+                self._baseline = latency
+            else:
+                # Drift up slowly so one lucky fast call does not pin it
+                self._baseline += (latency - self._baseline) * 0.05
+            overloaded = latency > self._baseline * self.tolerance
+        if overloaded:
+            self._limit = max(self.min_limit, self._limit * self.backoff)
+            review_stats.incr("limiter_decreases")
+        else:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+
+def _per_token(latency: float, call: _Call) -> Optional[float]:
+    if call.output_tokens is None or call.output_tokens < MIN_FEEDBACK_TOKENS:
+        return None
+    return latency / call.output_tokens
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _is_overload(error: BaseException) -> bool:
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code in OVERLOAD_STATUS_CODES
+    return isinstance(error, httpx.TimeoutException)
@@ -1,39 +1,249 @@
+import logging
 import ollama
+import os
+from contextlib import nullcontext
+from typing import AsyncIterator, Optional
+from .limiter import AdaptiveLimiter, observe_response
+from .prefix_cache import WARMUP_USER_PROMPT, PrefixTracker
+from src.metrics.prometheus import record_ollama_timings
+
+logger = logging.getLogger(__name__)
 
 
 class OllamaClient:
-    def __init__(self, model_name: str):
+    def __init__(self, model_name: str, host: Optional[str] = None):
         self.model_name = model_name
+        self.host = host
+        # Both clients wrap a pooled httpx client, so connections are reused
+        # across calls instead of being opened per request.
+        self._client = ollama.Client(host=host)
+        self._async_client: Optional[ollama.AsyncClient] = None
+        # Flipped off the first time the server rejects a JSON schema format
+        self.supports_format = True
+        # Sent with every call so Ollama keeps the model resident, e.g. "30m"
+        self.keep_alive: Optional[str] = None
+        # Shared by every call through this client, sync or async
+        self.limiter: Optional[AdaptiveLimiter] = None
+        # System prompts prefilled by warm_prefix, to measure their reuse
+        self.prefixes = PrefixTracker()
 
-    def generate(
+    def _build_chat_kwargs(
         self,
         system_prompt: str,
         user_prompt: str,
-        temperature: float = 0.3,
-        max_tokens: int = 2000,
-    ) -> str:
-        response = ollama.chat(
-            model=self.model_name,
-            messages=[
+        temperature: float,
+        max_tokens: int,
+        format: Optional[dict] = None,
+        model: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+    ) -> dict:
+        # The system prompt goes first and is the same on every call for an
+        # agent, so Ollama can reuse its KV cache and prefill only the rest
+        kwargs = {
+            "model": model or self.model_name,
+            "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            options={
+            "options": {
                 "temperature": temperature,
                 "num_predict": max_tokens,
             },
+        }
+        if num_ctx is not None:
+            kwargs["options"]["num_ctx"] = num_ctx
+        if format is not None and self.supports_format:
+            kwargs["format"] = format
+        if self.keep_alive is not None:
+            kwargs["keep_alive"] = self.keep_alive
+        return kwargs
+
+    def _format_rejected(self, error: ollama.ResponseError, kwargs: dict) -> bool:
+        """Older servers reject schema formats; remember that and retry plain"""
+        if "format" not in kwargs or error.status_code != 400:
+            return False
+        logger.warning("[%s] structured output unsupported: %s", self.model_name, error)
+        self.supports_format = False
+        del kwargs["format"]
+        return True
+
+    def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.3,
+        max_tokens: int = 2000,
+        format: Optional[dict] = None,
+        model: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+    ) -> str:
+        kwargs = self._build_chat_kwargs(
+            system_prompt, user_prompt, temperature, max_tokens, format, model, num_ctx
         )
-        print(response)
+        with self._slot():
+            try:
+                response = self._client.chat(**kwargs)
+            except ollama.ResponseError as e:
+                if not self._format_rejected(e, kwargs):
+                    raise
+                response = self._client.chat(**kwargs)
+        self._record_timings(kwargs, response)
         return response["message"]["content"]
 
+    async def generate_async(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.3,
+        max_tokens: int = 2000,
+        format: Optional[dict] = None,
+        model: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+    ) -> str:
+        kwargs = self._build_chat_kwargs(
+            system_prompt, user_prompt, temperature, max_tokens, format, model, num_ctx
+        )
+        async with self._slot_async():
+            try:
+                response = await self._get_async_client().chat(**kwargs)
+            except ollama.ResponseError as e:
+                if not self._format_rejected(e, kwargs):
+                    raise
+                response = await self._get_async_client().chat(**kwargs)
+        self._record_timings(kwargs, response)
+        return response["message"]["content"]
+
+    async def stream_async(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.3,
+        max_tokens: int = 2000,
+        format: Optional[dict] = None,
+        model: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """Yield content chunks as the model generates them"""
+        kwargs = self._build_chat_kwargs(
+            system_prompt, user_prompt, temperature, max_tokens, format, model, num_ctx
+        )
+        for attempt in range(2):
+            try:
+                # The slot is held until the last token arrives
+                async with self._slot_async():
+                    stream = await self._get_async_client().chat(stream=True, **kwargs)
+                    async for part in stream:
+                        if part.get("done"):
+                            self._record_timings(kwargs, part)
+                        yield part["message"]["content"]
+                return
+            except ollama.ResponseError as e:
+                # Streamed errors surface on the first read, before any content
+                if attempt or not self._format_rejected(e, kwargs):
+                    raise
+
+    def _record_timings(self, kwargs: dict, response) -> None:
+        """Export Ollama's own timing fields instead of dumping the response"""
+        model = kwargs["model"]
+        record_ollama_timings(model, response)
+        observe_response(response)
+        system, user = (message["content"] for message in kwargs["messages"])
+        self.prefixes.record(model, system, user, response)
+        logger.debug(
+            "[%s] load=%sns prompt_eval=%s tokens/%sns eval=%s tokens/%sns",
+            model,
+            response.get("load_duration"),
+            response.get("prompt_eval_count"),
+            response.get("prompt_eval_duration"),
+            response.get("eval_count"),
+            response.get("eval_duration"),
+        )
+
+    def _slot(self):
+        return self.limiter.slot() if self.limiter is not None else nullcontext()
+
+    def _slot_async(self):
+        if self.limiter is not None:
+            return self.limiter.slot_async()
+        return nullcontext()
+
+    async def warmup(self, model: Optional[str] = None) -> None:
+        """Load a model into memory ahead of the first review.
+
+        An empty prompt makes Ollama load the model and return without
+        generating; keep_alive then holds it resident between reviews.
+        """
+        kwargs = {"model": model or self.model_name, "prompt": ""}
+        if self.keep_alive is not None:
+            kwargs["keep_alive"] = self.keep_alive
+        await self._get_async_client().generate(**kwargs)
+
+    async def warm_prefix(
+        self,
+        system_prompt: str,
+        model: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+    ) -> None:
+        """Prefill a system prompt so the calls that start with it skip that work.
+
+        The KV cache survives only while the model stays loaded (keep_alive)
+        with the same num_ctx, and each of Ollama's OLLAMA_NUM_PARALLEL slots
+        holds one prompt, so warm at most that many prefixes per model.
+        """
+        kwargs = self._build_chat_kwargs(
+            system_prompt,
+            WARMUP_USER_PROMPT,
+            temperature=0.0,
+            max_tokens=1,
+            model=model,
+            num_ctx=num_ctx,
+        )
+        async with self._slot_async():
+            response = await self._get_async_client().chat(**kwargs)
+        record_ollama_timings(kwargs["model"], response)
+        self.prefixes.warmed(kwargs["model"], system_prompt, response)
+
+    def _get_async_client(self) -> ollama.AsyncClient:
+        # Created lazily so the underlying connection pool binds to the
+        # running event loop rather than whichever loop imported this module.
+        if self._async_client is None:
+            self._async_client = ollama.AsyncClient(host=self.host)
+        return self._async_client
+
 
 # Singleton instance (optional but convenient)
 _llm_client_instance = None
 
 
 def get_llm_client(model_name: str = "llama3.2") -> OllamaClient:
-    """Get or create LLM client singleton"""
+    """Get or create LLM client singleton.
+
+    LLM_BACKEND=simulated returns a SimulatedOllamaClient for load tests
+    (tuned by the SIM_* variables). Otherwise, with OLLAMA_HOSTS set to a
+    comma-separated list of URLs the client is an OllamaPoolClient spreading
+    calls over those hosts.
+    """
     global _llm_client_instance
     if _llm_client_instance is None:
-        _llm_client_instance = OllamaClient(model_name=model_name)
+        hosts = [host.strip() for host in os.getenv("OLLAMA_HOSTS", "").split(",")]
+        hosts = [host for host in hosts if host]
+        # Imported here: both modules build on this one
+        if os.getenv("LLM_BACKEND", "ollama") == "simulated":
+            from .simulated_client import SimulatedOllamaClient
+
+            _llm_client_instance = SimulatedOllamaClient(
+                model_name=model_name,
+                prefill_tps=float(os.getenv("SIM_PREFILL_TPS", "1500")),
+                decode_tps=float(os.getenv("SIM_DECODE_TPS", "40")),
+                jitter=float(os.getenv("SIM_JITTER", "0.25")),
+                parallel=int(os.getenv("SIM_PARALLEL", "4")),
+                malformed_rate=float(os.getenv("SIM_MALFORMED_RATE", "0.1")),
+                seed=int(os.environ["SIM_SEED"]) if os.getenv("SIM_SEED") else None,
+            )
+        elif hosts:
+            from .pool_client import OllamaPoolClient
+
+            _llm_client_instance = OllamaPoolClient(model_name=model_name, hosts=hosts)
+        else:
+            _llm_client_instance = OllamaClient(model_name=model_name)
     return _llm_client_instance
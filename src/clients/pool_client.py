@@ -0,0 +1,369 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set
+
+import httpx
+import ollama
+
+from src.metrics import review_stats
+from .limiter import AdaptiveLimiter
+from .ollama_client import OllamaClient
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops routing to a host after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the breaker opens; once
+    ``reset_timeout`` has passed a single probe call is let through, and its
+    outcome closes the breaker again or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        expired = time.monotonic() - self._opened_at >= self.reset_timeout
+        if self.state == OPEN and expired:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def record_abandoned(self) -> None:
+        """The call was cancelled before it said anything about the host"""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != OPEN:
+                review_stats.incr("pool_breaker_opened")
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class _Backend:
+    def __init__(self, client: OllamaClient, breaker: CircuitBreaker):
+        self.client = client
+        self.breaker = breaker
+        self.outstanding = 0
+        # Models this host served or loaded recently; routing prefers them
+        self.loaded_models: Set[str] = set()
+
+
+class NoHealthyHostError(RuntimeError):
+    pass
+
+
+class OllamaPoolClient:
+    """Drop-in replacement for OllamaClient that spreads calls over several hosts.
+
+    Each call goes to the healthy host with the fewest outstanding requests,
+    with a bonus for hosts that already have the model loaded. Connection
+    errors, timeouts and 5xx answers count against a host's circuit breaker
+    and the call fails over to the next host. Async generations still
+    running after the ``hedge_percentile`` latency of recent calls are
+    duplicated on a second host; the first answer wins and the other call
+    is cancelled.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        hosts: List[str],
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        affinity_bonus: int = 2,
+        hedge_percentile: Optional[float] = 0.95,
+        hedge_min_samples: int = 20,
+    ):
+        if not hosts:
+            raise ValueError("OllamaPoolClient needs at least one host")
+        self.model_name = model_name
+        self.affinity_bonus = affinity_bonus
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.backends = [
+            _Backend(
+                OllamaClient(model_name=model_name, host=host),
+                CircuitBreaker(failure_threshold, reset_timeout),
+            )
+            for host in hosts
+        ]
+        self.limiter: Optional[AdaptiveLimiter] = None
+        self._keep_alive: Optional[str] = None
+        self._latencies: Dict[str, Deque[float]] = {}
+        # Routing state is touched from worker threads and the event loop
+        self._lock = threading.Lock()
+
+    @property
+    def keep_alive(self) -> Optional[str]:
+        return self._keep_alive
+
+    @keep_alive.setter
+    def keep_alive(self, value: Optional[str]) -> None:
+        self._keep_alive = value
+        for backend in self.backends:
+            backend.client.keep_alive = value
+
+    @property
+    def supports_format(self) -> bool:
+        return all(backend.client.supports_format for backend in self.backends)
+
+    def host_status(self) -> List[dict]:
+        return [
+            {
+                "host": backend.client.host,
+                "state": backend.breaker.state,
+                "outstanding": backend.outstanding,
+                "models": sorted(backend.loaded_models),
+            }
+            for backend in self.backends
+        ]
+
+    def generate(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+        model = kwargs.get("model") or self.model_name
+        tried: List[_Backend] = []
+        with self._slot():
+            while True:
+                backend = self._acquire(model, tried)
+                start = time.perf_counter()
+                try:
+                    result = backend.client.generate(
+                        system_prompt, user_prompt, **kwargs
+                    )
+                except Exception as e:
+                    self._release(backend, model, None, e)
+                    if not _is_host_failure(e) or len(tried) == len(self.backends):
+                        raise
+                    review_stats.incr("pool_failovers")
+                    continue
+                self._release(backend, model, time.perf_counter() - start, None)
+                return result
+
+    async def generate_async(
+        self, system_prompt: str, user_prompt: str, **kwargs
+    ) -> str:
+        model = kwargs.get("model") or self.model_name
+        tried: List[_Backend] = []
+
+        async def attempt() -> str:
+            backend = self._acquire(model, tried)
+            start = time.perf_counter()
+            try:
+                result = await backend.client.generate_async(
+                    system_prompt, user_prompt, **kwargs
+                )
+            except BaseException as e:
+                self._release(backend, model, None, e)
+                raise
+            self._release(backend, model, time.perf_counter() - start, None)
+            return result
+
+        async with self._slot_async():
+            running: Set[asyncio.Task] = {asyncio.ensure_future(attempt())}
+            hedges: Set[asyncio.Task] = set()
+            hedge_delay = self._hedge_delay(model)
+            error: Optional[BaseException] = None
+            try:
+                while running:
+                    done, running = await asyncio.wait(
+                        running,
+                        timeout=hedge_delay,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if not done:
+                        # Slower than hedge_percentile of recent calls: race
+                        # a second host and keep whichever answers first
+                        hedge_delay = None
+                        if self._has_spare_host(tried):
+                            review_stats.incr("pool_hedges")
+                            hedge = asyncio.ensure_future(attempt())
+                            hedges.add(hedge)
+                            running.add(hedge)
+                        continue
+                    for task in done:
+                        if task.exception() is None:
+                            if task in hedges:
+                                review_stats.incr("pool_hedge_wins")
+                            return task.result()
+                        error = task.exception()
+                    if (
+                        not running
+                        and _is_host_failure(error)
+                        and len(tried) < len(self.backends)
+                    ):
+                        review_stats.incr("pool_failovers")
+                        running.add(asyncio.ensure_future(attempt()))
+                raise error
+            finally:
+                for task in running:
+                    task.cancel()
+
+    async def stream_async(
+        self, system_prompt: str, user_prompt: str, **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream from one host; fail over only before the first chunk arrives"""
+        model = kwargs.get("model") or self.model_name
+        tried: List[_Backend] = []
+        async with self._slot_async():
+            while True:
+                backend = self._acquire(model, tried)
+                start = time.perf_counter()
+                started = False
+                try:
+                    async for chunk in backend.client.stream_async(
+                        system_prompt, user_prompt, **kwargs
+                    ):
+                        started = True
+                        yield chunk
+                except BaseException as e:
+                    self._release(backend, model, None, e)
+                    if (
+                        started
+                        or not _is_host_failure(e)
+                        or len(tried) == len(self.backends)
+                    ):
+                        raise
+                    review_stats.incr("pool_failovers")
+                    continue
+                self._release(backend, model, time.perf_counter() - start, None)
+                return
+
+    async def warmup(self, model: Optional[str] = None) -> None:
+        """Load the model on every host; fails only if no host could load it"""
+        model = model or self.model_name
+        results = await asyncio.gather(
+            *(backend.client.warmup(model) for backend in self.backends),
+            return_exceptions=True,
+        )
+        errors = []
+        for backend, result in zip(self.backends, results):
+            if isinstance(result, BaseException):
+                backend.breaker.record_failure()
+                errors.append(f"{backend.client.host}: {result}")
+            else:
+                backend.loaded_models.add(model)
+        if len(errors) == len(self.backends):
+            raise NoHealthyHostError("; ".join(errors))
+        for error in errors:
+            logger.warning("[%s] warmup failed on %s", model, error)
+
+    async def warm_prefix(
+        self,
+        system_prompt: str,
+        model: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+    ) -> None:
+        """Warm a system prompt prefix on every healthy host"""
+        results = await asyncio.gather(
+            *(
+                backend.client.warm_prefix(system_prompt, model, num_ctx)
+                for backend in self.backends
+                if backend.breaker.state != OPEN
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning("prefix warm-up failed: %s", result)
+
+    def _acquire(self, model: str, tried: List[_Backend]) -> _Backend:
+        """Pick the least loaded healthy host not tried yet and count the call"""
+        with self._lock:
+            candidates = [backend for backend in self.backends if backend not in tried]
+            # Healthy hosts first, then least outstanding; a host with the
+            # model loaded counts as affinity_bonus requests lighter
+            candidates.sort(
+                key=lambda backend: (
+                    backend.breaker.state == OPEN,
+                    backend.outstanding
+                    - (self.affinity_bonus if model in backend.loaded_models else 0),
+                )
+            )
+            # allow() also lets one probe through to a host whose breaker expired
+            for backend in candidates:
+                if backend.breaker.allow():
+                    backend.outstanding += 1
+                    tried.append(backend)
+                    return backend
+        raise NoHealthyHostError(f"no healthy Ollama host for {model}")
+
+    def _release(
+        self,
+        backend: _Backend,
+        model: str,
+        latency: Optional[float],
+        error: Optional[BaseException],
+    ) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+            if error is None:
+                backend.breaker.record_success()
+                backend.loaded_models.add(model)
+                self._latencies.setdefault(model, deque(maxlen=200)).append(latency)
+            elif _is_host_failure(error):
+                backend.breaker.record_failure()
+                backend.loaded_models.discard(model)
+            elif isinstance(error, ollama.ResponseError) and error.status_code == 404:
+                # Model not pulled on this host
+                backend.loaded_models.discard(model)
+            elif isinstance(error, asyncio.CancelledError):
+                # A lost hedge or a caller that went away
+                backend.breaker.record_abandoned()
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        if self.hedge_percentile is None or len(self.backends) < 2:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * self.hedge_percentile))]
+
+    def _has_spare_host(self, tried: List[_Backend]) -> bool:
+        with self._lock:
+            return any(
+                backend not in tried and backend.breaker.state == CLOSED
+                for backend in self.backends
+            )
+
+    def _slot(self):
+        return self.limiter.slot() if self.limiter is not None else nullcontext()
+
+    def _slot_async(self):
+        if self.limiter is not None:
+            return self.limiter.slot_async()
+        return nullcontext()
+
+
+def _is_host_failure(error: Optional[BaseException]) -> bool:
+    """Errors that say the host is down or overloaded, not that the call was bad"""
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code >= 500 or error.status_code == 429
+    return isinstance(error, (httpx.TransportError, ConnectionError))
@@ -0,0 +1,52 @@
+import threading
+from typing import Dict, Tuple
+
+from src.metrics import review_stats
+from src.metrics.prometheus import record_prefix_reuse
+
+# Rough prompt size estimate, as in src.agents.budget
+CHARS_PER_TOKEN = 3.5
+NANOSECONDS = 1e9
+# User message of a prefix warm-up call; any short, fixed text will do
+WARMUP_USER_PROMPT = "Reply with OK."
+
+
+class PrefixTracker:
+    """Prefill size of each warmed (model, system prompt) prefix.
+
+    Ollama keeps the KV cache of the last prompt in each of its parallel
+    slots and only prefills what differs from it, so a call whose system
+    prompt is still cached reports a prompt_eval_count of roughly its user
+    message alone. Comparing that count with the prefix's warm-up count
+    tells whether the prefix was reused, and the call's own prefill rate
+    gives the time that saved.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def warmed(self, model: str, system_prompt: str, response) -> None:
+        # A prefix that was cached already reports fewer tokens; keep the max
+        tokens = response.get("prompt_eval_count") or 0
+        key = (model, system_prompt)
+        with self._lock:
+            self._tokens[key] = max(tokens, self._tokens.get(key, 0))
+
+    def record(
+        self, model: str, system_prompt: str, user_prompt: str, response
+    ) -> None:
+        """Count one call as a prefix hit or miss, if its prefix was warmed"""
+        prefix_tokens = self._tokens.get((model, system_prompt))
+        evaluated = response.get("prompt_eval_count")
+        if not prefix_tokens or not evaluated:
+            return
+        suffix_tokens = len(user_prompt) / CHARS_PER_TOKEN
+        hit = evaluated < suffix_tokens + prefix_tokens / 2
+        seconds_saved = 0.0
+        if hit:
+            duration = response.get("prompt_eval_duration") or 0
+            seconds_saved = prefix_tokens * duration / evaluated / NANOSECONDS
+            review_stats.incr("prefill_seconds_saved", seconds_saved)
+        review_stats.incr("prefix_cache_hits" if hit else "prefix_cache_misses")
+        record_prefix_reuse(model, hit, seconds_saved)
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import AsyncIterator, List, Optional
+
+from src.metrics.prometheus import record_ollama_timings
+from .limiter import AdaptiveLimiter, observe_response
+from .prefix_cache import WARMUP_USER_PROMPT, PrefixTracker
+
+logger = logging.getLogger(__name__)
+
+SECTION_PATTERN = re.compile(r"=== REVIEW SECTION: (\S+) ===")
+REPAIRED_SECTION_PATTERN = re.compile(r"[\"'](\w+)[\"']: \{")
+SHOWN_LINE_PATTERN = re.compile(r"^\s*(\d+) \|", re.MULTILINE)
+SEVERITIES = ["critical", "high", "medium", "low"]
+NANOSECONDS = 1e9
+
+
+class SimulatedOllamaClient:
+    """Stand-in for OllamaClient that needs no GPU, for load tests and benchmarks.
+
+    Latency follows Ollama's shape: prefill time grows with prompt tokens and
+    decode time with output tokens, each at a rate drawn from a lognormal
+    distribution around the configured tokens/sec. Calls beyond ``parallel``
+    share the simulated GPU, so each slows down in proportion, as a real
+    server's throughput would. Outputs are canned findings JSON; a
+    ``malformed_rate`` share of them comes back wrapped in prose, with single
+    quotes or cut off, to exercise the tolerant parser and the repair path.
+    Like Ollama's slots, the last ``parallel`` system prompts stay cached and
+    are not prefilled again, unless keep_alive is 0.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        prefill_tps: float = 1500.0,
+        decode_tps: float = 40.0,
+        jitter: float = 0.25,
+        parallel: int = 4,
+        malformed_rate: float = 0.1,
+        max_findings: int = 4,
+        seed: Optional[int] = None,
+    ):
+        self.model_name = model_name
+        self.prefill_tps = prefill_tps
+        self.decode_tps = decode_tps
+        self.jitter = jitter
+        self.parallel = parallel
+        self.malformed_rate = malformed_rate
+        self.max_findings = max_findings
+        self.supports_format = True
+        self.keep_alive: Optional[str] = None
+        self.limiter: Optional[AdaptiveLimiter] = None
+        self.prefixes = PrefixTracker()
+        self._cached_prefixes: "OrderedDict[tuple, None]" = OrderedDict()
+        self._random = random.Random(seed)
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def generate(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+        with self._slot():
+            text, seconds, timings = self._plan(system_prompt, user_prompt, kwargs)
+            time.sleep(seconds)
+            self._finish(kwargs, timings, system_prompt, user_prompt)
+        return text
+
+    async def generate_async(
+        self, system_prompt: str, user_prompt: str, **kwargs
+    ) -> str:
+        async with self._slot_async():
+            text, seconds, timings = self._plan(system_prompt, user_prompt, kwargs)
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                self._finish(kwargs, timings, system_prompt, user_prompt)
+        return text
+
+    async def stream_async(
+        self, system_prompt: str, user_prompt: str, **kwargs
+    ) -> AsyncIterator[str]:
+        async with self._slot_async():
+            text, seconds, timings = self._plan(system_prompt, user_prompt, kwargs)
+            prefill = timings["prompt_eval_duration"] / NANOSECONDS
+            chunks = [text[start : start + 16] for start in range(0, len(text), 16)]
+            try:
+                await asyncio.sleep(prefill)
+                per_chunk = (seconds - prefill) / max(1, len(chunks))
+                for chunk in chunks:
+                    await asyncio.sleep(per_chunk)
+                    yield chunk
+            finally:
+                self._finish(kwargs, timings, system_prompt, user_prompt)
+
+    async def warmup(self, model: Optional[str] = None) -> None:
+        await asyncio.sleep(0)
+
+    async def warm_prefix(
+        self,
+        system_prompt: str,
+        model: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+    ) -> None:
+        kwargs = {"model": model or self.model_name, "max_tokens": 1}
+        async with self._slot_async():
+            _, seconds, timings = self._plan(system_prompt, WARMUP_USER_PROMPT, kwargs)
+            await asyncio.sleep(seconds)
+        with self._lock:
+            self._active -= 1
+        self.prefixes.warmed(kwargs["model"], system_prompt, timings)
+
+    def _plan(self, system_prompt: str, user_prompt: str, kwargs: dict):
+        """Pick the output and how long producing it takes at the current load"""
+        with self._lock:
+            self._active += 1
+            contention = max(1.0, self._active / self.parallel)
+            text = self._output(system_prompt, user_prompt, kwargs)
+            prefill_rate = self._rate(self.prefill_tps)
+            decode_rate = self._rate(self.decode_tps)
+            model = kwargs.get("model") or self.model_name
+            cached = self._use_prefix(model, system_prompt)
+        prompt_tokens = len(user_prompt) // 4
+        if not cached:
+            prompt_tokens += len(system_prompt) // 4
+        output_tokens = max(1, len(text) // 4)
+        prefill = prompt_tokens / prefill_rate * contention
+        decode = output_tokens / decode_rate * contention
+        timings = {
+            "load_duration": 0,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prefill * NANOSECONDS),
+            "eval_count": output_tokens,
+            "eval_duration": int(decode * NANOSECONDS),
+        }
+        return text, prefill + decode, timings
+
+    def _use_prefix(self, model: str, system_prompt: str) -> bool:
+        """Whether a slot still holds this system prompt; caches it if not"""
+        key = (model, system_prompt)
+        if str(self.keep_alive) in ("0", "0s"):
+            self._cached_prefixes.clear()
+            return False
+        cached = key in self._cached_prefixes
+        self._cached_prefixes[key] = None
+        self._cached_prefixes.move_to_end(key)
+        while len(self._cached_prefixes) > self.parallel:
+            self._cached_prefixes.popitem(last=False)
+        return cached
+
+    def _finish(
+        self, kwargs: dict, timings: dict, system_prompt: str, user_prompt: str
+    ) -> None:
+        with self._lock:
+            self._active -= 1
+        model = kwargs.get("model") or self.model_name
+        record_ollama_timings(model, timings)
+        observe_response(timings)
+        self.prefixes.record(model, system_prompt, user_prompt, timings)
+
+    def _rate(self, mean: float) -> float:
+        return mean * self._random.lognormvariate(0, self.jitter)
+
+    def _output(self, system_prompt: str, user_prompt: str, kwargs: dict) -> str:
+        if system_prompt.startswith("You repair malformed JSON"):
+            # The broken output is the prompt; keep its section keys if any
+            sections = REPAIRED_SECTION_PATTERN.findall(user_prompt)
+            if sections:
+                return json.dumps(
+                    {section: {"findings": self._findings("")} for section in sections}
+                )
+            return json.dumps({"findings": self._findings(user_prompt)})
+        sections = SECTION_PATTERN.findall(system_prompt)
+        if sections:
+            document = {
+                section: {"findings": self._findings(user_prompt)}
+                for section in sections
+            }
+        else:
+            document = {"findings": self._findings(user_prompt)}
+        text = json.dumps(document, indent=2)
+        if self._random.random() < self.malformed_rate:
+            text = self._malform(text)
+        # Like Ollama, stop at num_predict even if the JSON is unfinished
+        max_chars = kwargs.get("max_tokens", 2000) * 4
+        return text[:max_chars]
+
+    def _findings(self, user_prompt: str) -> List[dict]:
+        lines = [int(line) for line in SHOWN_LINE_PATTERN.findall(user_prompt)] or [1]
+        return [
+            {
+                "severity": self._random.choice(SEVERITIES),
+                "line_number": self._random.choice(lines),
+                "issue_type": "simulated_issue",
+                "description": "Simulated finding produced without a model",
+                "suggestion": "Nothing to fix; this output is canned",
+                "confidence": round(self._random.uniform(0.4, 0.95), 2),
+            }
+            for _ in range(self._random.randint(0, self.max_findings))
+        ]
+
+    def _malform(self, text: str) -> str:
+        kind = self._random.choice(["prose", "single_quotes", "truncated"])
+        if kind == "prose":
+            return f"Here is my review:\n```json\n{text}\n```\nLet me know!"
+        if kind == "single_quotes":
+            return text.replace('"', "'")
+        return text[: max(1, int(len(text) * 0.7))]
+
+    def _slot(self):
+        return self.limiter.slot() if self.limiter is not None else nullcontext()
+
+    def _slot_async(self):
+        if self.limiter is not None:
+            return self.limiter.slot_async()
+        return nullcontext()
@@ -0,0 +1,4 @@
+from .store import JobStore, LeaseLost
+from .worker import JobWorker
+
+__all__ = ["JobStore", "JobWorker", "LeaseLost"]
@@ -0,0 +1,245 @@
+import json
+import sqlite3
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from src.models import AgentResponse, CodeDiff, ReviewJob
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class LeaseLost(Exception):
+    """The job was reclaimed by another worker after this one's lease ran out"""
+
+
+class JobStore:
+    """SQLite-backed queue and state for background review jobs.
+
+    Every API worker on the host can point at the same file: claiming a job
+    is a single IMMEDIATE transaction, so each job runs on one worker at a
+    time. A running job holds a lease that its worker renews while the job
+    runs; if the process dies the lease runs out and the job is picked up
+    again. The attempt number a claim returns is the lease token: updates
+    carrying an older attempt are refused with LeaseLost.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 3):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Same pattern as the review cache: short-lived connections, WAL mode
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS review_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    code_diff TEXT NOT NULL,
+                    agent_responses TEXT NOT NULL DEFAULT '[]',
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_expires_at REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS review_jobs_status "
+                "ON review_jobs (status, created_at)"
+            )
+        finally:
+            conn.close()
+
+    def create(self, code_diff: CodeDiff, mode: str) -> ReviewJob:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            conn.execute(
+                """INSERT INTO review_jobs
+                   (job_id, status, mode, file_path, code_diff, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    job_id,
+                    QUEUED,
+                    mode,
+                    code_diff.file_path,
+                    code_diff.model_dump_json(),
+                    now,
+                    now,
+                ),
+            )
+        finally:
+            conn.close()
+        return ReviewJob(
+            job_id=job_id,
+            status=QUEUED,
+            mode=mode,
+            file_path=code_diff.file_path,
+            created_at=now,
+            updated_at=now,
+        )
+
+    def get(self, job_id: str) -> Optional[ReviewJob]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                """SELECT job_id, status, mode, file_path, agent_responses, error,
+                          attempts, created_at, updated_at
+                   FROM review_jobs WHERE job_id = ?""",
+                (job_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return ReviewJob(
+            job_id=row[0],
+            status=row[1],
+            mode=row[2],
+            file_path=row[3],
+            agent_responses=json.loads(row[4]),
+            error=row[5],
+            attempts=row[6],
+            created_at=row[7],
+            updated_at=row[8],
+        )
+
+    def claim(
+        self, lease_seconds: float
+    ) -> Optional[Tuple[str, int, str, CodeDiff]]:
+        """Take the oldest runnable job: queued, or running with an expired lease.
+
+        Returns (job_id, attempt, mode, code_diff). A reclaimed job starts
+        over, so results of the lost attempt are cleared.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """SELECT job_id, mode, code_diff, attempts FROM review_jobs
+                   WHERE status = ? OR (status = ? AND lease_expires_at < ?)
+                   ORDER BY created_at LIMIT 1""",
+                (QUEUED, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            job_id, mode, code_diff_json, attempts = row
+            if attempts >= self.max_attempts:
+                # Crashed its worker every time; do not let it poison the queue
+                conn.execute(
+                    """UPDATE review_jobs SET status = ?, error = ?, updated_at = ?
+                       WHERE job_id = ?""",
+                    (FAILED, f"gave up after {attempts} attempts", now, job_id),
+                )
+                conn.execute("COMMIT")
+                return self.claim(lease_seconds)
+            conn.execute(
+                """UPDATE review_jobs
+                   SET status = ?, attempts = attempts + 1, agent_responses = '[]',
+                       lease_expires_at = ?, updated_at = ?
+                   WHERE job_id = ?""",
+                (RUNNING, now + lease_seconds, now, job_id),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return job_id, attempts + 1, mode, CodeDiff.model_validate_json(code_diff_json)
+
+    def add_responses(
+        self,
+        job_id: str,
+        attempt: int,
+        responses: List[AgentResponse],
+        lease_seconds: float,
+    ) -> None:
+        """Append partial results and renew the lease; LeaseLost if not ours"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """SELECT agent_responses FROM review_jobs
+                   WHERE job_id = ? AND status = ? AND attempts = ?""",
+                (job_id, RUNNING, attempt),
+            ).fetchone()
+            if row is None:
+                raise LeaseLost(job_id)
+            stored = json.loads(row[0])
+            stored.extend(response.model_dump(mode="json") for response in responses)
+            conn.execute(
+                """UPDATE review_jobs
+                   SET agent_responses = ?, lease_expires_at = ?, updated_at = ?
+                   WHERE job_id = ?""",
+                (json.dumps(stored), now + lease_seconds, now, job_id),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def renew_lease(self, job_id: str, attempt: int, lease_seconds: float) -> None:
+        """Extend a running job's lease; a worker heartbeat calls this"""
+        now = time.time()
+        self._update_owned(
+            job_id,
+            attempt,
+            "lease_expires_at = ?, updated_at = ?",
+            (now + lease_seconds, now),
+        )
+
+    def finish(self, job_id: str, attempt: int, error: Optional[str] = None) -> None:
+        self._update_owned(
+            job_id,
+            attempt,
+            "status = ?, error = ?, lease_expires_at = NULL, updated_at = ?",
+            (FAILED if error else COMPLETED, error, time.time()),
+        )
+
+    def requeue(self, job_id: str, attempt: int) -> None:
+        """Hand a job back on shutdown without counting it as an attempt"""
+        self._update_owned(
+            job_id,
+            attempt,
+            """status = ?, attempts = attempts - 1,
+               lease_expires_at = NULL, updated_at = ?""",
+            (QUEUED, time.time()),
+        )
+
+    def _update_owned(
+        self, job_id: str, attempt: int, assignments: str, values: tuple
+    ) -> None:
+        """UPDATE the job if this attempt still holds it, else raise LeaseLost"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"""UPDATE review_jobs SET {assignments}
+                    WHERE job_id = ? AND status = ? AND attempts = ?""",
+                values + (job_id, RUNNING, attempt),
+            )
+        finally:
+            conn.close()
+        if cursor.rowcount == 0:
+            raise LeaseLost(job_id)
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from src.models import AgentResponse, CodeDiff
+from src.services import OrchestratorService
+from .store import JobStore, LeaseLost
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """Background loops that claim jobs from the store and run the reviews.
+
+    Each API process runs ``concurrency`` loops on its event loop. They go
+    through the same orchestrator, scheduler and limiter as live requests,
+    so background jobs share Ollama fairly instead of competing for it.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        orchestrator: OrchestratorService,
+        concurrency: int = 2,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 600,
+    ):
+        self.store = store
+        self.orchestrator = orchestrator
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        # Renew leases well before they run out, however long agents take
+        self.heartbeat_interval = lease_seconds / 3
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run_loop()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Skip the poll delay when a job was just submitted to this process"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run_loop(self) -> None:
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self.store.claim, self.lease_seconds)
+            except Exception as e:
+                logger.error("job store error: %s", e)
+                claimed = None
+            if claimed is None:
+                await self._idle()
+                continue
+            await self._run_job(*claimed)
+
+    async def _idle(self) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_job(
+        self, job_id: str, attempt: int, mode: str, code_diff: CodeDiff
+    ) -> None:
+        logger.info("job %s STARTED (%s, %s)", job_id, mode, code_diff.file_path)
+
+        async def save(response: AgentResponse) -> None:
+            await asyncio.to_thread(
+                self.store.add_responses,
+                job_id,
+                attempt,
+                [response],
+                self.lease_seconds,
+            )
+
+        review = asyncio.ensure_future(
+            self.orchestrator.review(code_diff, mode, on_response=save)
+        )
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, attempt, review))
+        try:
+            try:
+                await review
+            except asyncio.CancelledError:
+                if review.cancelled() and heartbeat.done():
+                    # The heartbeat stopped the review: the lease is gone
+                    heartbeat.result()
+                raise
+            await asyncio.to_thread(self.store.finish, job_id, attempt)
+            logger.info("job %s FINISHED", job_id)
+        except LeaseLost:
+            # Another worker reclaimed the job and owns its results now
+            logger.warning("job %s lost its lease, dropping this attempt", job_id)
+        except asyncio.CancelledError:
+            # Shutting down: give the job back so another worker restarts it
+            review.cancel()
+            try:
+                await asyncio.to_thread(self.store.requeue, job_id, attempt)
+            except LeaseLost:
+                pass
+            raise
+        except Exception as e:
+            logger.warning("job %s FAILED: %s", job_id, e)
+            try:
+                await asyncio.to_thread(self.store.finish, job_id, attempt, str(e))
+            except LeaseLost:
+                pass
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(
+        self, job_id: str, attempt: int, review: asyncio.Future
+    ) -> None:
+        """Keep the job's lease alive for as long as its review runs.
+
+        Responses renew it too, but a sharded file reports each agent only
+        once every shard is done, which can take longer than the lease. If
+        another worker has reclaimed the job, the review is cancelled and
+        LeaseLost is raised.
+        """
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await asyncio.to_thread(
+                    self.store.renew_lease, job_id, attempt, self.lease_seconds
+                )
+            except LeaseLost:
+                review.cancel()
+                raise
+            except Exception as e:
+                logger.warning("job %s lease renewal failed: %s", job_id, e)
@@ -1,6 +1,150 @@
+from contextlib import asynccontextmanager
+from typing import Dict, List
+import asyncio
+import logging
+import os
+
 from fastapi import FastAPI
-from src.routes import router
+from src.routes import router, metrics_router
+from src.agents.registry import load_review_settings
+from src.cache import NearDuplicateIndex, ReviewCache
+from src.clients import AdaptiveLimiter
+from src.clients.ollama_client import OllamaClient, get_llm_client
+from src.routes.admission import AdmissionController
+from src.jobs import JobStore, JobWorker
+from src.metrics import configure_logging, shutdown_logging
+from src.services import AgentPlanner, OrchestratorService, ReviewScheduler
+from src.agents.base_agent import BaseAgent
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up_models(llm_client: OllamaClient, model_status: Dict[str, str]):
+    """Load every configured model once so the first review skips the load"""
+    for model in model_status:
+        try:
+            await llm_client.warmup(model)
+            model_status[model] = "ready"
+            logger.info("[%s] warmed up", model)
+        except Exception as e:
+            model_status[model] = f"failed: {e}"
+            logger.warning("[%s] warmup failed: %s", model, e)
+
+
+async def warm_up_prefixes(
+    llm_client: OllamaClient, agents: List[BaseAgent], languages: List[str]
+):
+    """Prefill each agent's system prompt so reviews only prefill the diff"""
+    for agent in agents:
+        for language in languages:
+            try:
+                await llm_client.warm_prefix(**agent.prefix_request(language))
+            except Exception as e:
+                logger.warning(
+                    "[%s] %s prefix warmup failed: %s",
+                    agent.config.agent_name,
+                    language,
+                    e,
+                )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the review pipeline once and keep it for the app's lifetime"""
+    configure_logging()
+    settings = load_review_settings()
+    llm_client = get_llm_client(model_name=settings.model_name)
+    llm_client.keep_alive = settings.keep_alive
+
+    # Shared across requests; set REVIEW_CACHE_DB to share hits between workers
+    review_cache = ReviewCache(
+        max_entries=int(os.getenv("REVIEW_CACHE_SIZE", "1024")),
+        ttl_seconds=float(os.getenv("REVIEW_CACHE_TTL", "3600")),
+        db_path=os.getenv("REVIEW_CACHE_DB") or None,
+    )
+    # Near-copies of reviewed changes reuse their findings, e.g. with 0.9; off
+    # while unset, since reused findings come without a fresh look at the code
+    similarity_threshold = float(os.getenv("REVIEW_SIMILARITY_THRESHOLD", "0"))
+    near_duplicates = None
+    if similarity_threshold > 0:
+        near_duplicates = NearDuplicateIndex(
+            threshold=similarity_threshold,
+            max_entries=int(os.getenv("REVIEW_SIMILARITY_SIZE", "4096")),
+        )
+    # One scheduler per worker process caps how many generations hit Ollama at
+    # once; the limiter then adapts the real concurrency below that cap
+    max_concurrency = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+    min_concurrency = int(os.getenv("OLLAMA_MIN_CONCURRENCY", "1"))
+    review_scheduler = ReviewScheduler(max_concurrency=max_concurrency)
+    llm_client.limiter = AdaptiveLimiter(
+        initial_limit=max(min_concurrency, max_concurrency // 2),
+        min_limit=min_concurrency,
+        max_limit=max_concurrency,
+    )
+    # Requests beyond ADMISSION_MAX_ACTIVE wait in a bounded queue, then get 429
+    app.state.admission = AdmissionController(
+        max_active=int(os.getenv("ADMISSION_MAX_ACTIVE", "8")),
+        max_queued=int(os.getenv("ADMISSION_MAX_QUEUE", "32")),
+    )
+
+    app.state.settings = settings
+    app.state.orchestrator = OrchestratorService(
+        llm_client=llm_client,
+        agent_configs=settings.agents,
+        max_workers=settings.max_workers,
+        cache=review_cache,
+        scheduler=review_scheduler,
+        shard_max_lines=settings.shard_max_lines,
+        near_duplicates=near_duplicates,
+        # Rules from config/agents.json decide which agents each file gets
+        planner=AgentPlanner(settings.agent_rules),
+    )
+    # Long reviews run as jobs; every worker process sharing REVIEW_JOBS_DB
+    # shares the queue, and queued jobs survive restarts
+    app.state.job_store = JobStore(os.getenv("REVIEW_JOBS_DB", "review_jobs.db"))
+    app.state.job_worker = JobWorker(
+        store=app.state.job_store,
+        orchestrator=app.state.orchestrator,
+        concurrency=int(os.getenv("REVIEW_JOB_WORKERS", "2")),
+    )
+    app.state.job_worker.start()
+
+    models = {settings.model_name}
+    models.update(config.model_name for config in settings.agents if config.model_name)
+    models.update(
+        config.triage_model_name
+        for config in settings.agents
+        if config.triage_model_name
+    )
+    app.state.model_status = {model: "loading" for model in sorted(models)}
+    # Warm up in the background so the server accepts connections meanwhile;
+    # /code/ready reports when every model is loaded
+    # Then keep each agent's system prompt in Ollama's KV cache, for the
+    # languages most reviews are in; an empty REVIEW_PREFIX_LANGUAGES disables
+    languages = [
+        language.strip().lower()
+        for language in os.getenv(
+            "REVIEW_PREFIX_LANGUAGES", "python,go,javascript"
+        ).split(",")
+        if language.strip()
+    ]
+    prefix_agents = app.state.orchestrator.prefix_agents(settings.review_mode)
+
+    async def warm_up():
+        await warm_up_models(llm_client, app.state.model_status)
+        await warm_up_prefixes(llm_client, prefix_agents, languages)
+
+    warmup = asyncio.create_task(warm_up())
+    try:
+        yield
+    finally:
+        warmup.cancel()
+        await app.state.job_worker.stop()
+        app.state.orchestrator.close()
+        shutdown_logging()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(router)
+app.include_router(metrics_router)
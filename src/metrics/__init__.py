@@ -0,0 +1,4 @@
+from .stats import ReviewStats, review_stats
+from .log import configure_logging, shutdown_logging
+
+__all__ = ["ReviewStats", "review_stats", "configure_logging", "shutdown_logging"]
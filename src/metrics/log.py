@@ -0,0 +1,39 @@
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Optional
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """Route every log record through a queue to a background writer thread.
+
+    Request handlers and agent code only enqueue records, so a slow stderr
+    or log collector never blocks the event loop. LOG_LEVEL sets the level;
+    per-call Ollama timings are logged at DEBUG.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    output = logging.StreamHandler()
+    output.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    _listener = logging.handlers.QueueListener(
+        log_queue, output, respect_handler_level=True
+    )
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level or os.getenv("LOG_LEVEL", "INFO"))
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records; call once when the app stops"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
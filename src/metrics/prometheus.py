@@ -0,0 +1,163 @@
+from typing import Iterable, List
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily
+
+from .stats import ReviewStats, review_stats
+
+# Generations take seconds to minutes, so the buckets reach well past the defaults
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, 300)
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+TOKEN_RATE_BUCKETS = (1, 2, 5, 10, 20, 40, 60, 80, 120, 200, 400)
+PROMPT_TOKEN_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+AGENT_LATENCY = Histogram(
+    "review_agent_latency_seconds",
+    "Time for one agent to review one diff, cache hits included",
+    ["agent"],
+    buckets=LATENCY_BUCKETS,
+)
+QUEUE_WAIT = Histogram(
+    "review_queue_wait_seconds",
+    "Time spent waiting for a slot: admission, scheduler or LLM limiter",
+    ["stage"],
+    buckets=WAIT_BUCKETS,
+)
+OLLAMA_LOAD = Histogram(
+    "ollama_load_seconds",
+    "Model load time reported by Ollama; non-zero means the model was cold",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+OLLAMA_PREFILL = Histogram(
+    "ollama_prefill_seconds",
+    "Prompt evaluation (prefill) time reported by Ollama",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+OLLAMA_DECODE_RATE = Histogram(
+    "ollama_decode_tokens_per_second",
+    "Output tokens per second of decode time reported by Ollama",
+    ["model"],
+    buckets=TOKEN_RATE_BUCKETS,
+)
+OLLAMA_PROMPT_TOKENS = Counter(
+    "ollama_prompt_tokens", "Prompt tokens evaluated by Ollama", ["model"]
+)
+OLLAMA_OUTPUT_TOKENS = Counter(
+    "ollama_output_tokens", "Tokens generated by Ollama", ["model"]
+)
+PARSE_FAILURES = Counter(
+    "review_parse_failures",
+    "Outputs or findings that could not be turned into AgentFindings",
+    ["agent", "reason"],
+)
+FALLBACK_PARSES = Counter(
+    "review_fallback_parses",
+    "Outputs that needed the tolerant parser's repairs to yield findings",
+    ["agent"],
+)
+PROMPT_TOKENS = Histogram(
+    "review_prompt_tokens_estimated",
+    "Estimated prompt tokens per agent request, after any trimming",
+    ["agent"],
+    buckets=PROMPT_TOKEN_BUCKETS,
+)
+PROMPTS_TRIMMED = Counter(
+    "review_prompts_trimmed",
+    "Prompts cut down to fit max_context, by the step that made them fit",
+    ["agent", "stage"],
+)
+PROMPT_TOKENS_SAVED = Counter(
+    "review_prompt_tokens_saved",
+    "Estimated prompt tokens removed by prompt compaction",
+    ["agent"],
+)
+CASCADE_PATHS = Counter(
+    "review_cascade_paths",
+    "Cascade reviews by outcome: triage only, escalated or direct",
+    ["agent", "path"],
+)
+CASCADE_SECONDS_SAVED = Counter(
+    "review_cascade_seconds_saved",
+    "Estimated full-model review time avoided by stopping at triage",
+    ["agent"],
+)
+AGENTS_SKIPPED = Counter(
+    "review_agents_skipped",
+    "Agents the planner left out of a review, by the rule's reason",
+    ["agent", "reason"],
+)
+REVIEWS_ABORTED = Counter(
+    "review_aborted",
+    "Reviews cut short by their deadline or by the client disconnecting",
+    ["reason"],
+)
+FINDINGS = Counter(
+    "review_findings", "Findings produced by agents", ["agent", "severity"]
+)
+
+OLLAMA_PREFIX_CACHE = Counter(
+    "ollama_prefix_cache",
+    "Calls with a warmed system prompt, by whether Ollama reused its KV cache",
+    ["model", "result"],
+)
+OLLAMA_PREFILL_SAVED = Counter(
+    "ollama_prefill_seconds_saved",
+    "Estimated prompt_eval time saved by reusing warmed system prompt prefixes",
+    ["model"],
+)
+
+NANOSECONDS = 1e9
+
+
+def record_ollama_timings(model: str, response) -> None:
+    """Export the timing fields of a final chat response (or done stream part)"""
+    load = response.get("load_duration")
+    if load is not None:
+        OLLAMA_LOAD.labels(model).observe(load / NANOSECONDS)
+    prompt_eval = response.get("prompt_eval_duration")
+    if prompt_eval is not None:
+        OLLAMA_PREFILL.labels(model).observe(prompt_eval / NANOSECONDS)
+    prompt_tokens = response.get("prompt_eval_count")
+    if prompt_tokens:
+        OLLAMA_PROMPT_TOKENS.labels(model).inc(prompt_tokens)
+    output_tokens = response.get("eval_count")
+    decode = response.get("eval_duration")
+    if output_tokens:
+        OLLAMA_OUTPUT_TOKENS.labels(model).inc(output_tokens)
+        if decode:
+            OLLAMA_DECODE_RATE.labels(model).observe(
+                output_tokens / (decode / NANOSECONDS)
+            )
+
+
+def record_prefix_reuse(model: str, hit: bool, seconds_saved: float) -> None:
+    OLLAMA_PREFIX_CACHE.labels(model, "hit" if hit else "miss").inc()
+    if seconds_saved:
+        OLLAMA_PREFILL_SAVED.labels(model).inc(seconds_saved)
+
+
+def record_findings(agent_name: str, findings: Iterable) -> None:
+    for finding in findings:
+        FINDINGS.labels(agent_name, finding.severity).inc()
+
+
+class ReviewStatsCollector:
+    """Exposes the ReviewStats counters as review_events_total{event=...}"""
+
+    def __init__(self, stats: ReviewStats):
+        self.stats = stats
+
+    def collect(self) -> List[CounterMetricFamily]:
+        family = CounterMetricFamily(
+            "review_events",
+            "Process-wide review counters: cache hits, repairs, coalescing, ...",
+            labels=["event"],
+        )
+        for name, value in sorted(self.stats.snapshot().items()):
+            family.add_metric([name], value)
+        return [family]
+
+
+REGISTRY.register(ReviewStatsCollector(review_stats))
@@ -0,0 +1,22 @@
+import threading
+from collections import Counter
+from typing import Dict
+
+
+class ReviewStats:
+    """Thread-safe, process-wide counters for review savings and failures"""
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counts)
+
+
+review_stats = ReviewStats()
@@ -1,3 +1,27 @@
-from .models import CodeDiff, AgentFinding, AgentResponse, ReviewResult, AgentConfig
+from .models import (
+    CodeDiff,
+    AgentFinding,
+    AgentResponse,
+    ReviewResult,
+    AgentConfig,
+    AgentRule,
+    ReviewStreamEvent,
+    FileReviewResult,
+    ReviewSettings,
+    ReviewJob,
+    RepoReviewRequest,
+)
 
-__all__ = ["CodeDiff", "AgentFinding", "AgentResponse", "ReviewResult", "AgentConfig"]
+__all__ = [
+    "CodeDiff",
+    "AgentFinding",
+    "AgentResponse",
+    "ReviewResult",
+    "AgentConfig",
+    "AgentRule",
+    "ReviewStreamEvent",
+    "FileReviewResult",
+    "ReviewSettings",
+    "ReviewJob",
+    "RepoReviewRequest",
+]
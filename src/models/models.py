@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 from datetime import timedelta
 
 
@@ -7,6 +7,59 @@ class AgentConfig(BaseModel):
     agent_name: str
     agent_class: str
     temperature: float
+    # Overrides the client's default model for this agent
+    model_name: Optional[str] = None
+    # Send only changed hunks plus this many lines of context around each
+    hunk_only: bool = True
+    context_lines: int = 3
+    # Run the static rule engine first; it may skip the LLM on benign diffs
+    prescan: bool = False
+    # Constrain decoding to the findings JSON schema where the backend allows
+    structured_output: bool = True
+    # Re-asks that send only malformed output back for repair
+    repair_attempts: int = 1
+    # Cascade mode: a small model reviews first (the static prescan when unset
+    # and prescan is on) and the diff is escalated to model_name only when
+    # the triage risk, severity weight x confidence in [0, 1], reaches this
+    triage_model_name: Optional[str] = None
+    escalation_threshold: float = 0.5
+    # Output cap; the decode budget (num_predict) is sized from it
+    max_findings: int = 10
+    # Largest num_ctx this agent may request; bigger prompts are trimmed
+    max_context: int = 8192
+    # Leave out unchanged file edges and blank lines, and send only the
+    # few-shot examples and language notes for the diff's language
+    compact_prompt: bool = True
+
+
+class AgentRule(BaseModel):
+    """Agents not worth running on some diffs; every condition given must hold"""
+
+    reason: str
+    # Agent classes or agent names to skip; "*" skips every agent
+    skip: List[str] = ["*"]
+    # Globs matched against the file path and its base name, case-insensitively
+    file_patterns: List[str] = []
+    languages: List[str] = []
+    # "generated", "whitespace_only" or "deletions_only"
+    shape: Optional[str] = None
+
+
+class ReviewSettings(BaseModel):
+    """Service configuration loaded once at startup from config/agents.json"""
+
+    model_name: str = "llama3.2:latest"
+    max_workers: int = 5
+    # How long Ollama keeps models loaded after the last call
+    keep_alive: str = "30m"
+    # "separate" runs one generation per agent, "fused" one generation for all
+    review_mode: str = "separate"
+    # Files longer than this are reviewed in function-level shards; 0 disables
+    shard_max_lines: int = 400
+    # Which agents to leave out per file; None uses the planner's defaults
+    # and an empty list runs every agent on every file
+    agent_rules: Optional[List[AgentRule]] = None
+    agents: List[AgentConfig]
 
 
 class AgentFinding(BaseModel):
@@ -22,18 +75,57 @@ class AgentResponse(BaseModel):
     agent_name: str
     findings: List[AgentFinding]
     execution_time: float # seconds
+    cache_hit: bool = False
+    llm_skipped: bool = False
+    skip_reason: Optional[str] = None
+    # Concurrent identical requests that received this same generation
+    served_callers: int = 1
+    # The diff was cut down to fit max_context
+    prompt_trimmed: bool = False
+    # Shards of a large file merged into this response
+    shards: int = 1
+    # Set when findings were reused from a near-identical earlier review
+    similarity: Optional[float] = None
+    # Cascade mode: "triage" (answered by triage), "escalated" or "direct"
+    cascade_path: Optional[str] = None
+    risk_score: Optional[float] = None
+    # Estimated prompt tokens sent, and what they would have been uncompacted
+    prompt_tokens: Optional[int] = None
+    prompt_tokens_before_compaction: Optional[int] = None
+    # "completed", "timed_out" when the request's deadline passed first, or
+    # "skipped" when the planner left the agent out (skip_reason says why)
+    status: str = "completed"
+
+
+class FileReviewResult(BaseModel):
+    """Agent responses for one file of a batch review"""
+
+    file_path: str
+    agent_responses: List[AgentResponse]
 
 
 class ReviewResult(BaseModel):
     """Complete review result from all agents"""
 
-    agent_responses: List[AgentResponse]
+    agent_responses: List[AgentResponse] = []
     total_findings: int
     critical_count: int
     high_count: int
     medium_count: int
     low_count: int
     summary: str
+    # Multi-file reviews group their responses per file here
+    files: List[FileReviewResult] = []
+    # Changed files left out, with the reason (binary, vendored, ...)
+    skipped_files: Dict[str, str] = {}
+
+
+class RepoReviewRequest(BaseModel):
+    """Review every file changed between two refs of a local repository"""
+
+    repo_path: str
+    base: str
+    head: str = "HEAD"
 
 
 class CodeDiff(BaseModel):
@@ -41,3 +133,28 @@ class CodeDiff(BaseModel):
     old_code: str
     new_code: str
     language: str
+
+
+class ReviewStreamEvent(BaseModel):
+    """One NDJSON line of a streamed review"""
+
+    event: str  # finding | agent_response | error | done
+    agent_name: Optional[str] = None
+    finding: Optional[AgentFinding] = None
+    response: Optional[AgentResponse] = None
+    error: Optional[str] = None
+
+
+class ReviewJob(BaseModel):
+    """A review running in the background; poll it until it is finished"""
+
+    job_id: str
+    status: str  # queued | running | completed | failed
+    mode: str
+    file_path: str
+    # Filled in as each agent finishes, so a running job shows partial results
+    agent_responses: List[AgentResponse] = []
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float
+    updated_at: float
@@ -0,0 +1,4 @@
+from .git_source import GitError, load_code_diffs
+from .review import build_review_result, review_repository
+
+__all__ = ["GitError", "load_code_diffs", "build_review_result", "review_repository"]
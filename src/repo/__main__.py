@@ -0,0 +1,63 @@
+"""Review the changes between two refs of a local git repository.
+
+Usage:
+    python -m src.repo /path/to/repo origin/main HEAD
+
+Builds the same pipeline as the API (config/agents.json, Ollama client,
+scheduler and limiter from the usual environment variables) and prints the
+aggregated ReviewResult as JSON.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+from src.agents.registry import load_review_settings
+from src.clients import AdaptiveLimiter
+from src.clients.ollama_client import get_llm_client
+from src.metrics import configure_logging, shutdown_logging
+from src.services import AgentPlanner, OrchestratorService, ReviewScheduler
+from .git_source import GitError
+from .review import review_repository
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("repo_path")
+    parser.add_argument("base")
+    parser.add_argument("head", nargs="?", default="HEAD")
+    args = parser.parse_args()
+
+    configure_logging()
+    settings = load_review_settings()
+    llm_client = get_llm_client(model_name=settings.model_name)
+    llm_client.keep_alive = settings.keep_alive
+    max_concurrency = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+    llm_client.limiter = AdaptiveLimiter(
+        initial_limit=max(1, max_concurrency // 2), max_limit=max_concurrency
+    )
+    orchestrator = OrchestratorService(
+        llm_client=llm_client,
+        agent_configs=settings.agents,
+        max_workers=settings.max_workers,
+        scheduler=ReviewScheduler(max_concurrency=max_concurrency),
+        shard_max_lines=settings.shard_max_lines,
+        planner=AgentPlanner(settings.agent_rules),
+    )
+    try:
+        result = await review_repository(
+            orchestrator, args.repo_path, args.base, args.head
+        )
+    except GitError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        orchestrator.close()
+        shutdown_logging()
+    print(result.model_dump_json(indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,217 @@
+import os
+import re
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+from src.models import CodeDiff
+
+# Extensions the agents know how to review
+LANGUAGES = {
+    ".py": "python",
+    ".go": "go",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".java": "java",
+    ".rb": "ruby",
+    ".rs": "rust",
+    ".php": "php",
+    ".c": "c",
+    ".h": "c",
+    ".cc": "cpp",
+    ".cpp": "cpp",
+    ".hpp": "cpp",
+    ".cs": "csharp",
+    ".kt": "kotlin",
+    ".swift": "swift",
+    ".sh": "shell",
+}
+VENDORED_DIRS = {"vendor", "node_modules", "third_party", "bower_components"}
+GENERATED_SUFFIXES = (".min.js", ".pb.go", "_pb2.py", "_pb2_grpc.py", ".gen.go")
+# Headers tools write at the top of generated files
+GENERATED_MARKER = re.compile(
+    r"code generated .* do not edit|@generated|autogenerated", re.IGNORECASE
+)
+MAX_FILE_BYTES = 1_000_000
+
+
+class GitError(Exception):
+    """A git command failed, or the repository or a ref is unusable"""
+
+
+class ChangedFile:
+    def __init__(self, path: str, status: str, old_path: Optional[str] = None):
+        self.path = path
+        # A(dded), M(odified), R(enamed), ... as printed by git diff --name-status
+        self.status = status
+        self.old_path = old_path or path
+
+
+def run_git(repo_path: str, *args: str, input: Optional[bytes] = None) -> bytes:
+    try:
+        result = subprocess.run(
+            ["git", "-C", repo_path, *args],
+            input=input,
+            capture_output=True,
+            check=True,
+        )
+    except FileNotFoundError:
+        raise GitError("git is not installed")
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode(errors="replace").strip()
+        raise GitError(f"git {args[0]} failed: {message}")
+    return result.stdout
+
+
+def resolve_ref(repo_path: str, ref: str) -> str:
+    """Commit id for a ref; refuses option-like refs before they reach git"""
+    if not ref or ref.startswith("-"):
+        raise GitError(f"Invalid ref: {ref!r}")
+    try:
+        output = run_git(
+            repo_path, "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"
+        )
+    except GitError:
+        raise GitError(f"Unknown ref {ref!r} in {repo_path}")
+    return output.decode().strip()
+
+
+def changed_files(repo_path: str, base: str, head: str) -> List[ChangedFile]:
+    """Files that differ between two commits, renames detected"""
+    output = run_git(repo_path, "diff", "--name-status", "-z", "-M", base, head, "--")
+    fields = output.decode(errors="surrogateescape").split("\0")
+    files = []
+    index = 0
+    while index < len(fields) - 1:
+        status = fields[index][0]
+        if status in ("R", "C"):
+            files.append(ChangedFile(fields[index + 2], status, fields[index + 1]))
+            index += 3
+        else:
+            files.append(ChangedFile(fields[index + 1], status))
+            index += 2
+    return files
+
+
+def binary_paths(repo_path: str, base: str, head: str) -> set:
+    """Paths git's own heuristics consider binary (numstat shows - -)"""
+    output = run_git(repo_path, "diff", "--numstat", "-z", "-M", base, head, "--")
+    paths = set()
+    fields = output.decode(errors="surrogateescape").split("\0")
+    index = 0
+    while index < len(fields) - 1:
+        added, deleted, path = fields[index].split("\t", 2)
+        if path:
+            index += 1
+        else:
+            # Renames print "added\tdeleted\t" then the old and new paths
+            path = fields[index + 2]
+            index += 3
+        if added == "-" and deleted == "-":
+            paths.add(path)
+    return paths
+
+
+def read_blobs(repo_path: str, specs: List[str]) -> Dict[str, Optional[bytes]]:
+    """Read "<commit>:<path>" blobs in one git cat-file process; None if missing"""
+    if not specs:
+        return {}
+    requests = "".join(f"{spec}\n" for spec in specs).encode()
+    output = run_git(repo_path, "cat-file", "--batch", input=requests)
+    blobs: Dict[str, Optional[bytes]] = {}
+    position = 0
+    for spec in specs:
+        newline = output.index(b"\n", position)
+        header = output[position:newline].split()
+        position = newline + 1
+        if header[-1] == b"missing" or len(header) != 3:
+            blobs[spec] = None
+            continue
+        size = int(header[2])
+        blobs[spec] = output[position : position + size]
+        position += size + 1
+    return blobs
+
+
+def skip_reason(path: str, data: Optional[bytes] = None) -> Optional[str]:
+    """Why a changed file is not worth an LLM review, or None to review it"""
+    parts = path.split("/")
+    if VENDORED_DIRS.intersection(parts[:-1]):
+        return "vendored"
+    if path.endswith(GENERATED_SUFFIXES):
+        return "generated"
+    if language_for(path) is None:
+        return "unsupported language"
+    if data is not None:
+        if b"\0" in data[:8000]:
+            return "binary"
+        if len(data) > MAX_FILE_BYTES:
+            return "too large"
+        head = data[:2000].decode(errors="replace")
+        if GENERATED_MARKER.search(head):
+            return "generated"
+    return None
+
+
+def language_for(path: str) -> Optional[str]:
+    return LANGUAGES.get(os.path.splitext(path)[1].lower())
+
+
+def load_code_diffs(
+    repo_path: str, base: str, head: str
+) -> Tuple[List[CodeDiff], Dict[str, str]]:
+    """CodeDiffs for every reviewable file changed between base and head.
+
+    Old and new contents come straight from the object store, so the working
+    tree is neither read nor touched. Returns the diffs and, for every file
+    left out, the reason it was skipped.
+    """
+    if not os.path.isdir(repo_path):
+        raise GitError(f"Not a directory: {repo_path}")
+    base_commit = resolve_ref(repo_path, base)
+    head_commit = resolve_ref(repo_path, head)
+    binaries = binary_paths(repo_path, base_commit, head_commit)
+
+    skipped: Dict[str, str] = {}
+    candidates: List[ChangedFile] = []
+    for changed in changed_files(repo_path, base_commit, head_commit):
+        if changed.status == "D":
+            skipped[changed.path] = "deleted"
+        elif changed.path in binaries:
+            skipped[changed.path] = "binary"
+        elif skip_reason(changed.path):
+            skipped[changed.path] = skip_reason(changed.path)
+        else:
+            candidates.append(changed)
+
+    def old_spec(changed: ChangedFile) -> Optional[str]:
+        return None if changed.status == "A" else f"{base_commit}:{changed.old_path}"
+
+    specs = [old_spec(changed) for changed in candidates if old_spec(changed)]
+    specs += [f"{head_commit}:{changed.path}" for changed in candidates]
+    blobs = read_blobs(repo_path, specs)
+
+    code_diffs = []
+    for changed in candidates:
+        old = blobs.get(old_spec(changed)) if old_spec(changed) else b""
+        new = blobs.get(f"{head_commit}:{changed.path}")
+        if new is None:
+            # Submodule pointers and the like have no blob to review
+            reason = "not a file"
+        else:
+            reason = skip_reason(changed.path, new) or skip_reason(changed.path, old)
+        if reason:
+            skipped[changed.path] = reason
+            continue
+        code_diffs.append(
+            CodeDiff(
+                file_path=changed.path,
+                old_code=(old or b"").decode(errors="replace"),
+                new_code=new.decode(errors="replace"),
+                language=language_for(changed.path),
+            )
+        )
+    return code_diffs, skipped
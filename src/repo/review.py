@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from src.models import FileReviewResult, ReviewResult
+from src.services import OrchestratorService
+from .git_source import load_code_diffs
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("critical", "high", "medium", "low")
+
+
+async def review_repository(
+    orchestrator: OrchestratorService,
+    repo_path: str,
+    base: str,
+    head: str,
+    deadline: Optional[float] = None,
+) -> ReviewResult:
+    """Review every changed file between base and head as one batch.
+
+    Files go through review_batch, so their agent calls share the
+    orchestrator's bounded scheduler instead of each file starting its own.
+    Raises GitError when the repository or a ref cannot be read.
+    """
+    code_diffs, skipped = await asyncio.to_thread(
+        load_code_diffs, repo_path, base, head
+    )
+    logger.info(
+        "reviewing %d files of %s %s..%s (%d skipped)",
+        len(code_diffs),
+        repo_path,
+        base,
+        head,
+        len(skipped),
+    )
+    files = await orchestrator.review_batch(code_diffs, deadline) if code_diffs else []
+    return build_review_result(files, skipped)
+
+
+def build_review_result(
+    files: List[FileReviewResult], skipped_files: Dict[str, str]
+) -> ReviewResult:
+    counts = {severity: 0 for severity in SEVERITIES}
+    total = 0
+    for file_result in files:
+        for response in file_result.agent_responses:
+            for finding in response.findings:
+                total += 1
+                if finding.severity in counts:
+                    counts[finding.severity] += 1
+    flagged = sum(
+        1
+        for file_result in files
+        if any(response.findings for response in file_result.agent_responses)
+    )
+    summary = (
+        f"{len(files)} files reviewed, {len(skipped_files)} skipped; "
+        f"{total} findings in {flagged} files ("
+        + ", ".join(f"{counts[severity]} {severity}" for severity in SEVERITIES)
+        + ")"
+    )
+    return ReviewResult(
+        total_findings=total,
+        critical_count=counts["critical"],
+        high_count=counts["high"],
+        medium_count=counts["medium"],
+        low_count=counts["low"],
+        summary=summary,
+        files=files,
+        skipped_files=skipped_files,
+    )
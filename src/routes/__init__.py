@@ -1,3 +1,3 @@
-from .routes import router
+from .routes import router, metrics_router
 
-__all__ = ["router"]
+__all__ = ["router", "metrics_router"]
@@ -0,0 +1,96 @@
+import asyncio
+import bisect
+import itertools
+import math
+import time
+from typing import List, Tuple
+
+from src.metrics import review_stats
+from src.metrics.prometheus import QUEUE_WAIT
+
+# Lower sorts first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class AdmissionRejected(Exception):
+    """The queue is full; the client should come back after retry_after seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"review queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded priority queue in front of the review endpoints.
+
+    At most ``max_active`` reviews run at once and ``max_queued`` more wait,
+    highest priority first. When the queue is full a new request is turned
+    away straight away instead of joining an ever longer line, unless it
+    outranks the lowest-priority waiter, which is then shed in its place.
+    Rejections carry a Retry-After estimate from recent service times.
+    """
+
+    def __init__(self, max_active: int = 8, max_queued: int = 32):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self._active = 0
+        # Sorted (priority, arrival, future); the last entry is shed first
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self._service_time = 10.0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    async def acquire(self, priority: str = "normal") -> float:
+        """Wait for a slot and return the admission time; raises AdmissionRejected"""
+        rank = PRIORITIES.get(priority, PRIORITIES["normal"])
+        if self._active < self.max_active and not self._queue:
+            self._active += 1
+            QUEUE_WAIT.labels("admission").observe(0)
+            return time.perf_counter()
+
+        if len(self._queue) >= self.max_queued:
+            if not self._queue or self._queue[-1][0] <= rank:
+                review_stats.incr("admission_rejected")
+                raise AdmissionRejected(self.retry_after())
+            _, _, shed = self._queue.pop()
+            review_stats.incr("admission_shed")
+            shed.set_exception(AdmissionRejected(self.retry_after()))
+
+        entry = (rank, next(self._arrivals), asyncio.get_running_loop().create_future())
+        bisect.insort(self._queue, entry)
+        queued_at = time.perf_counter()
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].done() and not entry[2].cancelled():
+                # Admitted just as the client went away
+                self.release(0.0)
+            elif entry in self._queue:
+                self._queue.remove(entry)
+            raise
+        admitted_at = time.perf_counter()
+        QUEUE_WAIT.labels("admission").observe(admitted_at - queued_at)
+        return admitted_at
+
+    def release(self, admitted_at: float) -> None:
+        if admitted_at:
+            elapsed = time.perf_counter() - admitted_at
+            self._service_time += (elapsed - self._service_time) * 0.2
+        self._active -= 1
+        while self._queue and self._active < self.max_active:
+            _, _, future = self._queue.pop(0)
+            if not future.done():
+                self._active += 1
+                future.set_result(None)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the average review time"""
+        waves = (len(self._queue) + 1) / self.max_active
+        return max(1, math.ceil(self._service_time * waves))
@@ -1,35 +1,282 @@
-from fastapi import APIRouter
-from src.models import CodeDiff, AgentFinding, AgentResponse, AgentConfig
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from src.models import (
+    CodeDiff,
+    AgentFinding,
+    AgentResponse,
+    AgentConfig,
+    FileReviewResult,
+    RepoReviewRequest,
+    ReviewJob,
+    ReviewResult,
+)
 from src.agents import BaseAgent
-from typing import List
-from src.services import OrchestratorService
-from src.clients.ollama_client import get_llm_client
+from typing import AsyncIterator, Awaitable, List, Optional, TypeVar
+from src.services import REVIEW_MODES, OrchestratorService
+from src.clients import OllamaPoolClient
+from src.metrics import review_stats
+from src.metrics.prometheus import REVIEWS_ABORTED
+from src.repo import GitError, review_repository
+from .admission import AdmissionRejected
 from datetime import timedelta
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import asyncio
+import logging
+import os
 import time
 
 router = APIRouter(prefix="/code")
+# Served at the root, where Prometheus scrapes by default
+metrics_router = APIRouter()
 
-llm_client = get_llm_client(model_name="llama3.2:latest")
+logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-@router.post("/review", response_model=List[AgentResponse])
-def review_code(code_diff: CodeDiff):
-    print("starting review timer")
+
+def get_orchestrator(request: Request) -> OrchestratorService:
+    """The orchestrator built at startup by the app lifespan"""
+    return request.app.state.orchestrator
+
+
+async def admit_review(request: Request, x_review_priority: str = Header("normal")):
+    """Hold an admission slot for the whole request, or answer 429 when full"""
+    admission = request.app.state.admission
+    try:
+        admitted_at = await admission.acquire(x_review_priority)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    try:
+        yield
+    finally:
+        admission.release(admitted_at)
+
+
+# Overrides review_mode from the config file when set
+REVIEW_MODE_OVERRIDE = os.getenv("REVIEW_MODE")
+
+
+def resolve_mode(request: Request, mode: Optional[str]) -> str:
+    mode = mode or REVIEW_MODE_OVERRIDE or request.app.state.settings.review_mode
+    if mode not in REVIEW_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown review mode: {mode}")
+    return mode
+
+
+# Seconds a review may take unless X-Review-Timeout says otherwise; 0 = no limit
+REVIEW_TIMEOUT = float(os.getenv("REVIEW_TIMEOUT", "0"))
+# How often a waiting review checks that its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+def review_deadline(
+    x_review_timeout: Optional[float] = Header(None),
+) -> Optional[float]:
+    """time.monotonic() deadline for the review, counted from admission"""
+    timeout = REVIEW_TIMEOUT if x_review_timeout is None else x_review_timeout
+    if timeout <= 0:
+        return None
+    return time.monotonic() + timeout
+
+
+async def cancel_on_disconnect(request: Request, review: Awaitable[T]) -> T:
+    """Await a review, cancelling it and its Ollama calls if the client leaves"""
+    task = asyncio.ensure_future(review)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                review_stats.incr("reviews_cancelled")
+                REVIEWS_ABORTED.labels("disconnect").inc()
+                logger.info("client left %s, review cancelled", request.url.path)
+                # Nobody reads this; 499 is the usual "client closed request"
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        task.cancel()
+
+
+async def stream_until_disconnect(
+    request: Request, events: AsyncIterator[T]
+) -> AsyncIterator[T]:
+    """Relay events, stopping the review and its Ollama calls if the client leaves"""
+    iterator = events.__aiter__()
+    next_event: Optional[asyncio.Future] = None
+    try:
+        while True:
+            next_event = asyncio.ensure_future(iterator.__anext__())
+            while not next_event.done():
+                await asyncio.wait({next_event}, timeout=DISCONNECT_POLL_SECONDS)
+                if not next_event.done() and await request.is_disconnected():
+                    review_stats.incr("reviews_cancelled")
+                    REVIEWS_ABORTED.labels("disconnect").inc()
+                    logger.info("client left %s, review cancelled", request.url.path)
+                    return
+            try:
+                event = next_event.result()
+            except StopAsyncIteration:
+                return
+            yield event
+    finally:
+        if next_event is not None and not next_event.done():
+            next_event.cancel()
+            await asyncio.wait({next_event})
+        await iterator.aclose()
+
+
+@router.post("/review", response_model=List[AgentResponse], dependencies=[Depends(admit_review)])
+async def review_code(
+    code_diff: CodeDiff,
+    request: Request,
+    mode: Optional[str] = None,
+    deadline: Optional[float] = Depends(review_deadline),
+    orchestrator_service: OrchestratorService = Depends(get_orchestrator),
+):
+    """Agent responses for the diff; any past the deadline are marked timed_out"""
     start_time = time.perf_counter()
-    agent_configs: List[AgentConfig] = [
-        AgentConfig(
-            agent_name="security_agent", agent_class="security", temperature=0.1
-        ),
-        AgentConfig(agent_name="quality_agent", agent_class="quality", temperature=0.3),
-    ]
-
-    # call the orchestrator service
-    orchestrator_service = OrchestratorService(
-        llm_client=llm_client, agent_configs=agent_configs, max_workers=5
+
+    mode = resolve_mode(request, mode)
+    responses = await cancel_on_disconnect(
+        request,
+        orchestrator_service.review(code_diff=code_diff, mode=mode, deadline=deadline),
     )
-    responses = orchestrator_service.review_parallel(code_diff=code_diff)
     end_time = time.perf_counter()
     duration = timedelta(seconds=end_time - start_time)
-    print("duration is ", duration)
+    logger.info("review of %s (%s) took %s", code_diff.file_path, mode, duration)
 
     return responses
+
+
+@router.post("/review/stream", dependencies=[Depends(admit_review)])
+async def review_code_stream(
+    code_diff: CodeDiff,
+    request: Request,
+    deadline: Optional[float] = Depends(review_deadline),
+    orchestrator_service: OrchestratorService = Depends(get_orchestrator),
+):
+    """Stream review events as NDJSON, one line per finding or agent response"""
+
+    async def event_lines():
+        events = orchestrator_service.review_stream(code_diff, deadline)
+        async for event in stream_until_disconnect(request, events):
+            yield event.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
+
+
+@router.post("/review/batch", response_model=List[FileReviewResult], dependencies=[Depends(admit_review)])
+async def review_code_batch(
+    code_diffs: List[CodeDiff],
+    request: Request,
+    deadline: Optional[float] = Depends(review_deadline),
+    orchestrator_service: OrchestratorService = Depends(get_orchestrator),
+):
+    """Review every file of a PR in one call, grouped by file"""
+    start_time = time.perf_counter()
+    results = await cancel_on_disconnect(
+        request, orchestrator_service.review_batch(code_diffs, deadline)
+    )
+    duration = timedelta(seconds=time.perf_counter() - start_time)
+    logger.info("batch of %d files took %s", len(code_diffs), duration)
+    return results
+
+
+# /review/repo only reads repositories under this directory, and is off
+# while it is unset, since a repo_path can name any directory on the host
+REPO_ROOT = os.getenv("REVIEW_REPO_ROOT")
+
+
+@router.post("/review/repo", response_model=ReviewResult, dependencies=[Depends(admit_review)])
+async def review_repo(
+    repo_request: RepoReviewRequest,
+    request: Request,
+    deadline: Optional[float] = Depends(review_deadline),
+    orchestrator_service: OrchestratorService = Depends(get_orchestrator),
+):
+    """Review every file changed between two refs of a local repository"""
+    if not REPO_ROOT:
+        raise HTTPException(
+            status_code=403,
+            detail="Repository reviews are disabled; set REVIEW_REPO_ROOT",
+        )
+    repo_path = os.path.realpath(repo_request.repo_path)
+    root = os.path.realpath(REPO_ROOT)
+    if os.path.commonpath([repo_path, root]) != root:
+        raise HTTPException(
+            status_code=403, detail="Repository is outside REVIEW_REPO_ROOT"
+        )
+    start_time = time.perf_counter()
+    try:
+        result = await cancel_on_disconnect(
+            request,
+            review_repository(
+                orchestrator_service,
+                repo_path,
+                repo_request.base,
+                repo_request.head,
+                deadline,
+            ),
+        )
+    except GitError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    duration = timedelta(seconds=time.perf_counter() - start_time)
+    logger.info("review of %s took %s: %s", repo_path, duration, result.summary)
+    return result
+
+
+@router.post("/review/jobs", response_model=ReviewJob, status_code=202)
+async def submit_review_job(
+    code_diff: CodeDiff, request: Request, mode: Optional[str] = None
+):
+    """Queue a review and return its job id without waiting for the result"""
+    mode = resolve_mode(request, mode)
+    job = await asyncio.to_thread(request.app.state.job_store.create, code_diff, mode)
+    request.app.state.job_worker.notify()
+    return job
+
+
+@router.get("/review/jobs/{job_id}", response_model=ReviewJob)
+async def get_review_job(job_id: str, request: Request):
+    """Job status, with the agent responses finished so far"""
+    job = await asyncio.to_thread(request.app.state.job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@router.get("/stats")
+def review_statistics(request: Request):
+    """Process-wide counters: cache hits, repairs, generations saved"""
+    admission = request.app.state.admission
+    limiter = request.app.state.orchestrator.llm_client.limiter
+    return {
+        **review_stats.snapshot(),
+        "admission_active": admission.active,
+        "admission_queued": admission.queued,
+        "llm_concurrency_limit": limiter.limit,
+        "llm_in_flight": limiter.in_flight,
+        "llm_queued": limiter.queued,
+    }
+
+
+@router.get("/ready")
+def readiness(request: Request):
+    """200 once every configured model is loaded, 503 while warming up"""
+    model_status = request.app.state.model_status
+    ready = all(status == "ready" for status in model_status.values())
+    content = {"ready": ready, "models": model_status}
+    llm_client = request.app.state.orchestrator.llm_client
+    if isinstance(llm_client, OllamaPoolClient):
+        content["hosts"] = llm_client.host_status()
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
+
+@metrics_router.get("/metrics")
+def prometheus_metrics():
+    """Prometheus exposition of latency histograms, Ollama timings and counters"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,3 +1,17 @@
-from .services import OrchestratorService
+from .services import REVIEW_MODES, OrchestratorService
+from .planner import DEFAULT_AGENT_RULES, AgentPlan, AgentPlanner
+from .scheduler import ReviewScheduler
+from .sharding import Shard, split_into_shards
+from .singleflight import SingleFlight
 
-__all__ = ["OrchestratorService"]
+__all__ = [
+    "DEFAULT_AGENT_RULES",
+    "AgentPlan",
+    "AgentPlanner",
+    "REVIEW_MODES",
+    "OrchestratorService",
+    "ReviewScheduler",
+    "Shard",
+    "split_into_shards",
+    "SingleFlight",
+]
@@ -0,0 +1,30 @@
+from typing import Iterable
+
+from src.agents.prescan import PrescanResult
+from src.models import AgentFinding
+
+# Risk of a finding is its severity weight times its confidence, in [0, 1]
+SEVERITY_WEIGHTS = {"critical": 1.0, "high": 0.75, "medium": 0.5, "low": 0.25}
+# Prescan found nothing definite but the change touches risky constructs
+UNCERTAIN_RISK = 0.5
+# How fast the full-review latency estimate follows new samples
+LATENCY_SMOOTHING = 0.2
+
+
+def risk_score(findings: Iterable[AgentFinding]) -> float:
+    """Risk of a diff from triage findings: its riskiest finding's score"""
+    return max(
+        (
+            SEVERITY_WEIGHTS.get(finding.severity, 0.25) * finding.confidence
+            for finding in findings
+        ),
+        default=0.0,
+    )
+
+
+def prescan_risk(prescan: PrescanResult) -> float:
+    if prescan.skip_llm:
+        return 0.0
+    if prescan.findings:
+        return max(risk_score(prescan.findings), UNCERTAIN_RISK)
+    return UNCERTAIN_RISK
@@ -0,0 +1,158 @@
+import difflib
+import fnmatch
+import logging
+import os
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from src.agents.prescan import SKIPPED_FILE_NAMES, is_layout_only
+from src.metrics import review_stats
+from src.metrics.prometheus import AGENTS_SKIPPED
+from src.models import AgentConfig, AgentResponse, AgentRule, CodeDiff
+
+logger = logging.getLogger(__name__)
+
+# Markers code generators put in the first lines of their output: the
+# @generated tag and the "Code generated ... DO NOT EDIT." comment line. A
+# bare "do not edit" also heads hand-written files, so it is not enough.
+GENERATED_MARKER = re.compile(
+    r"@generated|^\W*Code generated .* DO NOT EDIT\b", re.MULTILINE
+)
+GENERATED_HEADER_LINES = 5
+# Lines this long mostly come out of minifiers and bundlers
+MINIFIED_LINE_LENGTH = 500
+
+DEFAULT_AGENT_RULES = [
+    AgentRule(reason="lockfile", file_patterns=sorted(SKIPPED_FILE_NAMES) + ["*.lock"]),
+    AgentRule(
+        reason="documentation",
+        # Not "*.txt": requirements.txt and constraints.txt pin dependencies
+        file_patterns=["*.md", "*.markdown", "*.rst", "*.adoc"],
+    ),
+    AgentRule(
+        reason="generated code",
+        file_patterns=["*_pb2.py", "*.pb.go", "*.generated.*", "*.min.js", "*.min.css"],
+    ),
+    AgentRule(reason="generated code", shape="generated"),
+    # Long lines can be hand-written data or a payload, so security still looks
+    AgentRule(reason="minified code", skip=["quality"], shape="minified"),
+    AgentRule(reason="data file", file_patterns=["*.csv", "*.tsv", "*.svg", "*.snap"]),
+    # Configuration can still leak secrets, so only security reads it
+    AgentRule(
+        reason="configuration file",
+        skip=["quality"],
+        file_patterns=["*.json", "*.yaml", "*.yml", "*.toml", "*.ini", "*.cfg"],
+    ),
+    AgentRule(reason="whitespace-only change", shape="whitespace_only"),
+    # Removed code has no style to review, but removing a check can be a hole
+    AgentRule(reason="only deletions", skip=["quality"], shape="deletions_only"),
+]
+
+
+def is_generated(code_diff: CodeDiff) -> bool:
+    header = "\n".join(code_diff.new_code.splitlines()[:GENERATED_HEADER_LINES])
+    return bool(GENERATED_MARKER.search(header))
+
+
+def is_minified(code_diff: CodeDiff) -> bool:
+    return any(
+        len(line) > MINIFIED_LINE_LENGTH for line in code_diff.new_code.splitlines()
+    )
+
+
+def is_deletions_only(code_diff: CodeDiff) -> bool:
+    opcodes = difflib.SequenceMatcher(
+        None,
+        code_diff.old_code.splitlines(),
+        code_diff.new_code.splitlines(),
+        autojunk=False,
+    ).get_opcodes()
+    tags = {tag for tag, *_ in opcodes}
+    return "delete" in tags and not tags & {"insert", "replace"}
+
+
+DIFF_SHAPES: Dict[str, Callable[[CodeDiff], bool]] = {
+    "generated": is_generated,
+    "minified": is_minified,
+    # Re-indenting is not whitespace-only where indentation is syntax
+    "whitespace_only": is_layout_only,
+    "deletions_only": is_deletions_only,
+}
+
+
+class AgentPlan(NamedTuple):
+    # Agents to run, in configuration order
+    agent_configs: List[AgentConfig]
+    # Agents left out: agent_name -> reason
+    skipped: Dict[str, str]
+
+
+class AgentPlanner:
+    """Decides per diff which configured agents are worth running.
+
+    Rules are checked in order; an agent is skipped by the first rule that
+    matches the diff and names its class or agent name (or "*"). Path and
+    language checks are cheap and come first, so a diff is only compared
+    line by line when a shape rule is still in play.
+    """
+
+    def __init__(self, rules: Optional[List[AgentRule]] = None):
+        self.rules = DEFAULT_AGENT_RULES if rules is None else rules
+        for rule in self.rules:
+            if rule.shape is not None and rule.shape not in DIFF_SHAPES:
+                raise ValueError(f"Unknown diff shape in agent rule: {rule.shape}")
+
+    def plan(self, code_diff: CodeDiff, agent_configs: List[AgentConfig]) -> AgentPlan:
+        skipped: Dict[str, str] = {}
+        for rule in self.rules:
+            targets = [
+                config
+                for config in agent_configs
+                if config.agent_name not in skipped and _names(rule, config)
+            ]
+            if targets and _matches(rule, code_diff):
+                for config in targets:
+                    skipped[config.agent_name] = rule.reason
+        for agent_name, reason in skipped.items():
+            review_stats.incr("agents_skipped")
+            AGENTS_SKIPPED.labels(agent_name, reason).inc()
+        if skipped:
+            logger.info("%s: skipping %s", code_diff.file_path, skipped)
+        return AgentPlan(
+            [config for config in agent_configs if config.agent_name not in skipped],
+            skipped,
+        )
+
+
+def _names(rule: AgentRule, config: AgentConfig) -> bool:
+    return any(
+        name in ("*", config.agent_class, config.agent_name) for name in rule.skip
+    )
+
+
+def _matches(rule: AgentRule, code_diff: CodeDiff) -> bool:
+    if rule.file_patterns:
+        path = code_diff.file_path.lower()
+        base_name = os.path.basename(path)
+        if not any(
+            fnmatch.fnmatch(path, pattern.lower())
+            or fnmatch.fnmatch(base_name, pattern.lower())
+            for pattern in rule.file_patterns
+        ):
+            return False
+    if rule.languages and code_diff.language.lower() not in {
+        language.lower() for language in rule.languages
+    }:
+        return False
+    return rule.shape is None or DIFF_SHAPES[rule.shape](code_diff)
+
+
+def skipped_response(agent_name: str, reason: str) -> AgentResponse:
+    return AgentResponse(
+        agent_name=agent_name,
+        findings=[],
+        execution_time=0,
+        llm_skipped=True,
+        skip_reason=reason,
+        status="skipped",
+    )
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Set
+
+from src.metrics.prometheus import QUEUE_WAIT
+
+
+class _Batch:
+    def __init__(self, tasks):
+        self.pending: Deque = deque(tasks)
+        self.running: Set[asyncio.Task] = set()
+        self.submitted_at = time.perf_counter()
+
+
+class ReviewScheduler:
+    """Process-wide bounded scheduler for (file, agent) review tasks.
+
+    At most ``max_concurrency`` tasks run at once across every caller, which
+    keeps the Ollama backend steadily busy without overloading it. Free slots
+    are handed out round-robin across the submitted batches, so one large PR
+    cannot starve a single-file review that arrives behind it.
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        self.max_concurrency = max_concurrency
+        self._batches: Deque[_Batch] = deque()
+        self._running = 0
+
+    async def run_batch(
+        self, factories: List[Callable[[], Awaitable]]
+    ) -> List:
+        """Run every factory through the scheduler.
+
+        Returns one entry per factory, in order: the result, or the exception
+        the task raised.
+        """
+        if not factories:
+            return []
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in factories]
+        batch = _Batch(zip(factories, futures))
+        self._batches.append(batch)
+        self._dispatch()
+        try:
+            return await asyncio.gather(*futures, return_exceptions=True)
+        finally:
+            # The caller went away: drop queued work and stop what is running
+            if batch.pending:
+                batch.pending.clear()
+                if batch in self._batches:
+                    self._batches.remove(batch)
+            for task in batch.running:
+                task.cancel()
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrency and self._batches:
+            batch = self._batches.popleft()
+            factory, future = batch.pending.popleft()
+            if batch.pending:
+                self._batches.append(batch)
+            if future.done():
+                continue
+            QUEUE_WAIT.labels("scheduler").observe(
+                time.perf_counter() - batch.submitted_at
+            )
+            self._running += 1
+            task = asyncio.create_task(factory())
+            batch.running.add(task)
+            task.add_done_callback(
+                lambda t, b=batch, f=future: self._on_done(t, b, f)
+            )
+
+    def _on_done(self, task: asyncio.Task, batch: _Batch, future: asyncio.Future) -> None:
+        self._running -= 1
+        batch.running.discard(task)
+        if not future.done():
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        self._dispatch()
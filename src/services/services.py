@@ -1,69 +1,962 @@
 from src.clients import OllamaClient
-from src.models import AgentConfig, CodeDiff, AgentResponse
-from typing import List, Dict
-from src.agents.registry import create_agent
-from concurrent.futures import ThreadPoolExecutor, as_completed, Future
+from src.models import (
+    AgentConfig,
+    CodeDiff,
+    AgentResponse,
+    AgentFinding,
+    FileReviewResult,
+    ReviewStreamEvent,
+)
+from src.cache import NearDuplicateIndex, ReviewCache
+from src.metrics import review_stats
+from src.metrics.prometheus import (
+    AGENT_LATENCY,
+    CASCADE_PATHS,
+    CASCADE_SECONDS_SAVED,
+    REVIEWS_ABORTED,
+)
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional, Tuple
+from src.agents import BaseAgent, FusedReviewAgent
+from src.agents.registry import (
+    create_agent,
+    create_fused_agent,
+    create_triage_agent,
+    pin_context_sizes,
+)
+from pydantic import TypeAdapter
+from .cascade import LATENCY_SMOOTHING, prescan_risk, risk_score
+from .planner import AgentPlan, AgentPlanner, skipped_response
+from .scheduler import ReviewScheduler
+from .sharding import Shard, merge_shard_responses, split_into_shards
+from .singleflight import SingleFlight
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+import asyncio
+import logging
 import time
 from datetime import datetime
 
+_response_list = TypeAdapter(List[AgentResponse])
+
+logger = logging.getLogger(__name__)
+
+# separate, fused and cascade run on the event loop; sequential and parallel
+# are the original thread-based paths, kept reachable for benchmarks
+REVIEW_MODES = ("separate", "fused", "cascade", "sequential", "parallel")
+
+
+class DeadlineExceeded(Exception):
+    """The review's deadline passed before this task finished"""
+
 
 class OrchestratorService:
 
-    def __init__(self, llm_client, agent_configs: List[AgentConfig], max_workers: int):
+    def __init__(
+        self,
+        llm_client,
+        agent_configs: List[AgentConfig],
+        max_workers: int,
+        cache: Optional[ReviewCache] = None,
+        scheduler: Optional[ReviewScheduler] = None,
+        shard_max_lines: int = 0,
+        near_duplicates: Optional[NearDuplicateIndex] = None,
+        planner: Optional[AgentPlanner] = None,
+    ):
         self.agent_configs = agent_configs
         self.llm_client = llm_client
         self.max_workers = max_workers or len(agent_configs)
+        self.cache = cache
+        self.scheduler = scheduler
+        self.shard_max_lines = shard_max_lines
+        # Reuses findings for code that barely differs from code already reviewed
+        self.near_duplicates = near_duplicates
+        # Leaves agents out of diffs they have nothing to say about
+        self.planner = planner
+        # Agents and their prompts are built once and reused by every review
+        self.agents: Dict[str, BaseAgent] = {
+            config.agent_name: create_agent(llm_client=llm_client, agent_config=config)
+            for config in agent_configs
+        }
+        # Fused agents per set of member agents the planner kept
+        self._fused_agents: Dict[Tuple[str, ...], FusedReviewAgent] = {}
+        self.triage_agents: Dict[str, BaseAgent] = {
+            config.agent_name: create_triage_agent(llm_client, config)
+            for config in agent_configs
+            if config.triage_model_name
+        }
+        # num_ctx per model, shared by every agent on it so none reloads it
+        self.context_sizes = pin_context_sizes(
+            list(self.agents.values()) + list(self.triage_agents.values())
+        )
+        # Smoothed generation time per (agent, model), for cascade savings
+        self._generation_seconds: Dict[Tuple[str, str], float] = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        # Concurrent identical reviews, keyed like the cache, share one generation
+        self.inflight = SingleFlight()
+
+    def close(self) -> None:
+        """Release the worker threads; call once when the app shuts down"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def prefix_agents(self, mode: str) -> List[BaseAgent]:
+        """Agents whose system prompts a review in this mode sends to Ollama"""
+        if mode == "fused":
+            return [self._get_fused_agent()]
+        agents = list(self.agents.values())
+        if mode == "cascade":
+            agents += list(self.triage_agents.values())
+        return agents
+
+    def _get_agent(self, agent_config: AgentConfig) -> BaseAgent:
+        return self.agents[agent_config.agent_name]
+
+    def _get_fused_agent(
+        self, agent_configs: Optional[List[AgentConfig]] = None
+    ) -> FusedReviewAgent:
+        agent_configs = agent_configs or self.agent_configs
+        key = tuple(config.agent_name for config in agent_configs)
+        if key not in self._fused_agents:
+            fused_agent = create_fused_agent(self.llm_client, agent_configs)
+            fused_agent.num_ctx = self.context_sizes[fused_agent.model_name]
+            self._fused_agents[key] = fused_agent
+        return self._fused_agents[key]
+
+    def _plan(self, code_diff: CodeDiff) -> AgentPlan:
+        """The agents to run on this diff, and those skipped with the reason"""
+        if self.planner is None:
+            return AgentPlan(self.agent_configs, {})
+        return self.planner.plan(code_diff, self.agent_configs)
 
-    def review_sequential(self, code_diff: CodeDiff) -> List[AgentResponse]:
+    def _with_skipped(
+        self, responses: List[AgentResponse], skipped: Dict[str, str]
+    ) -> List[AgentResponse]:
+        """Responses plus one per skipped agent, in agent order"""
+        if not skipped:
+            return responses
+        responses = responses + [
+            skipped_response(agent_name, reason)
+            for agent_name, reason in skipped.items()
+        ]
+        order = {config.agent_name: i for i, config in enumerate(self.agent_configs)}
+        return sorted(responses, key=lambda response: order[response.agent_name])
+
+    def _shard(self, code_diff: CodeDiff) -> List[Shard]:
+        """The parts of a file to review; one whole-file shard unless it is large"""
+        shards = split_into_shards(code_diff, self.shard_max_lines)
+        if _is_sharded(code_diff, shards):
+            review_stats.incr("sharded_files")
+            logger.info("%s reviewed in %d shards", code_diff.file_path, len(shards))
+        return shards
+
+    def _merge_shards(
+        self, parts: Dict[str, List[Tuple[Shard, AgentResponse]]]
+    ) -> List[AgentResponse]:
+        """Per-agent shard responses merged into file responses, in agent order"""
+        return [
+            merge_shard_responses(parts[config.agent_name])
+            for config in self.agent_configs
+            if parts.get(config.agent_name)
+        ]
+
+    def review_sequential(
+        self,
+        code_diff: CodeDiff,
+        deadline: Optional[float] = None,
+        agent_configs: Optional[List[AgentConfig]] = None,
+    ) -> List[AgentResponse]:
         responses: List[AgentResponse] = []
-        for agent_config in self.agent_configs:
+        for agent_config in agent_configs or self.agent_configs:
+            if deadline is not None and _remaining(deadline) <= 0:
+                responses.append(_timed_out(agent_config.agent_name, time.time()))
+                continue
             agent_response = self._run_single_agent(
                 agent_config=agent_config, code_diff=code_diff
             )
             responses.append(agent_response)
         return responses
 
-    def review_parallel(self, code_diff: CodeDiff) -> List[AgentResponse]:
-        """Run agents in parallel using ThreadPoolExecutor"""
+    def review_parallel(
+        self,
+        code_diff: CodeDiff,
+        deadline: Optional[float] = None,
+        agent_configs: Optional[List[AgentConfig]] = None,
+    ) -> List[AgentResponse]:
+        """Run agents in parallel using ThreadPoolExecutor.
+
+        At the deadline, agents still queued are cancelled and agents still
+        running are reported as timed out; a blocking Ollama call cannot be
+        interrupted from here, so its result is dropped when it arrives.
+        """
+        start = time.time()
         responses: List[AgentResponse] = []
 
-        # Create a thread pool
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Map each Future to its corresponding AgentConfig
-            future_to_agent: Dict[Future, AgentConfig] = {}
+        # Map each Future to its corresponding AgentConfig
+        future_to_agent: Dict[Future, AgentConfig] = {}
+
+        # Submit all tasks to the long-lived worker pool
+        for agent_config in agent_configs or self.agent_configs:
+            # add the futurue to the future to agent map
+            future = self._executor.submit(
+                self._run_single_agent, agent_config, code_diff
+            )
+            future_to_agent[future] = agent_config
+
+        timeout = None if deadline is None else _remaining(deadline)
+        done, _ = wait(future_to_agent, timeout=timeout)
+        for future, agent_config in future_to_agent.items():
+            if future not in done:
+                future.cancel()
+                responses.append(_timed_out(agent_config.agent_name, start))
+                continue
+            try:
+                response = future.result()
+                responses.append(response)
+                logger.debug("✓ %s completed", agent_config.agent_name)
+            except Exception as e:
+                logger.warning("✗ %s failed: %s", agent_config.agent_name, e)
+                # Optionally add error handling or fallback
+
+        return responses
+
+    async def review_async(
+        self,
+        code_diff: CodeDiff,
+        on_response: Optional[Callable[[AgentResponse], Awaitable[None]]] = None,
+        deadline: Optional[float] = None,
+        agent_configs: Optional[List[AgentConfig]] = None,
+    ) -> List[AgentResponse]:
+        """Run agents concurrently on the event loop with asyncio.gather.
+
+        on_response, when given, is awaited with each agent's response as
+        soon as that agent finishes. Agents not done by the deadline are
+        cancelled and come back with status "timed_out". agent_configs
+        narrows the review to some of the configured agents.
+        """
+        start = time.time()
+        agent_configs = agent_configs or self.agent_configs
+
+        async def run(agent_config: AgentConfig) -> AgentResponse:
+            response = await self._run_single_agent_async(agent_config, code_diff)
+            if on_response is not None:
+                await on_response(response)
+            return response
+
+        results = await self._run_tasks(
+            [lambda config=agent_config: run(config) for agent_config in agent_configs],
+            deadline,
+        )
+
+        responses: List[AgentResponse] = []
+        for agent_config, result in zip(agent_configs, results):
+            if isinstance(result, DeadlineExceeded):
+                responses.append(_timed_out(agent_config.agent_name, start))
+                continue
+            if isinstance(result, BaseException):
+                logger.warning("✗ %s failed: %s", agent_config.agent_name, result)
+                continue
+            responses.append(result)
+            logger.debug("✓ %s completed", agent_config.agent_name)
+        return responses
+
+    async def review_stream(
+        self, code_diff: CodeDiff, deadline: Optional[float] = None
+    ) -> AsyncIterator[ReviewStreamEvent]:
+        """Yield findings and agent responses as soon as each one is ready.
+
+        A large file's shards stream side by side; each agent's response is
+        sent once all of its shards are done. Agents not done by the
+        deadline are cancelled and sent with status "timed_out".
+        """
+        start = time.time()
+        queue: asyncio.Queue = asyncio.Queue()
+        agent_configs, skipped = self._plan(code_diff)
+        for agent_name, reason in skipped.items():
+            yield ReviewStreamEvent(
+                event="agent_response",
+                agent_name=agent_name,
+                response=skipped_response(agent_name, reason),
+            )
+        if not agent_configs:
+            yield ReviewStreamEvent(event="done")
+            return
+        shards = self._shard(code_diff)
+        parts: Dict[str, List[Tuple[Shard, AgentResponse]]] = {}
+        remaining = {config.agent_name: len(shards) for config in agent_configs}
+
+        async def run(agent_config: AgentConfig, shard: Shard) -> None:
+            async def on_finding(finding: AgentFinding) -> None:
+                await queue.put(
+                    ReviewStreamEvent(
+                        event="finding",
+                        agent_name=agent_config.agent_name,
+                        finding=shard.to_file_finding(finding),
+                    )
+                )
+
+            agent_name = agent_config.agent_name
+            try:
+                response = await self._run_single_agent_stream(
+                    agent_config, shard.code_diff, on_finding
+                )
+                parts.setdefault(agent_name, []).append((shard, response))
+                logger.debug("✓ %s completed", agent_name)
+            except Exception as e:
+                logger.warning("✗ %s failed: %s", agent_name, e)
+                await queue.put(
+                    ReviewStreamEvent(
+                        event="error", agent_name=agent_name, error=str(e)
+                    )
+                )
+            remaining[agent_name] -= 1
+            if remaining[agent_name] == 0 and parts.get(agent_name):
+                await queue.put(
+                    ReviewStreamEvent(
+                        event="agent_response",
+                        agent_name=agent_name,
+                        response=merge_shard_responses(parts[agent_name]),
+                    )
+                )
+
+        all_done = asyncio.ensure_future(
+            self._run_tasks(
+                [
+                    lambda config=config, shard=shard: run(config, shard)
+                    for config in agent_configs
+                    for shard in shards
+                ],
+                deadline,
+            )
+        )
+        all_done.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            # Failed shards count down too, so only cancelled agents are left
+            timed_out = [
+                _timed_out(agent_name, start)
+                for agent_name, left in remaining.items()
+                if left > 0
+            ]
+            _record_timeouts(timed_out)
+            for response in timed_out:
+                yield ReviewStreamEvent(
+                    event="agent_response",
+                    agent_name=response.agent_name,
+                    response=response,
+                )
+            yield ReviewStreamEvent(event="done")
+        finally:
+            # Stop generating if the consumer went away early
+            all_done.cancel()
+
+    def review_fused(self, code_diff: CodeDiff) -> List[AgentResponse]:
+        """Run every agent in a single LLM call and split the result per agent"""
+        start = time.time()
+        fused_agent = self._get_fused_agent()
+        cache_key, responses = self._lookup_fused_cache(fused_agent, code_diff, start)
+        if responses is not None:
+            return responses
+
+        def generate() -> List[AgentResponse]:
+            responses = fused_agent.analyze_all(code_diff=code_diff)
+            self._store_fused_cache(cache_key, responses)
+            return responses
+
+        responses, callers = self.inflight.run_sync(cache_key, generate)
+        logger.info("fused review FINISHED (%.2fs)", time.time() - start)
+        return [_served(response, callers) for response in responses]
+
+    async def review_fused_async(
+        self,
+        code_diff: CodeDiff,
+        deadline: Optional[float] = None,
+        agent_configs: Optional[List[AgentConfig]] = None,
+    ) -> List[AgentResponse]:
+        """Async counterpart of review_fused, run through the scheduler"""
+        start = time.time()
+        agent_configs = agent_configs or self.agent_configs
+        fused_agent = self._get_fused_agent(agent_configs)
+        cache_key, responses = await asyncio.to_thread(
+            self._lookup_fused_cache, fused_agent, code_diff, start
+        )
+        if responses is not None:
+            return responses
+
+        async def generate() -> List[AgentResponse]:
+            (result,) = await self._run_tasks(
+                [lambda: fused_agent.analyze_all_async(code_diff=code_diff)]
+            )
+            if isinstance(result, BaseException):
+                raise result
+            await asyncio.to_thread(self._store_fused_cache, cache_key, result)
+            return result
+
+        try:
+            responses, callers = await _until(
+                deadline, self.inflight.run(cache_key, generate)
+            )
+        except DeadlineExceeded:
+            # One call answers for every agent, so all of them ran out of time
+            return [_timed_out(config.agent_name, start) for config in agent_configs]
+        except Exception as e:
+            logger.warning("✗ fused review failed: %s", e)
+            return []
+        logger.info("fused review FINISHED (%.2fs)", time.time() - start)
+        return [_served(response, callers) for response in responses]
+
+    async def review(
+        self,
+        code_diff: CodeDiff,
+        mode: str = "separate",
+        on_response: Optional[Callable[[AgentResponse], Awaitable[None]]] = None,
+        deadline: Optional[float] = None,
+    ) -> List[AgentResponse]:
+        """Review one diff in the given mode (one of REVIEW_MODES).
+
+        on_response is awaited per agent in separate mode and with each
+        response once the review finishes in the others. Files longer than
+        shard_max_lines are reviewed shard by shard, all shards at once, and
+        each agent's findings are merged back into one response.
+
+        deadline is a time.monotonic() value. Agents still generating then
+        are cancelled, which aborts their Ollama requests, and are returned
+        with status "timed_out" next to the responses that made it in time.
+        Agents the planner leaves out come back with status "skipped".
+        """
+        agent_configs, skipped = self._plan(code_diff)
+        if on_response is not None:
+            for agent_name, reason in skipped.items():
+                await on_response(skipped_response(agent_name, reason))
+        if not agent_configs:
+            return self._with_skipped([], skipped)
+
+        shards = self._shard(code_diff)
+        if not _is_sharded(code_diff, shards):
+            responses = await self._review_whole(
+                code_diff, mode, on_response, deadline, agent_configs
+            )
+            _record_timeouts(responses)
+            return self._with_skipped(responses, skipped)
 
-            # Submit all  tasks to the worker thread
-            for agent_config in self.agent_configs:
-                # add the futurue to the future to agent map
-                future = executor.submit(
-                    self._run_single_agent, agent_config, code_diff
+        results = await asyncio.gather(
+            *(
+                self._review_whole(
+                    shard.code_diff,
+                    mode,
+                    deadline=deadline,
+                    agent_configs=agent_configs,
                 )
-                future_to_agent[future] = agent_config
-
-            # Process agent results as soon as they complete
-            for future in as_completed(future_to_agent):
-                agent_config = future_to_agent[future]
-                try:
-                    response = future.result()
-                    responses.append(response)
-                    print(f"✓ {agent_config.agent_name} completed")
-                except Exception as e:
-                    print(f"✗ {agent_config.agent_name} failed: {str(e)}")
-                    # Optionally add error handling or fallback
+                for shard in shards
+            )
+        )
+        parts: Dict[str, List[Tuple[Shard, AgentResponse]]] = {}
+        for shard, responses in zip(shards, results):
+            for response in responses:
+                parts.setdefault(response.agent_name, []).append((shard, response))
+        merged = self._merge_shards(parts)
+        _record_timeouts(merged)
+        if on_response is not None:
+            for response in merged:
+                await on_response(response)
+        return self._with_skipped(merged, skipped)
 
+    async def _review_whole(
+        self,
+        code_diff: CodeDiff,
+        mode: str,
+        on_response: Optional[Callable[[AgentResponse], Awaitable[None]]] = None,
+        deadline: Optional[float] = None,
+        agent_configs: Optional[List[AgentConfig]] = None,
+    ) -> List[AgentResponse]:
+        if mode == "separate":
+            return await self.review_async(
+                code_diff, on_response, deadline, agent_configs
+            )
+        if mode == "fused":
+            responses = await self.review_fused_async(
+                code_diff, deadline, agent_configs
+            )
+        elif mode == "cascade":
+            responses = await self.review_cascade_async(
+                code_diff, deadline, agent_configs
+            )
+        elif mode == "sequential":
+            responses = await asyncio.to_thread(
+                self.review_sequential, code_diff, deadline, agent_configs
+            )
+        elif mode == "parallel":
+            responses = await asyncio.to_thread(
+                self.review_parallel, code_diff, deadline, agent_configs
+            )
+        else:
+            raise ValueError(f"Unknown review mode: {mode}")
+        if on_response is not None:
+            for response in responses:
+                await on_response(response)
+        return responses
+
+    async def review_cascade_async(
+        self,
+        code_diff: CodeDiff,
+        deadline: Optional[float] = None,
+        agent_configs: Optional[List[AgentConfig]] = None,
+    ) -> List[AgentResponse]:
+        """Triage every agent cheaply and escalate only risky diffs to the full model"""
+        start = time.time()
+        agent_configs = agent_configs or self.agent_configs
+        results = await self._run_tasks(
+            [
+                lambda config=agent_config: self._run_cascade(config, code_diff)
+                for agent_config in agent_configs
+            ],
+            deadline,
+        )
+        responses: List[AgentResponse] = []
+        for agent_config, result in zip(agent_configs, results):
+            if isinstance(result, DeadlineExceeded):
+                responses.append(_timed_out(agent_config.agent_name, start))
+                continue
+            if isinstance(result, BaseException):
+                logger.warning("✗ %s failed: %s", agent_config.agent_name, result)
+                continue
+            responses.append(result)
         return responses
 
+    async def _run_cascade(
+        self, agent_config: AgentConfig, code_diff: CodeDiff
+    ) -> AgentResponse:
+        """One agent's cascade: triage, then the full review if risk is high enough.
+
+        With a triage model, the same agent runs on it first; its findings
+        score the risk and are the answer when the diff is not escalated.
+        Without one, a prescan-enabled agent is triaged by the static rules.
+        Other agents go straight to the full review ("direct").
+        """
+        agent_name = agent_config.agent_name
+        start = time.time()
+        triage: Optional[AgentResponse] = None
+        triage_agent = self.triage_agents.get(agent_name)
+        if triage_agent is not None:
+            try:
+                triage = await self._run_agent_async(triage_agent, code_diff)
+                risk = risk_score(triage.findings)
+            except Exception as e:
+                logger.warning("%s triage failed, escalating: %s", agent_name, e)
+                risk = 1.0
+        elif agent_config.prescan:
+            prescan = self._get_agent(agent_config).prescan(code_diff)
+            risk = prescan_risk(prescan)
+            triage = AgentResponse(
+                agent_name=agent_name,
+                findings=prescan.findings,
+                execution_time=round(time.time() - start, 2),
+                llm_skipped=True,
+                skip_reason=f"cascade triage: {prescan.reason}",
+            )
+        else:
+            risk = None
+
+        if risk is None:
+            path = "direct"
+            response = await self._run_single_agent_async(agent_config, code_diff)
+        elif risk >= agent_config.escalation_threshold:
+            path = "escalated"
+            response = await self._run_single_agent_async(agent_config, code_diff)
+        else:
+            path = "triage"
+            response = triage
+            full_seconds = self._generation_seconds.get(
+                (agent_name, self._get_agent(agent_config).model_name)
+            )
+            if full_seconds is not None:
+                saved = max(0.0, full_seconds - (time.time() - start))
+                review_stats.incr("cascade_seconds_saved", saved)
+                CASCADE_SECONDS_SAVED.labels(agent_name).inc(saved)
+
+        review_stats.incr(f"cascade_{path}")
+        CASCADE_PATHS.labels(agent_name, path).inc()
+        logger.info(
+            "%s cascade %s (risk %s)",
+            agent_name,
+            path,
+            "-" if risk is None else f"{risk:.2f}",
+        )
+        return response.model_copy(
+            update={
+                "cascade_path": path,
+                "risk_score": None if risk is None else round(risk, 3),
+            }
+        )
+
+    async def review_batch(
+        self, code_diffs: List[CodeDiff], deadline: Optional[float] = None
+    ) -> List[FileReviewResult]:
+        """Review many files at once, scheduling every (shard, agent) pair together.
+
+        Pairs not finished by the deadline are cancelled and reported as
+        timed out, so a slow file does not hold back the rest of the batch.
+        Agents the planner leaves out of a file are reported as skipped.
+        """
+        if not code_diffs:
+            return []
+        start = time.time()
+        plans = [self._plan(code_diff) for code_diff in code_diffs]
+        pairs = [
+            (file_index, shard, agent_config)
+            for file_index, code_diff in enumerate(code_diffs)
+            if plans[file_index].agent_configs
+            for shard in self._shard(code_diff)
+            for agent_config in plans[file_index].agent_configs
+        ]
+        if not pairs:
+            # The planner skipped every agent on every file
+            return [
+                FileReviewResult(
+                    file_path=code_diff.file_path,
+                    agent_responses=self._with_skipped([], plan.skipped),
+                )
+                for code_diff, plan in zip(code_diffs, plans)
+            ]
+        results = await self._run_tasks(
+            [
+                lambda diff=shard.code_diff, config=agent_config: (
+                    self._run_single_agent_async(config, diff)
+                )
+                for _, shard, agent_config in pairs
+            ],
+            deadline,
+        )
+
+        parts: List[Dict[str, List[Tuple[Shard, AgentResponse]]]] = [
+            {} for _ in code_diffs
+        ]
+        for (file_index, shard, agent_config), result in zip(pairs, results):
+            if isinstance(result, DeadlineExceeded):
+                result = _timed_out(agent_config.agent_name, start)
+            elif isinstance(result, BaseException):
+                logger.warning(
+                    "✗ %s failed on %s: %s",
+                    agent_config.agent_name,
+                    code_diffs[file_index].file_path,
+                    result,
+                )
+                continue
+            parts[file_index].setdefault(agent_config.agent_name, []).append(
+                (shard, result)
+            )
+        files = [
+            FileReviewResult(
+                file_path=code_diff.file_path,
+                agent_responses=self._with_skipped(
+                    self._merge_shards(file_parts), plan.skipped
+                ),
+            )
+            for code_diff, file_parts, plan in zip(code_diffs, parts, plans)
+        ]
+        _record_timeouts(
+            [response for file in files for response in file.agent_responses]
+        )
+        return files
+
+    async def _run_tasks(
+        self,
+        factories: List[Callable[[], Awaitable]],
+        deadline: Optional[float] = None,
+    ) -> List:
+        """Run coroutine factories, returning each one's result or exception.
+
+        At the deadline (a time.monotonic() value) running tasks are
+        cancelled and queued ones dropped; their entries are DeadlineExceeded.
+        """
+        if deadline is None:
+            return await self._run_all(factories)
+
+        results: List = [DeadlineExceeded() for _ in factories]
+
+        async def run(index: int, factory: Callable[[], Awaitable]) -> None:
+            try:
+                results[index] = await factory()
+            except Exception as e:
+                results[index] = e
+
+        try:
+            await _until(
+                deadline,
+                self._run_all(
+                    [
+                        lambda index=index, factory=factory: run(index, factory)
+                        for index, factory in enumerate(factories)
+                    ]
+                ),
+            )
+        except DeadlineExceeded:
+            logger.info("deadline passed, cancelling unfinished agents")
+        return results
+
+    async def _run_all(self, factories: List[Callable[[], Awaitable]]) -> List:
+        """Run coroutine factories through the shared scheduler when there is one,
+        otherwise bounded by max_workers for this orchestrator alone"""
+        if self.scheduler is not None:
+            return await self.scheduler.run_batch(factories)
+
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run(factory):
+            async with semaphore:
+                return await factory()
+
+        return await asyncio.gather(
+            *(run(factory) for factory in factories), return_exceptions=True
+        )
+
     def _run_single_agent(
         self, agent_config: AgentConfig, code_diff: CodeDiff
     ) -> AgentResponse:
         """Helper method to run a single agent"""
         start = time.time()
-        print(f"{agent_config.agent_name} STARTED")
+        logger.debug("%s STARTED", agent_config.agent_name)
+
+        agent = self._get_agent(agent_config)
+
+        cache_key, response = self._lookup_cache(agent, code_diff, start)
+        if response is not None:
+            return response
+
+        def generate() -> AgentResponse:
+            response = agent.analyze(code_diff=code_diff)
+            self._store_cache(cache_key, response, agent, code_diff)
+            return response
+
+        # Identical reviews already running share that generation
+        response, callers = self.inflight.run_sync(cache_key, generate)
+
+        end = time.time()
+        duration = end - start
+        AGENT_LATENCY.labels(agent_config.agent_name).observe(duration)
+        logger.info("%s FINISHED (%.2fs)", agent_config.agent_name, duration)
+        return _served(response, callers)
+
+    async def _run_single_agent_async(
+        self, agent_config: AgentConfig, code_diff: CodeDiff
+    ) -> AgentResponse:
+        """Async counterpart of _run_single_agent"""
+        return await self._run_agent_async(self._get_agent(agent_config), code_diff)
+
+    async def _run_agent_async(
+        self, agent: BaseAgent, code_diff: CodeDiff
+    ) -> AgentResponse:
+        start = time.time()
+        agent_name = agent.config.agent_name
+        logger.debug("%s STARTED", agent_name)
 
-        agent = create_agent(llm_client=self.llm_client, agent_config=agent_config)
-        response = agent.analyze(code_diff=code_diff)  # ← Move timing AFTER this
+        # The cache may read SQLite, so keep it off the event loop
+        cache_key, response = await asyncio.to_thread(
+            self._lookup_cache, agent, code_diff, start
+        )
+        if response is not None:
+            return response
+
+        async def generate() -> AgentResponse:
+            generation_start = time.time()
+            response = await agent.analyze_async(code_diff=code_diff)
+            if not response.llm_skipped:
+                self._observe_generation(agent, time.time() - generation_start)
+            await asyncio.to_thread(
+                self._store_cache, cache_key, response, agent, code_diff
+            )
+            return response
+
+        response, callers = await self.inflight.run(cache_key, generate)
 
         end = time.time()
         duration = end - start
-        print(f"{agent_config.agent_name} FINISHED ({duration:.2f}s)")
-        return response
+        AGENT_LATENCY.labels(agent_name).observe(duration)
+        logger.info("%s FINISHED (%.2fs)", agent_name, duration)
+        return _served(response, callers)
+
+    def _observe_generation(self, agent: BaseAgent, seconds: float) -> None:
+        key = (agent.config.agent_name, agent.model_name)
+        previous = self._generation_seconds.get(key)
+        self._generation_seconds[key] = (
+            seconds
+            if previous is None
+            else previous + (seconds - previous) * LATENCY_SMOOTHING
+        )
+
+    async def _run_single_agent_stream(
+        self, agent_config: AgentConfig, code_diff: CodeDiff, on_finding
+    ) -> AgentResponse:
+        """Streaming counterpart of _run_single_agent_async"""
+        start = time.time()
+        logger.debug("%s STARTED", agent_config.agent_name)
+
+        agent = self._get_agent(agent_config)
+
+        cache_key, response = await asyncio.to_thread(
+            self._lookup_cache, agent, code_diff, start
+        )
+        if response is not None:
+            return response
+
+        leader = False
+
+        async def generate() -> AgentResponse:
+            response = await agent.analyze_stream(
+                code_diff=code_diff, on_finding=on_finding
+            )
+            await asyncio.to_thread(
+                self._store_cache, cache_key, response, agent, code_diff
+            )
+            return response
+
+        def start_generation():
+            nonlocal leader
+            leader = True
+            return generate()
+
+        response, callers = await self.inflight.run(cache_key, start_generation)
+        if not leader:
+            # Joined a generation streaming to another caller: report its
+            # findings now that they are all known
+            for finding in response.findings:
+                await on_finding(finding)
+
+        end = time.time()
+        duration = end - start
+        AGENT_LATENCY.labels(agent_config.agent_name).observe(duration)
+        logger.info("%s FINISHED (%.2fs)", agent_config.agent_name, duration)
+        return _served(response, callers)
+
+    def _lookup_cache(
+        self, agent: BaseAgent, code_diff: CodeDiff, start: float
+    ) -> Tuple[str, Optional[AgentResponse]]:
+        """Returns the agent's content key for this diff, and a cached response.
+
+        An exact hit comes from the review cache; failing that, the findings
+        of a near-identical review from the near-duplicate index.
+        """
+        cache_key = agent.cache_key(code_diff)
+        response = None
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is None:
+                review_stats.incr("cache_misses")
+            else:
+                review_stats.incr("cache_hits")
+                response = AgentResponse.model_validate_json(cached)
+                logger.info("%s CACHE HIT", agent.config.agent_name)
+        if response is None and self.near_duplicates is not None:
+            response = self._lookup_near_duplicate(agent, code_diff)
+        if response is None:
+            return cache_key, None
+
+        response.cache_hit = True
+        response.execution_time = round(time.time() - start, 2)
+        AGENT_LATENCY.labels(agent.config.agent_name).observe(time.time() - start)
+        return cache_key, response
+
+    def _lookup_near_duplicate(
+        self, agent: BaseAgent, code_diff: CodeDiff
+    ) -> Optional[AgentResponse]:
+        language = code_diff.language
+        match = self.near_duplicates.lookup(
+            agent.review_scope(language), agent.reviewed_lines(code_diff), language
+        )
+        if match is None:
+            return None
+        similarity, findings = match
+        review_stats.incr("near_duplicate_calls_saved")
+        logger.info(
+            "%s NEAR-DUPLICATE HIT (similarity %.2f)",
+            agent.config.agent_name,
+            similarity,
+        )
+        return AgentResponse(
+            agent_name=agent.config.agent_name,
+            findings=findings,
+            execution_time=0,
+            similarity=round(similarity, 3),
+        )
+
+    def _store_cache(
+        self,
+        cache_key: str,
+        response: AgentResponse,
+        agent: BaseAgent,
+        code_diff: CodeDiff,
+    ) -> None:
+        if self.cache is not None:
+            self.cache.set(cache_key, response.model_dump_json())
+        if self.near_duplicates is not None and not response.llm_skipped:
+            self.near_duplicates.add(
+                agent.review_scope(code_diff.language),
+                agent.reviewed_lines(code_diff),
+                code_diff.language,
+                response.findings,
+            )
+
+    def _lookup_fused_cache(
+        self, fused_agent: BaseAgent, code_diff: CodeDiff, start: float
+    ) -> Tuple[str, Optional[List[AgentResponse]]]:
+        cache_key = fused_agent.cache_key(code_diff)
+        if self.cache is None:
+            return cache_key, None
+
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            review_stats.incr("cache_misses")
+            return cache_key, None
+
+        review_stats.incr("cache_hits")
+        responses = _response_list.validate_json(cached)
+        for response in responses:
+            response.cache_hit = True
+            response.execution_time = round(time.time() - start, 2)
+        logger.info("fused review CACHE HIT")
+        return cache_key, responses
+
+    def _store_fused_cache(
+        self, cache_key: str, responses: List[AgentResponse]
+    ) -> None:
+        if self.cache is not None:
+            self.cache.set(cache_key, _response_list.dump_json(responses).decode())
+
+
+def _is_sharded(code_diff: CodeDiff, shards: List[Shard]) -> bool:
+    return len(shards) > 1 or shards[0].code_diff is not code_diff
+
+
+def _remaining(deadline: float) -> float:
+    return deadline - time.monotonic()
+
+
+async def _until(deadline: Optional[float], awaitable: Awaitable):
+    """Await, cancelling at the deadline and raising DeadlineExceeded then"""
+    if deadline is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, _remaining(deadline))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded() from None
+
+
+def _timed_out(agent_name: str, start: float) -> AgentResponse:
+    review_stats.incr("agents_timed_out")
+    return AgentResponse(
+        agent_name=agent_name,
+        findings=[],
+        execution_time=round(time.time() - start, 2),
+        status="timed_out",
+    )
+
+
+def _record_timeouts(responses: List[AgentResponse]) -> None:
+    if any(response.status == "timed_out" for response in responses):
+        REVIEWS_ABORTED.labels("deadline").inc()
+
+
+def _served(response: AgentResponse, callers: int) -> AgentResponse:
+    """Per-caller copy recording how many callers the generation served"""
+    return response.model_copy(update={"served_callers": callers})
@@ -0,0 +1,194 @@
+import ast
+import difflib
+import re
+from typing import Dict, List, Optional, Tuple
+
+from src.models import AgentFinding, AgentResponse, CodeDiff
+
+# String literals and line comments, blanked before counting braces
+BRACE_NOISE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`|//.*$')
+# Lines that belong to the declaration below them
+LEADING_LINE_PREFIXES = ("#", "//", "/*", "*", "@")
+
+
+class Shard:
+    """One slice of a file, reviewed on its own.
+
+    code_diff holds only the slice; line_offset is the number of new-file
+    lines before it, so a finding's absolute line is its shard line plus
+    line_offset.
+    """
+
+    def __init__(self, code_diff: CodeDiff, line_offset: int = 0):
+        self.code_diff = code_diff
+        self.line_offset = line_offset
+
+    def to_file_finding(self, finding: AgentFinding) -> AgentFinding:
+        if not self.line_offset:
+            return finding
+        return finding.model_copy(
+            update={"line_number": finding.line_number + self.line_offset}
+        )
+
+
+def split_into_shards(code_diff: CodeDiff, max_lines: int) -> List[Shard]:
+    """Split a large file at function and class boundaries into changed shards.
+
+    Top-level units are packed into shards of at most max_lines new-file
+    lines; a single unit longer than that is cut at max_lines. Each shard
+    carries the old code aligned with its new lines, and shards whose old
+    and new code are identical are dropped, so an edit to one function in a
+    big file only reviews that part. Files of max_lines or fewer come back
+    as one shard holding the original diff.
+    """
+    new_lines = code_diff.new_code.splitlines(keepends=True)
+    if max_lines <= 0 or len(new_lines) <= max_lines:
+        return [Shard(code_diff)]
+
+    old_lines = code_diff.old_code.splitlines(keepends=True)
+    opcodes = difflib.SequenceMatcher(
+        None, old_lines, new_lines, autojunk=False
+    ).get_opcodes()
+    starts = unit_starts(code_diff.new_code, code_diff.language)
+    shards = []
+    for j1, j2 in _pack(starts, len(new_lines), max_lines):
+        i1, i2 = _old_index(opcodes, j1), _old_index(opcodes, j2)
+        old_code, new_code = "".join(old_lines[i1:i2]), "".join(new_lines[j1:j2])
+        if old_code == new_code:
+            continue
+        shard_diff = code_diff.model_copy(
+            update={"old_code": old_code, "new_code": new_code}
+        )
+        shards.append(Shard(shard_diff, line_offset=j1))
+    return shards or [Shard(code_diff)]
+
+
+def unit_starts(code: str, language: str) -> List[int]:
+    """0-based lines where a top-level declaration (or a class member) starts"""
+    starts: Optional[List[int]] = None
+    if language.lower() == "python":
+        starts = _python_starts(code)
+    if starts is None:
+        starts = _brace_starts(code)
+    lines = code.splitlines()
+    # Keep comments, docstring banners and decorators with what follows them
+    attached = set()
+    for start in starts:
+        while start > 0 and lines[start - 1].lstrip().startswith(LEADING_LINE_PREFIXES):
+            start -= 1
+        attached.add(start)
+    return sorted(attached | {0})
+
+
+def _python_starts(code: str) -> Optional[List[int]]:
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    nodes = list(tree.body)
+    # Methods are boundaries too, so a long class can still be split
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            nodes.extend(node.body)
+    starts = []
+    for node in nodes:
+        decorators = getattr(node, "decorator_list", [])
+        starts.append(min([node.lineno] + [d.lineno for d in decorators]) - 1)
+    return starts
+
+
+def _brace_starts(code: str) -> List[int]:
+    """Unindented lines at brace depth 0: declarations in Go, JS and the like"""
+    starts = []
+    depth = 0
+    for index, line in enumerate(code.splitlines()):
+        if (
+            depth == 0
+            and line.strip()
+            and not line[0].isspace()
+            and not line.startswith(("}", ")", "]"))
+        ):
+            starts.append(index)
+        stripped = BRACE_NOISE.sub("", line)
+        depth = max(0, depth + stripped.count("{") - stripped.count("}"))
+    return starts
+
+
+def _pack(starts: List[int], total: int, max_lines: int) -> List[Tuple[int, int]]:
+    """Group consecutive units into [start, end) ranges of at most max_lines"""
+    units = list(zip(starts, starts[1:] + [total]))
+    ranges: List[Tuple[int, int]] = []
+    current: Optional[List[int]] = None
+    for start, end in units:
+        if current is not None and end - current[0] <= max_lines:
+            current[1] = end
+            continue
+        if current is not None:
+            ranges.append((current[0], current[1]))
+        # A unit longer than a shard is cut into max_lines pieces
+        while end - start > max_lines:
+            ranges.append((start, start + max_lines))
+            start += max_lines
+        current = [start, end]
+    if current is not None:
+        ranges.append((current[0], current[1]))
+    return ranges
+
+
+def _old_index(opcodes, new_index: int) -> int:
+    """Old-file line aligned with a new-file line, for slicing the old code"""
+    for _, i1, i2, j1, j2 in opcodes:
+        if j1 <= new_index < j2:
+            return i1 + min(new_index - j1, i2 - i1)
+    return opcodes[-1][2] if opcodes else 0
+
+
+def _total(values) -> Optional[int]:
+    """Sum over shards, or None when any shard did not report a value"""
+    values = list(values)
+    return None if None in values else sum(values)
+
+
+def merge_shard_responses(
+    parts: List[Tuple[Shard, AgentResponse]]
+) -> AgentResponse:
+    """One agent's responses for every shard of a file, as one file response.
+
+    Findings get absolute line numbers; a finding reported twice for the
+    same line and issue keeps its most confident copy.
+    """
+    if len(parts) == 1 and not parts[0][0].line_offset:
+        return parts[0][1]
+    best: Dict[Tuple[int, str], AgentFinding] = {}
+    for shard, response in parts:
+        for finding in response.findings:
+            finding = shard.to_file_finding(finding)
+            key = (finding.line_number, finding.issue_type)
+            if key not in best or finding.confidence > best[key].confidence:
+                best[key] = finding
+    responses = [response for _, response in parts]
+    skipped = all(response.llm_skipped for response in responses)
+    # A shard that ran out of time leaves the file partly reviewed
+    timed_out = any(response.status == "timed_out" for response in responses)
+    return AgentResponse(
+        agent_name=responses[0].agent_name,
+        findings=sorted(best.values(), key=lambda finding: finding.line_number),
+        # Shards run side by side, so the slowest one is the file's latency
+        execution_time=max(response.execution_time for response in responses),
+        cache_hit=all(response.cache_hit for response in responses),
+        llm_skipped=skipped,
+        skip_reason=responses[0].skip_reason if skipped else None,
+        served_callers=min(response.served_callers for response in responses),
+        prompt_trimmed=any(response.prompt_trimmed for response in responses),
+        shards=len(parts),
+        similarity=(
+            min(response.similarity for response in responses)
+            if all(response.similarity is not None for response in responses)
+            else None
+        ),
+        prompt_tokens=_total(response.prompt_tokens for response in responses),
+        prompt_tokens_before_compaction=_total(
+            response.prompt_tokens_before_compaction for response in responses
+        ),
+        status="timed_out" if timed_out else "completed",
+    )
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.metrics import review_stats
+
+
+class _Flight:
+    def __init__(self, task: Optional[asyncio.Future] = None):
+        self.task = task
+        # Every caller the execution served, and those still waiting on it
+        self.callers = 1
+        self.waiting = 1
+        # Used by the thread-based path only
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key starts the work; callers that arrive while it
+    is running wait for the same result (or exception) instead of starting
+    their own. Each caller gets back the result and the number of callers
+    the execution served. The work runs in its own task, so one caller going
+    away does not cancel it for the others; it is cancelled only when every
+    waiting caller has gone.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._sync_flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights) + len(self._sync_flights)
+
+    async def run(
+        self, key: str, factory: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, int]:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            flight.callers += 1
+            flight.waiting += 1
+            review_stats.incr("coalesced_callers")
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            flight.waiting -= 1
+            if flight.waiting == 0:
+                flight.task.cancel()
+            raise
+        flight.waiting -= 1
+        return result, flight.callers
+
+    def run_sync(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, int]:
+        """Thread-based counterpart of run for the worker-pool path"""
+        with self._lock:
+            flight = self._sync_flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._sync_flights[key] = flight
+            else:
+                flight.callers += 1
+                review_stats.incr("coalesced_callers")
+        if leader:
+            try:
+                flight.result = fn()
+            except BaseException as e:
+                flight.error = e
+            finally:
+                with self._lock:
+                    del self._sync_flights[key]
+                flight.done.set()
+                self._record(flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result, flight.callers
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        self._record(flight)
+
+    def _record(self, flight: _Flight) -> None:
+        if flight.callers > 1:
+            review_stats.incr("generations_shared")
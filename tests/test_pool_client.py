@@ -0,0 +1,187 @@
+import asyncio
+import time
+
+import httpx
+import ollama
+import pytest
+
+from src.clients.pool_client import (
+    CLOSED,
+    OPEN,
+    NoHealthyHostError,
+    OllamaPoolClient,
+)
+from src.metrics import review_stats
+
+MODEL = "test-model"
+
+
+def chat_reply(content: str) -> httpx.Response:
+    return httpx.Response(
+        200,
+        json={
+            "model": MODEL,
+            "created_at": "2024-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+        },
+    )
+
+
+def mount(pool: OllamaPoolClient, handlers) -> None:
+    """Route each host's sync and async HTTP calls to a handler"""
+    for backend, handler in zip(pool.backends, handlers):
+        host = backend.client.host
+        if asyncio.iscoroutinefunction(handler):
+            backend.client._async_client = ollama.AsyncClient(
+                host=host, transport=httpx.MockTransport(handler)
+            )
+        else:
+            backend.client._client = ollama.Client(
+                host=host, transport=httpx.MockTransport(handler)
+            )
+
+
+def counter(name: str) -> float:
+    return review_stats.snapshot().get(name, 0)
+
+
+def test_sync_call_fails_over_on_server_error():
+    pool = OllamaPoolClient(MODEL, ["http://a:11434", "http://b:11434"])
+    mount(
+        pool,
+        [
+            lambda request: httpx.Response(500, json={"error": "out of memory"}),
+            lambda request: chat_reply("from b"),
+        ],
+    )
+    failovers = counter("pool_failovers")
+
+    assert pool.generate("system", "user") == "from b"
+    assert counter("pool_failovers") == failovers + 1
+    first, second = pool.backends
+    assert first.breaker._failures == 1
+    assert first.outstanding == 0 and second.outstanding == 0
+    assert MODEL in second.loaded_models
+
+
+def test_async_call_fails_over_on_connection_error():
+    async def refused(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async def healthy(request):
+        return chat_reply("from b")
+
+    pool = OllamaPoolClient(
+        MODEL, ["http://a:11434", "http://b:11434"], failure_threshold=1
+    )
+    mount(pool, [refused, healthy])
+
+    assert asyncio.run(pool.generate_async("system", "user")) == "from b"
+    assert pool.backends[0].breaker.state == OPEN
+    assert pool.backends[1].breaker.state == CLOSED
+
+
+def test_client_errors_do_not_fail_over():
+    calls = []
+
+    def bad_request(request):
+        calls.append(request)
+        return httpx.Response(400, json={"error": "invalid options"})
+
+    pool = OllamaPoolClient(MODEL, ["http://a:11434", "http://b:11434"])
+    mount(pool, [bad_request, bad_request])
+
+    with pytest.raises(ollama.ResponseError):
+        pool.generate("system", "user")
+    assert len(calls) == 1
+    assert pool.backends[0].breaker._failures == 0
+
+
+def test_breaker_reopens_after_failed_probe():
+    calls = []
+
+    def down(request):
+        calls.append(request)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    pool = OllamaPoolClient(
+        MODEL, ["http://a:11434"], failure_threshold=1, reset_timeout=0.05
+    )
+    mount(pool, [down])
+    breaker = pool.backends[0].breaker
+
+    with pytest.raises(ConnectionError):
+        pool.generate("system", "user")
+    assert breaker.state == OPEN
+    # Still open: nothing reaches the host
+    with pytest.raises(NoHealthyHostError):
+        pool.generate("system", "user")
+    assert len(calls) == 1
+
+    time.sleep(0.06)
+    # Timeout passed: one probe goes through, fails and re-opens the breaker
+    with pytest.raises(ConnectionError):
+        pool.generate("system", "user")
+    assert len(calls) == 2
+    assert breaker.state == OPEN
+    with pytest.raises(NoHealthyHostError):
+        pool.generate("system", "user")
+    assert len(calls) == 2
+
+
+def test_breaker_closes_after_successful_probe():
+    responses = [
+        httpx.Response(503, json={"error": "loading"}),
+        chat_reply("recovered"),
+    ]
+    pool = OllamaPoolClient(
+        MODEL, ["http://a:11434"], failure_threshold=1, reset_timeout=0.05
+    )
+    mount(pool, [lambda request: responses.pop(0)])
+
+    with pytest.raises(ollama.ResponseError):
+        pool.generate("system", "user")
+    time.sleep(0.06)
+    assert pool.generate("system", "user") == "recovered"
+    assert pool.backends[0].breaker.state == CLOSED
+
+
+def test_losing_hedge_is_cancelled():
+    slow_cancelled = asyncio.Event()
+
+    async def slow(request):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            slow_cancelled.set()
+            raise
+        return chat_reply("from a")
+
+    async def fast(request):
+        return chat_reply("from b")
+
+    pool = OllamaPoolClient(
+        MODEL,
+        ["http://a:11434", "http://b:11434"],
+        hedge_percentile=0.5,
+        hedge_min_samples=1,
+    )
+    mount(pool, [slow, fast])
+    # Recent calls took 10ms, so a call still running after that is hedged
+    pool._latencies[MODEL] = [0.01]
+    hedges, wins = counter("pool_hedges"), counter("pool_hedge_wins")
+
+    async def run():
+        result = await pool.generate_async("system", "user")
+        await asyncio.wait_for(slow_cancelled.wait(), timeout=1)
+        return result
+
+    assert asyncio.run(run()) == "from b"
+    assert counter("pool_hedges") == hedges + 1
+    assert counter("pool_hedge_wins") == wins + 1
+    slow_backend, fast_backend = pool.backends
+    assert slow_backend.outstanding == 0 and fast_backend.outstanding == 0
+    # Losing the race says nothing about the host's health
+    assert slow_backend.breaker.state == CLOSED
+    assert slow_backend.breaker._failures == 0